@@ -1,14 +1,35 @@
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
+from app.services.embedding_model import get_embedding_model, is_embedding_model_ready
+from app.services.llm_backends import is_llm_sdk_loaded, load_llm_sdk
+from app.services.warmup import register_component, start_warmup, startup_phase, warm_components
+from app.utils.pdf_utils import is_pdf_engine_loaded, load_pdf_engine
+import logging
 import os
+import time
 from dotenv import load_dotenv
 
+logger = logging.getLogger(__name__)
+
+def register_components(config):
+    """Declare the slow-to-load dependencies that warmup loads and /api/ready reports on."""
+    register_component('pdf_engine', load_pdf_engine, is_pdf_engine_loaded)
+    register_component(
+        'embedder',
+        lambda: get_embedding_model(config['EMBEDDING_MODEL_NAME'], **config['EMBEDDER_OPTIONS']),
+        is_embedding_model_ready
+    )
+    register_component('llm_client', load_llm_sdk, is_llm_sdk_loaded)
+
 def create_app():
+    started = time.perf_counter()
     app = Flask(__name__)
     app.config.from_object(Config)
-    
+
     load_dotenv()
+    logging.basicConfig(level=app.config['LOG_LEVEL'], format='%(asctime)s %(levelname)s [%(name)s] %(message)s')
 
     # Dynamically set CORS origins based on environment
     if os.getenv('FLASK_ENV') == 'development':
@@ -16,9 +37,34 @@ def create_app():
     else:
         CORS(app, resources={r"/*": {"origins": "https://resume-intelli.vercel.app"}})
 
+    if app.config['TRUSTED_PROXY_HOPS']:
+        # remote_addr is the proxy otherwise, and every client would share one quota
+        hops = app.config['TRUSTED_PROXY_HOPS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    
-    from app.routes import api
-    app.register_blueprint(api)
+    if app.config['PDF_PARALLEL_WORKERS'] > 1 and app.config['RESUME_TOKEN_BUDGET']:
+        logger.warning("PDF_PARALLEL_WORKERS has no effect while RESUME_TOKEN_BUDGET is set; "
+                       "budgeted extraction reads pages in order and stops early")
+
+    register_components(app.config)
+    warmup = [name for name in app.config['WARMUP_COMPONENTS'] if name]
+    if not app.config['EMBEDDER_WARMUP'] and 'embedder' in warmup:
+        warmup.remove('embedder')
+
+    # Under gunicorn's preload_app this runs once in the master, so workers
+    # inherit the loaded model instead of each loading it on first request.
+    # Warmup can't run on a thread there: threads don't survive the fork.
+    if app.config['EMBEDDER_PRELOAD']:
+        with startup_phase('preload'):
+            warm_components(dict.fromkeys(warmup + ['embedder']))
+    elif warmup:
+        # Loads on a background thread while the worker starts serving; /api/ready answers 503 until it's done
+        start_warmup(warmup)
+
+    with startup_phase('routes'):
+        from app.routes import api
+        app.register_blueprint(api)
 
+    logger.info("App created in %.2fs", time.perf_counter() - started)
     return app
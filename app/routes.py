@@ -1,13 +1,40 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, g, stream_with_context
 from flask_cors import CORS
-from werkzeug.utils import secure_filename
-from app.services.resume_analyzer import ResumeAnalyzer
-from app.utils.pdf_utils import read_text_from_pdf
+from app.services.resume_analyzer import GENERATION_MODELS, ResumeAnalyzer
+from app.services.embedding_model import is_embedding_model_ready
+from app.services.embedding_cache import EmbeddingCache
+from app.services.vector_index import VectorIndex
+from app.services.llm_cache import LLMResponseCache
+from app.services.token_budget import RateLimitExceeded, TokenBudget
+from app.services.llm_client import LLMUnavailable, ResilientLLMClient
+from app.services.llm_backends import create_backend
+from app.services.warmup import component_status, is_ready
+from app.services.job_queue import TERMINAL_STATUSES, JobQueue, QueueFull
+from app.utils.resume_parser import parsed_resume_cache
+from app.utils.document_utils import UnsupportedDocument, detect_format, extract_document, extract_many
+from app.utils.pdf_utils import spooled_upload
+from app.utils.cache import SqliteCache, content_hash, create_cache
+from app.utils.concurrency import run_blocking
+from app.utils.metrics import HTTP_DURATION, HTTP_ERRORS, HTTP_REQUESTS, REGISTRY, current_timings, server_timing, stage, start_timings
+from app.utils.streaming import STREAM_FORMATS, event_stream_response, ndjson_event, section_events, sse_event, streaming_response
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+import contextvars
+import hashlib
+import hmac
+import logging
+import math
 import os
+import threading
+import time
+import uuid
+import zipfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Add multiple origins for development
 allowed_origins = ["https://resume-intelli.vercel.app"]
 
@@ -18,15 +45,278 @@ api = Blueprint('api', __name__)
 CORS(api, origins=allowed_origins)
 
 analyzer = None
+text_cache = None
+vector_indexes = {}
+vector_index_lock = threading.Lock()
+generation_pool = None
+job_queue = None
+
+# Sections of /api/application_pack and the ResumeAnalyzer method producing each
+PACK_SECTIONS = {
+    'feedback': 'analyze_match_with_groq',
+    'custom_resume': 'generate_custom_resume_logic',
+    'cover_letter': 'generate_cover_letter'
+}
+
+# Searching one kind of document returns the other kind
+INDEX_KINDS = {'resumes': 'jobs', 'jobs': 'resumes'}
+
+def embedding_cache_namespace(config) -> str:
+    """Key cached vectors by backend as well as model: int8 vectors are close to float32 ones, not equal."""
+    backend = config['EMBEDDER_OPTIONS']['backend']
+    if backend == 'torch':
+        return config['EMBEDDING_MODEL_NAME']
+    return f"{config['EMBEDDING_MODEL_NAME']}@{backend}"
 
 def init_analyzer():
     global analyzer
     if analyzer is None:
-        analyzer = ResumeAnalyzer(os.getenv('GROQ_API_KEY'))
+        config = current_app.config
+        persistent = None
+        if config['EMBEDDING_CACHE_PERSISTENT']:
+            persistent = SqliteCache(
+                config['CACHE_PATH'],
+                max_entries=config['EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES'],
+                namespace='embeddings'
+            )
+        embedding_cache = EmbeddingCache(
+            embedding_cache_namespace(config),
+            max_entries=config['EMBEDDING_CACHE_MAX_ENTRIES'],
+            persistent=persistent
+        )
+        response_cache = None
+        if config['LLM_CACHE_BACKEND'] != 'none':
+            response_cache = LLMResponseCache(
+                create_cache(
+                    config['LLM_CACHE_BACKEND'],
+                    max_entries=config['LLM_CACHE_MAX_ENTRIES'],
+                    path=config['CACHE_PATH'],
+                    namespace='llm_responses'
+                ),
+                ttls=config['LLM_CACHE_TTLS']
+            )
+        token_budget = TokenBudget(
+            config['GROQ_MODEL_TOKENS_PER_MINUTE'],
+            client_tokens_per_hour=config['CLIENT_TOKENS_PER_HOUR'],
+            path=config['CACHE_PATH'] if config['TOKEN_BUDGET_SHARED'] else None,
+            max_wait=config['TOKEN_BUDGET_MAX_WAIT']
+        )
+        backend = create_backend(
+            config['LLM_BACKEND'],
+            api_key=os.getenv('GROQ_API_KEY'),
+            base_url=config['LLM_BASE_URL'],
+            timeout=config['LLM_TIMEOUT'],
+            pool_size=config['LLM_POOL_SIZE'],
+            fake_options=config['FAKE_LLM_OPTIONS']
+        )
+        llm_client = ResilientLLMClient(
+            backend,
+            fallbacks=config['GROQ_MODEL_FALLBACKS'] if config['LLM_MODEL_FALLBACK'] else None,
+            timeout=config['LLM_TIMEOUT'],
+            deadline=config['LLM_DEADLINE'],
+            max_attempts=config['LLM_MAX_ATTEMPTS'],
+            backoff_base=config['LLM_BACKOFF_BASE'],
+            backoff_max=config['LLM_BACKOFF_MAX'],
+            hedge_after=config['LLM_HEDGE_AFTER'] or None,
+            pool_size=config['LLM_POOL_SIZE'],
+            breaker_threshold=config['LLM_BREAKER_THRESHOLD'],
+            breaker_reset=config['LLM_BREAKER_RESET']
+        )
+        analyzer = ResumeAnalyzer(
+            os.getenv('GROQ_API_KEY'),
+            config['EMBEDDING_MODEL_NAME'],
+            embedding_cache,
+            response_cache,
+            token_budget,
+            config['COMPLETION_TOKEN_ESTIMATE'],
+            # A prompt bigger than a model's per-minute limit is rejected however long it waits
+            context_windows={
+                model: min(window, config['GROQ_MODEL_TOKENS_PER_MINUTE'].get(model) or window)
+                for model, window in config['GROQ_MODEL_CONTEXT_WINDOWS'].items()
+            },
+            compact_prompts=config['PROMPT_COMPACTION'],
+            llm_client=llm_client,
+            select_sections=config['PROMPT_SECTION_SELECTION'],
+            embedder_options=config['EMBEDDER_OPTIONS']
+        )
+
+def init_text_cache():
+    global text_cache
+    if text_cache is None:
+        config = current_app.config
+        text_cache = create_cache(
+            config['TEXT_CACHE_BACKEND'],
+            max_entries=config['TEXT_CACHE_MAX_ENTRIES'],
+            ttl=config['TEXT_CACHE_TTL'],
+            path=config['CACHE_PATH'],
+            namespace='resume_text'
+        )
+
+def run_generation_job(section: str):
+    """Build the job handler that runs the ResumeAnalyzer generation behind a pack section."""
+    method = PACK_SECTIONS[section]
+    def handler(payload: dict) -> str:
+        return getattr(analyzer, method)(
+            payload['resume_text'],
+            payload['job_description'],
+            use_cache=payload['use_cache'],
+            client_id=payload['client_id']
+        )
+    return handler
+
+def init_job_queue():
+    global job_queue
+    if job_queue is None:
+        config = current_app.config
+        job_queue = JobQueue(
+            {section: run_generation_job(section) for section in PACK_SECTIONS},
+            path=config['CACHE_PATH'] if config['JOB_QUEUE_SHARED'] else None,
+            workers=config['JOB_WORKERS'],
+            max_depth=config['JOB_QUEUE_MAX_DEPTH'],
+            ttl=config['JOB_TTL']
+        )
+
+# Probes answer from component state alone; they must not wait on, or fail with, the analyzer setup
+PROBE_ENDPOINTS = ('api.health_check', 'api.readiness_check')
 
 @api.before_request
 def before_request():
+    g.request_started = time.perf_counter()
+    start_timings()
+    if request.endpoint in PROBE_ENDPOINTS:
+        return
     init_analyzer()
+    init_text_cache()
+    init_job_queue()
+
+def request_endpoint() -> str:
+    # The route pattern, not the path, so ids don't explode the label set
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@api.after_request
+def after_request(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request_endpoint()
+    HTTP_REQUESTS.inc(endpoint, request.method, response.status_code)
+    HTTP_DURATION.observe(elapsed, endpoint)
+    if current_app.config['SERVER_TIMING']:
+        # Streamed responses only report the stages finished before the body starts
+        response.headers['Server-Timing'] = server_timing(current_timings(), elapsed)
+    return response
+
+def server_error_response(error: Exception):
+    """Log an unexpected failure, count it by exception type and return a 500."""
+    logger.exception("%s %s failed", request.method, request.path)
+    HTTP_ERRORS.inc(request_endpoint(), type(error).__name__)
+    return jsonify({'error': str(error)}), 500
+
+def get_generation_pool() -> ThreadPoolExecutor:
+    """Shared, bounded pool for running LLM generations concurrently."""
+    global generation_pool
+    if generation_pool is None:
+        generation_pool = ThreadPoolExecutor(
+            max_workers=current_app.config['GENERATION_POOL_SIZE'],
+            thread_name_prefix='generation'
+        )
+    return generation_pool
+
+def get_client_id() -> str:
+    """
+    Identify the caller for per-client token quotas.
+
+    A client-supplied X-Client-Id is only used when X-Client-Signature is
+    its HMAC-SHA256 under CLIENT_ID_SECRET, so callers can't spread their
+    usage across made-up ids. Everyone else is keyed on their address, which
+    is the real client address when TRUSTED_PROXY_HOPS is set.
+    """
+    client_id = request.headers.get('X-Client-Id')
+    secret = current_app.config['CLIENT_ID_SECRET']
+    if client_id and secret:
+        expected = hmac.new(secret.encode(), client_id.encode(), hashlib.sha256).hexdigest()
+        if hmac.compare_digest(request.headers.get('X-Client-Signature', ''), expected):
+            return client_id
+    return request.remote_addr or 'anonymous'
+
+def rate_limited_response(error: RateLimitExceeded):
+    response = jsonify({'error': str(error), 'retry_after': round(error.retry_after, 1)})
+    response.headers['Retry-After'] = str(math.ceil(error.retry_after))
+    return response, 429
+
+def unavailable_response(error: LLMUnavailable):
+    response = jsonify({'error': str(error), 'retry_after': round(error.retry_after, 1)})
+    response.headers['Retry-After'] = str(math.ceil(error.retry_after))
+    return response, 503
+
+def wants_fresh_generation() -> bool:
+    """True when the caller asked for a new LLM response instead of a cached one (fresh=true)."""
+    return request.values.get('fresh', 'false').lower() == 'true'
+
+def validate_resume_request():
+    """
+    Check the resume upload and job description on the current request.
+
+    Returns:
+        An error response tuple, or None when the request is valid
+    """
+    with stage('upload'):
+        # The first access to request.files receives and parses the whole multipart body
+        has_resume = 'resume' in request.files
+    if not has_resume:
+        return jsonify({'error': 'No resume file provided'}), 400
+    
+    resume_file = request.files['resume']
+    
+    if not hasattr(resume_file, 'filename'):
+        return jsonify({'error': 'Invalid file object'}), 400
+    
+    if not request.form.get('jobDescription'):
+        return jsonify({'error': 'No job description provided'}), 400
+    
+    if resume_file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+        
+    # Sniffed from the leading bytes; the stream is left at the start for extraction
+    if detect_format(resume_file.stream) is None:
+        return jsonify({'error': 'Only PDF, DOCX and plain text files are allowed'}), 400
+    
+    return None
+
+def extract_resume_text(resume_file):
+    """
+    Return the text of an uploaded resume, reusing earlier extractions of the same bytes.
+
+    PDF, DOCX and plain text uploads are all accepted (see extract_document).
+    Extraction stops once RESUME_TOKEN_BUDGET is met, so the result reports
+    whether the resume was cut short.
+    """
+    config = current_app.config
+    with ExitStack() as stack:
+        with stage('upload'):
+            digest, source = stack.enter_context(
+                spooled_upload(resume_file.stream, config['UPLOAD_SPOOL_THRESHOLD'], config['UPLOAD_FOLDER'])
+            )
+        cache_key = f"{digest}:{config['PDF_MAX_PAGES']}:{config['RESUME_TOKEN_BUDGET']}"
+        extraction = text_cache.get(cache_key)
+        if extraction is not None:
+            return extraction
+
+        with stage('extract'):
+            extraction = run_blocking(
+                extract_document,
+                source,
+                max_tokens=config['RESUME_TOKEN_BUDGET'] or None,
+                max_pages=config['PDF_MAX_PAGES'],
+                workers=config['PDF_PARALLEL_WORKERS'],
+                min_parallel_pages=config['PDF_PARALLEL_MIN_PAGES'],
+                engine=config['PDF_ENGINE']
+            )
+
+    if extraction.text:
+        text_cache.set(cache_key, extraction)
+    return extraction
 
 # Add root endpoint
 @api.route('/', methods=['GET'])
@@ -36,18 +326,103 @@ def root():
         'message': 'Resume Analyzer API is running',
         'endpoints': {
             'analyze': '/api/analyze',
-            'health': '/api/health'
+            'analyze_stream': '/api/analyze/stream',
+            'score': '/api/score',
+            'rank': '/api/rank',
+            'application_pack': '/api/application_pack',
+            'jobs': '/api/jobs',
+            'index': '/api/index/<resumes|jobs>',
+            'llm_status': '/api/llm/status',
+            'metrics': '/api/metrics',
+            'health': '/api/health',
+            'live': '/api/live',
+            'ready': '/api/ready'
         }
     })
 
-# Add health check endpoint
+# Liveness probe: the process is up and serving, whatever is still loading
 @api.route('/api/health', methods=['GET'])
+@api.route('/api/live', methods=['GET'])
 def health_check():
     return jsonify({
         'status': 'healthy',
-        'message': 'Resume analyzer API is running'
+        'message': 'Resume analyzer API is running',
+        'components': component_status()
     })
 
+# Readiness probe: 503 until this worker has loaded every component scheduled for warmup
+@api.route('/api/ready', methods=['GET'])
+def readiness_check():
+    components = component_status()
+    if not is_ready():
+        warming = [name for name, status in components.items() if status['required'] and status['state'] != 'ready']
+        return jsonify({
+            'status': 'warming_up',
+            'message': f"Still loading: {', '.join(warming)}",
+            'components': components
+        }), 503
+
+    return jsonify({
+        'status': 'ready',
+        'message': 'Resume analyzer API is ready',
+        'components': components
+    })
+
+@api.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({
+        'resume_text': text_cache.stats(),
+        'resume_sections': parsed_resume_cache.stats(),
+        'embeddings': analyzer.embedding_cache.stats() if analyzer.embedding_cache else None,
+        'llm_responses': analyzer.response_cache.stats() if analyzer.response_cache else None
+    })
+
+def collect_app_metrics():
+    """Scrape-time gauges read from the caches, circuit breakers and job queue of this worker."""
+    caches = {'resume_text': text_cache, 'resume_sections': parsed_resume_cache}
+    if analyzer is not None:
+        caches['embeddings'] = analyzer.embedding_cache
+        caches['llm_responses'] = analyzer.response_cache
+    for name, cache in caches.items():
+        if cache is None:
+            continue
+        stats = cache.stats()
+        hits = stats.get('hits', stats.get('memory_hits', 0) + stats.get('persistent_hits', 0))
+        yield 'cache_hits', 'gauge', 'Cache hits since the worker started', {'cache': name}, hits
+        yield 'cache_misses', 'gauge', 'Cache misses since the worker started', {'cache': name}, stats['misses']
+        yield 'cache_hit_rate', 'gauge', 'Share of cache lookups that hit', {'cache': name}, stats['hit_rate']
+        yield 'cache_entries', 'gauge', 'Entries held in memory', {'cache': name}, stats['entries']
+
+    if analyzer is not None:
+        for model, state in analyzer.llm_client.breaker_states().items():
+            for candidate in ('closed', 'open', 'half_open'):
+                yield ('llm_breaker_state', 'gauge', 'Circuit breaker state per model (1 for the current state)',
+                       {'model': model, 'state': candidate}, int(state == candidate))
+    if job_queue is not None:
+        yield 'job_queue_depth', 'gauge', 'Jobs queued or running', {}, job_queue.depth()
+    yield 'embedding_model_ready', 'gauge', 'Whether the embedding model is loaded', {}, int(is_embedding_model_ready())
+
+REGISTRY.register_collector(collect_app_metrics)
+
+# Prometheus text format; counts are per worker process
+@api.route('/api/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@api.route('/api/usage', methods=['GET'])
+def token_usage():
+    client_id = get_client_id()
+    usage = analyzer.token_budget.usage(client_id, request.args.get('day')) if analyzer.token_budget else []
+    return jsonify({
+        'client_id': client_id,
+        'usage': usage
+    })
+
+@api.route('/api/llm/status', methods=['GET'])
+def llm_status():
+    # Circuit breaker state per model, as seen by this worker
+    return jsonify({'models': analyzer.llm_client.breaker_states()})
+
 @api.route('/favicon.ico')
 def favicon():
     return '', 204
@@ -55,131 +430,616 @@ def favicon():
 @api.route('/api/analyze', methods=['POST'])
 def analyze_resume():
     try:
-        if 'resume' not in request.files:
-            return jsonify({'error': 'No resume file provided'}), 400
+        error = validate_resume_request()
+        if error:
+            return error
         
         resume_file = request.files['resume']
-        
-        if not hasattr(resume_file, 'filename'):
-            return jsonify({'error': 'Invalid file object'}), 400
-        
         job_description = request.form.get('jobDescription')
         
-        if not job_description:
-            return jsonify({'error': 'No job description provided'}), 400
+        extraction = extract_resume_text(resume_file)
+        resume_text = extraction.text
         
-        if resume_file.filename == '':
-            return jsonify({'error': 'No selected file'}), 400
+        if not resume_text:
+            return jsonify({'error': 'Could not extract text from the resume'}), 400
             
-        if not resume_file.filename.endswith('.pdf'):
-            return jsonify({'error': 'Only PDF files are allowed'}), 400
+        feedback = analyzer.analyze_match_with_groq(
+            resume_text,
+            job_description,
+            use_cache=not wants_fresh_generation(),
+            client_id=get_client_id()
+        )
         
-        filename = secure_filename(resume_file.filename)
-        temp_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        resume_file.save(temp_path)
+        with stage('serialize'):
+            return jsonify({
+                'feedback': feedback,
+                'filename': resume_file.filename,
+                'truncated': extraction.truncated,
+                'tokens_saved': analyzer.prepare_inputs('analyze', resume_text, job_description).tokens_saved
+            })
         
-        try:
-            resume_text = read_text_from_pdf(temp_path)
-        finally:
-            os.remove(temp_path)
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
+    except LLMUnavailable as e:
+        return unavailable_response(e)
+    except Exception as e:
+        return server_error_response(e)
+
+@api.route('/api/generate_custom_resume', methods=['POST'])
+def generate_custom_resume():
+    try:
+        error = validate_resume_request()
+        if error:
+            return error
+        
+        resume_file = request.files['resume']
+        job_description = request.form.get('jobDescription')
+        
+        extraction = extract_resume_text(resume_file)
+        resume_text = extraction.text
         
         if not resume_text:
-            return jsonify({'error': 'Could not extract text from PDF'}), 400
-            
-        feedback = analyzer.analyze_match_with_groq(resume_text, job_description)
+            return jsonify({'error': 'Could not extract text from the resume'}), 400
         
-        return jsonify({
-            'feedback': feedback,
-            'filename': resume_file.filename
-        })
+        custom_resume = analyzer.generate_custom_resume_logic(
+            resume_text,
+            job_description,
+            use_cache=not wants_fresh_generation(),
+            client_id=get_client_id()
+        )
+        
+        with stage('serialize'):
+            return jsonify({
+                'custom_resume': custom_resume,
+                'filename': resume_file.filename,
+                'truncated': extraction.truncated,
+                'tokens_saved': analyzer.prepare_inputs('custom_resume', resume_text, job_description).tokens_saved
+            })
         
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
+    except LLMUnavailable as e:
+        return unavailable_response(e)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return server_error_response(e)
 
-@api.route('/api/generate_custom_resume', methods=['POST'])
-def generate_custom_resume():
+@api.route('/api/generate_cover_letter', methods=['POST'])
+def generate_cover_letter():
     try:
-        if 'resume' not in request.files:
-            return jsonify({'error': 'No resume file provided'}), 400
+        error = validate_resume_request()
+        if error:
+            return error
         
         resume_file = request.files['resume']
+        job_description = request.form.get('jobDescription')
         
-        if not hasattr(resume_file, 'filename'):
-            return jsonify({'error': 'Invalid file object'}), 400
+        extraction = extract_resume_text(resume_file)
+        resume_text = extraction.text
         
+        if not resume_text:
+            return jsonify({'error': 'Could not extract text from the resume'}), 400
+        
+        cover_letter = analyzer.generate_cover_letter(
+            resume_text,
+            job_description,
+            use_cache=not wants_fresh_generation(),
+            client_id=get_client_id()
+        )
+        
+        with stage('serialize'):
+            return jsonify({
+                'cover_letter': cover_letter,
+                'filename': resume_file.filename,
+                'truncated': extraction.truncated,
+                'tokens_saved': analyzer.prepare_inputs('cover_letter', resume_text, job_description).tokens_saved
+            })
+        
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
+    except LLMUnavailable as e:
+        return unavailable_response(e)
+    except Exception as e:
+        return server_error_response(e)
+
+def stream_generation(generate, kind: str):
+    """
+    Validate the upload, extract the resume once, then stream generate(resume_text, job_description).
+    """
+    try:
+        error = validate_resume_request()
+        if error:
+            return error
+        
+        fmt = request.args.get('format', 'sse')
+        if fmt not in STREAM_FORMATS:
+            return jsonify({'error': f'Unknown stream format: {fmt}'}), 400
+        
+        resume_file = request.files['resume']
         job_description = request.form.get('jobDescription')
         
-        if not job_description:
-            return jsonify({'error': 'No job description provided'}), 400
+        extraction = extract_resume_text(resume_file)
+        resume_text = extraction.text
         
-        if resume_file.filename == '':
-            return jsonify({'error': 'No selected file'}), 400
-            
-        if not resume_file.filename.endswith('.pdf'):
-            return jsonify({'error': 'Only PDF files are allowed'}), 400
+        if not resume_text:
+            return jsonify({'error': 'Could not extract text from the resume'}), 400
         
-        filename = secure_filename(resume_file.filename)
-        temp_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        resume_file.save(temp_path)
+    except Exception as e:
+        return server_error_response(e)
+    
+    meta = {
+        'filename': resume_file.filename,
+        'truncated': extraction.truncated,
+        'tokens_saved': analyzer.prepare_inputs(kind, resume_text, job_description).tokens_saved
+    }
+    chunks = generate(
+        resume_text,
+        job_description,
+        use_cache=not wants_fresh_generation(),
+        client_id=get_client_id()
+    )
+    return streaming_response(chunks, meta, fmt)
+
+@api.route('/api/analyze/stream', methods=['POST'])
+def analyze_resume_stream():
+    return stream_generation(analyzer.stream_analysis, 'analyze')
+
+@api.route('/api/generate_custom_resume/stream', methods=['POST'])
+def generate_custom_resume_stream():
+    return stream_generation(analyzer.stream_custom_resume, 'custom_resume')
+
+@api.route('/api/generate_cover_letter/stream', methods=['POST'])
+def generate_cover_letter_stream():
+    return stream_generation(analyzer.stream_cover_letter, 'cover_letter')
+
+@api.route('/api/application_pack', methods=['POST'])
+def application_pack():
+    try:
+        error = validate_resume_request()
+        if error:
+            return error
         
-        try:
-            resume_text = read_text_from_pdf(temp_path)
-        finally:
-            os.remove(temp_path)
+        fmt = request.args.get('stream')
+        if fmt and fmt not in STREAM_FORMATS:
+            return jsonify({'error': f'Unknown stream format: {fmt}'}), 400
+        
+        resume_file = request.files['resume']
+        job_description = request.form.get('jobDescription')
+        
+        extraction = extract_resume_text(resume_file)
+        resume_text = extraction.text
         
         if not resume_text:
-            return jsonify({'error': 'Could not extract text from PDF'}), 400
+            return jsonify({'error': 'Could not extract text from the resume'}), 400
         
-        custom_resume = analyzer.generate_custom_resume_logic(resume_text, job_description)
+        # All three generations run at once; the pack takes as long as the slowest
+        pool = get_generation_pool()
+        use_cache = not wants_fresh_generation()
+        client_id = get_client_id()
+        futures = {
+            # Run in a copy of the request context so their stage timings reach Server-Timing
+            pool.submit(
+                contextvars.copy_context().run,
+                getattr(analyzer, method),
+                resume_text,
+                job_description,
+                use_cache=use_cache,
+                client_id=client_id
+            ): section
+            for section, method in PACK_SECTIONS.items()
+        }
+        meta = {
+            'filename': resume_file.filename,
+            'truncated': extraction.truncated,
+            'tokens_saved': sum(
+                analyzer.prepare_inputs(kind, resume_text, job_description).tokens_saved for kind in GENERATION_MODELS
+            )
+        }
         
-        return jsonify({
-            'custom_resume': custom_resume,
-            'filename': resume_file.filename
-        })
+        if fmt:
+            return event_stream_response(section_events(futures, meta, fmt), fmt)
+        
+        sections = {section: future.result() for future, section in futures.items()}
         
+        with stage('serialize'):
+            return jsonify({**sections, **meta})
+        
+    except RateLimitExceeded as e:
+        return rate_limited_response(e)
+    except LLMUnavailable as e:
+        return unavailable_response(e)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return server_error_response(e)
 
-@api.route('/api/generate_cover_letter', methods=['POST'])
-def generate_cover_letter():
+@api.route('/api/score', methods=['POST'])
+def score_resume():
     try:
-        if 'resume' not in request.files:
-            return jsonify({'error': 'No resume file provided'}), 400
+        error = validate_resume_request()
+        if error:
+            return error
         
         resume_file = request.files['resume']
+        job_description = request.form.get('jobDescription')
+        
+        extraction = extract_resume_text(resume_file)
+        resume_text = extraction.text
+        
+        if not resume_text:
+            return jsonify({'error': 'Could not extract text from the resume'}), 400
+        
+        result = run_blocking(
+            analyzer.score_match,
+            resume_text,
+            job_description,
+            threshold=current_app.config['MATCH_SIMILARITY_THRESHOLD']
+        )
         
-        if not hasattr(resume_file, 'filename'):
-            return jsonify({'error': 'Invalid file object'}), 400
+        with stage('serialize'):
+            return jsonify({
+                **result,
+                'filename': resume_file.filename,
+                'truncated': extraction.truncated
+            })
+        
+    except Exception as e:
+        return server_error_response(e)
+
+def collect_bulk_resumes(max_files: int, max_file_size: int, max_total_size: int):
+    """
+    Gather resumes uploaded as 'resumes' files and inside any 'archive' zip files.
+
+    PDF, DOCX and plain text files are kept, judged by their contents rather
+    than their names; anything else is skipped. Every file, uploaded directly
+    or inside an archive, must fit max_file_size. Zip members are checked
+    against the per-file and total size limits by their declared size
+    before any of them is inflated.
+
+    Returns:
+        tuple: (list of (filename, bytes), error response tuple or None)
+    """
+    too_many = (jsonify({'error': f'At most {max_files} resumes can be ranked at once'}), 400)
+    resumes = []
+    for resume_file in request.files.getlist('resumes'):
+        # werkzeug has already spooled the upload, so its size is known without reading it
+        stream = resume_file.stream
+        position = stream.tell()
+        size = stream.seek(0, os.SEEK_END)
+        stream.seek(position)
+        if size > max_file_size:
+            return [], (jsonify({'error': f'{resume_file.filename} is larger than the per-file limit'}), 400)
+        if resume_file.filename and detect_format(stream):
+            resumes.append((resume_file.filename, resume_file.read()))
+    if len(resumes) > max_files:
+        return [], too_many
+
+    total_size = sum(len(data) for _, data in resumes)
+    for archive in request.files.getlist('archive'):
+        try:
+            with zipfile.ZipFile(archive.stream) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    # Check the declared size before inflating anything; zipfile won't inflate past it
+                    if info.file_size > max_file_size:
+                        return [], (jsonify({'error': f'{info.filename} is larger than the per-file limit'}), 400)
+                    total_size += info.file_size
+                    if total_size > max_total_size:
+                        return [], (jsonify({'error': f'{archive.filename} is larger than the total size limit'}), 400)
+                    data = zf.read(info)
+                    if detect_format(data):
+                        resumes.append((os.path.basename(info.filename), data))
+                        if len(resumes) > max_files:
+                            return [], too_many
+        except zipfile.BadZipFile:
+            return [], (jsonify({'error': f'{archive.filename} is not a valid zip archive'}), 400)
+
+    return resumes, None
+
+def generate_ranking_events(resumes: list, job_description: str, top_k: int, client_id: str = None):
+    """
+    Extract, rank and optionally analyze bulk resumes, yielding NDJSON events as work completes.
+    """
+    config = current_app.config
+    texts = [None] * len(resumes)
+    pending = []
+
+    for index, (filename, data) in enumerate(resumes):
+        cache_key = f"{content_hash(data)}:{config['PDF_MAX_PAGES']}:{config['RESUME_TOKEN_BUDGET']}"
+        extraction = text_cache.get(cache_key)
+        if extraction is None:
+            pending.append((index, cache_key))
+            continue
+        texts[index] = extraction.text
+        yield ndjson_event('extracted', {'index': index, 'filename': filename, 'truncated': extraction.truncated})
+
+    results = extract_many(
+        [resumes[index][1] for index, _ in pending],
+        max_tokens=config['RESUME_TOKEN_BUDGET'] or None,
+        max_pages=config['PDF_MAX_PAGES'],
+        workers=config['BULK_EXTRACT_WORKERS'],
+        engine=config['PDF_ENGINE']
+    )
+    for position, extraction in results:
+        index, cache_key = pending[position]
+        filename = resumes[index][0]
+        if isinstance(extraction, Exception):
+            yield ndjson_event('error', {'index': index, 'filename': filename, 'error': str(extraction)})
+            continue
+        if not extraction.text:
+            yield ndjson_event('error', {'index': index, 'filename': filename, 'error': 'Could not extract text from the resume'})
+            continue
+        texts[index] = extraction.text
+        text_cache.set(cache_key, extraction)
+        yield ndjson_event('extracted', {'index': index, 'filename': filename, 'truncated': extraction.truncated})
+
+    extracted = [index for index, text in enumerate(texts) if text]
+    ranking = run_blocking(
+        analyzer.rank_resumes,
+        [texts[index] for index in extracted],
+        job_description,
+        threshold=config['MATCH_SIMILARITY_THRESHOLD']
+    )
+    ranked = [
+        {
+            'rank': rank,
+            'index': extracted[entry['index']],
+            'filename': resumes[extracted[entry['index']]][0],
+            'score': entry['score'],
+            'coverage': entry['coverage']
+        }
+        for rank, entry in enumerate(ranking, start=1)
+    ]
+    yield ndjson_event('ranking', {'results': ranked})
+
+    if top_k and ranked:
+        with ThreadPoolExecutor(max_workers=min(top_k, config['BULK_LLM_CONCURRENCY'])) as pool:
+            futures = {
+                pool.submit(
+                    analyzer.analyze_match_with_groq,
+                    texts[entry['index']],
+                    job_description,
+                    client_id=client_id
+                ): entry
+                for entry in ranked[:top_k]
+            }
+            for future in as_completed(futures):
+                entry = futures[future]
+                try:
+                    feedback = future.result()
+                except (RateLimitExceeded, LLMUnavailable) as e:
+                    yield ndjson_event('error', {
+                        'rank': entry['rank'],
+                        'index': entry['index'],
+                        'filename': entry['filename'],
+                        'error': str(e),
+                        'retry_after': round(e.retry_after, 1)
+                    })
+                    continue
+                yield ndjson_event('analysis', {
+                    'rank': entry['rank'],
+                    'index': entry['index'],
+                    'filename': entry['filename'],
+                    'feedback': feedback
+                })
+
+    yield ndjson_event('done', {'ranked': len(ranked), 'failed': len(resumes) - len(ranked)})
+
+@api.route('/api/rank', methods=['POST'])
+def rank_resumes():
+    try:
+        config = current_app.config
+        # Bulk uploads get their own, larger, body limit
+        request.max_content_length = config['BULK_MAX_CONTENT_LENGTH']
         
         job_description = request.form.get('jobDescription')
         
         if not job_description:
             return jsonify({'error': 'No job description provided'}), 400
         
-        if resume_file.filename == '':
-            return jsonify({'error': 'No selected file'}), 400
-            
-        if not resume_file.filename.endswith('.pdf'):
-            return jsonify({'error': 'Only PDF files are allowed'}), 400
+        resumes, error = collect_bulk_resumes(
+            config['BULK_MAX_RESUMES'], config['MAX_CONTENT_LENGTH'], config['BULK_MAX_UNCOMPRESSED_BYTES']
+        )
+        if error:
+            return error
         
-        filename = secure_filename(resume_file.filename)
-        temp_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        resume_file.save(temp_path)
+        if not resumes:
+            return jsonify({'error': 'No PDF, DOCX or plain text resumes provided'}), 400
         
-        try:
-            resume_text = read_text_from_pdf(temp_path)
-        finally:
-            os.remove(temp_path)
+        top_k = max(0, min(request.form.get('top_k', 0, type=int), config['BULK_MAX_LLM_ANALYSES']))
+        
+    except Exception as e:
+        return server_error_response(e)
+    
+    return Response(
+        stream_with_context(generate_ranking_events(resumes, job_description, top_k, get_client_id())),
+        mimetype='application/x-ndjson'
+    )
+
+def get_vector_index(kind: str) -> VectorIndex:
+    index = vector_indexes.get(kind)
+    if index is None:
+        # Concurrent first requests would otherwise each open the same memmap and sqlite files
+        with vector_index_lock:
+            index = vector_indexes.get(kind)
+            if index is None:
+                config = current_app.config
+                index = VectorIndex(
+                    os.path.join(config['VECTOR_INDEX_DIR'], kind),
+                    ivf_threshold=config['VECTOR_INDEX_IVF_THRESHOLD'],
+                    n_probe=config['VECTOR_INDEX_N_PROBE'],
+                    target_recall=config['VECTOR_INDEX_TARGET_RECALL']
+                )
+                vector_indexes[kind] = index
+    return index
+
+def read_index_document():
+    """
+    Return (text, metadata) for the document on the current request.
+
+    A 'resume' upload (PDF, DOCX or plain text) wins over 'jobDescription' text.
+    """
+    if 'resume' in request.files and request.files['resume'].filename:
+        resume_file = request.files['resume']
+        return extract_resume_text(resume_file).text, {'filename': resume_file.filename}
+    return request.form.get('jobDescription', ''), {'title': request.form.get('title', '')}
+
+@api.route('/api/index/<kind>', methods=['POST'])
+def index_document(kind):
+    try:
+        if kind not in INDEX_KINDS:
+            return jsonify({'error': f'Unknown index: {kind}'}), 404
+        
+        text, metadata = read_index_document()
+        
+        if not text:
+            return jsonify({'error': 'No resume file or job description provided'}), 400
+        
+        doc_id = request.form.get('id') or uuid.uuid4().hex
+        metadata['snippet'] = text[:200]
+        get_vector_index(kind).add([doc_id], run_blocking(analyzer.embed_document, text), [metadata])
+        
+        return jsonify({'id': doc_id, 'index': kind}), 201
+        
+    except UnsupportedDocument as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return server_error_response(e)
+
+@api.route('/api/index/<kind>/<doc_id>', methods=['DELETE'])
+def delete_indexed_document(kind, doc_id):
+    try:
+        if kind not in INDEX_KINDS:
+            return jsonify({'error': f'Unknown index: {kind}'}), 404
+        
+        if not get_vector_index(kind).delete(doc_id):
+            return jsonify({'error': 'Document not found'}), 404
+        
+        return '', 204
+        
+    except Exception as e:
+        return server_error_response(e)
+
+@api.route('/api/index/<kind>/search', methods=['POST'])
+def search_index(kind):
+    try:
+        if kind not in INDEX_KINDS:
+            return jsonify({'error': f'Unknown index: {kind}'}), 404
+        
+        text, _ = read_index_document()
+        
+        if not text:
+            return jsonify({'error': 'No resume file or job description provided'}), 400
+        
+        k = max(1, min(request.form.get('k', 10, type=int), current_app.config['VECTOR_INDEX_MAX_RESULTS']))
+        results = get_vector_index(kind).search(run_blocking(analyzer.embed_document, text), k)
+        
+        return jsonify({'index': kind, 'results': results})
+        
+    except UnsupportedDocument as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return server_error_response(e)
+
+def queue_full_response(error: QueueFull):
+    response = jsonify({'error': str(error), 'retry_after': round(error.retry_after, 1)})
+    response.headers['Retry-After'] = str(math.ceil(error.retry_after))
+    return response, 429
+
+@api.route('/api/jobs', methods=['POST'])
+def submit_job():
+    try:
+        error = validate_resume_request()
+        if error:
+            return error
+        
+        job_type = request.values.get('type', 'custom_resume')
+        if job_type not in PACK_SECTIONS:
+            return jsonify({'error': f'Unknown job type: {job_type}'}), 400
+        
+        resume_file = request.files['resume']
+        job_description = request.form.get('jobDescription')
+        
+        extraction = extract_resume_text(resume_file)
+        resume_text = extraction.text
         
         if not resume_text:
-            return jsonify({'error': 'Could not extract text from PDF'}), 400
+            return jsonify({'error': 'Could not extract text from the resume'}), 400
         
-        cover_letter = analyzer.generate_cover_letter(resume_text, job_description)
+        job_id = job_queue.submit(job_type, {
+            'resume_text': resume_text,
+            'job_description': job_description,
+            'use_cache': not wants_fresh_generation(),
+            'client_id': get_client_id()
+        })
         
-        return jsonify({
-            'cover_letter': cover_letter,
-            'filename': resume_file.filename
+        response = jsonify({
+            'job_id': job_id,
+            'type': job_type,
+            'status': 'queued',
+            'filename': resume_file.filename,
+            'truncated': extraction.truncated,
+            'poll': f'/api/jobs/{job_id}',
+            'stream': f'/api/jobs/{job_id}/stream'
         })
+        response.headers['Location'] = f'/api/jobs/{job_id}'
+        return response, 202
         
+    except QueueFull as e:
+        return queue_full_response(e)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return server_error_response(e)
+
+@api.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        # ?wait=N long-polls for up to N seconds for the job to finish
+        wait = max(0.0, min(request.args.get('wait', 0, type=float), current_app.config['JOB_MAX_POLL_WAIT']))
+        job = job_queue.wait(job_id, wait) if wait else job_queue.get(job_id)
+        
+        if job is None:
+            return jsonify({'error': 'Job not found or expired'}), 404
+        
+        return jsonify(job)
+        
+    except Exception as e:
+        return server_error_response(e)
+
+def job_events(job_id: str, fmt: str, timeout: float):
+    """Emit 'status' events as a job progresses, then its 'result' or 'error' and 'done'."""
+    format_event = ndjson_event if fmt == 'ndjson' else sse_event
+    deadline = time.monotonic() + timeout
+    last_status = None
+    while True:
+        job = job_queue.wait(job_id, min(15.0, max(0.0, deadline - time.monotonic())))
+        if job is None:
+            yield format_event('error', {'error': 'Job not found or expired'})
+            return
+        
+        if job['status'] != last_status:
+            last_status = job['status']
+            yield format_event('status', {'status': last_status, 'position': job.get('position')})
+        elif fmt == 'sse':
+            # Comment line keeps idle proxies from closing the connection
+            yield ": keep-alive\n\n"
+        
+        if job['status'] in TERMINAL_STATUSES:
+            if job['status'] == 'done':
+                yield format_event('result', {'result': job['result']})
+            else:
+                yield format_event('error', {'error': job['error']})
+            yield format_event('done', {})
+            return
+        
+        if time.monotonic() >= deadline:
+            yield format_event('error', {'error': 'Timed out waiting for the job; poll it instead'})
+            return
+
+@api.route('/api/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    fmt = request.args.get('format', 'sse')
+    if fmt not in STREAM_FORMATS:
+        return jsonify({'error': f'Unknown stream format: {fmt}'}), 400
+    
+    if job_queue.get(job_id) is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    
+    return event_stream_response(job_events(job_id, fmt, current_app.config['JOB_STREAM_TIMEOUT']), fmt)
@@ -0,0 +1,93 @@
+import threading
+import unicodedata
+import numpy as np
+from typing import Callable, List
+from app.utils.cache import MemoryCache, content_hash
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and unicode forms so trivially different copies share a cache entry."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+class EmbeddingCache:
+    """
+    Two-tier cache of sentence embeddings keyed by model name and normalized text.
+
+    Lookups go to a bounded in-process LRU first, then to an optional
+    persistent tier (a SqliteCache) shared by every worker on the host.
+    Vectors found in the persistent tier are promoted into memory.
+    """
+    def __init__(self, model_name: str, max_entries: int = 20000, persistent=None):
+        self.model_name = model_name
+        self.memory = MemoryCache(max_entries=max_entries)
+        self.persistent = persistent
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key_for(self, text: str) -> str:
+        return content_hash(f"{self.model_name}\0{normalize_text(text)}")
+
+    def encode(self, texts: List[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Return embeddings for texts, calling encode_fn once for all cache misses.
+
+        Args:
+            texts: Texts to embed
+            encode_fn: Batch encoder returning one row per input text
+
+        Returns:
+            np.ndarray: One float32 row per text, in input order
+        """
+        keys = [self.key_for(text) for text in texts]
+        vectors = [None] * len(texts)
+        missing = {}
+        memory_hits = persistent_hits = 0
+
+        for i, key in enumerate(keys):
+            vector = self.memory.get(key)
+            if vector is None and self.persistent is not None:
+                blob = self.persistent.get(key)
+                if blob is not None:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self.memory.set(key, vector)
+                    persistent_hits += 1
+            elif vector is not None:
+                memory_hits += 1
+
+            if vector is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                vectors[i] = vector
+
+        if missing:
+            first_index = [indexes[0] for indexes in missing.values()]
+            encoded = np.asarray(encode_fn([texts[i] for i in first_index]), dtype=np.float32)
+            for (key, indexes), vector in zip(missing.items(), encoded):
+                self.memory.set(key, vector)
+                if self.persistent is not None:
+                    self.persistent.set(key, vector.tobytes())
+                for i in indexes:
+                    vectors[i] = vector
+
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.persistent_hits += persistent_hits
+            self.misses += len(texts) - memory_hits - persistent_hits
+
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.vstack(vectors)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        hits = self.memory_hits + self.persistent_hits
+        return {
+            'model': self.model_name,
+            'entries': len(self.memory),
+            'persistent_entries': len(self.persistent) if self.persistent is not None else None,
+            'memory_hits': self.memory_hits,
+            'persistent_hits': self.persistent_hits,
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,174 @@
+import threading
+import logging
+import time
+from typing import List
+
+import numpy as np
+
+from app.utils.concurrency import native_lock, native_sleep
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = 'paraphrase-MiniLM-L6-v2'
+
+_models = {}
+_lock = threading.Lock()
+_ready = threading.Event()
+
+
+class _EncodeRequest:
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.result = None
+        self.error = None
+        self.lead = False
+        # Held until the request's rows are ready, or it is handed the lead
+        self.done = native_lock()
+        self.done.acquire()
+
+
+class BatchingEncoder:
+    """
+    Merges encode() calls that arrive together from different threads into shared model batches.
+
+    The first caller waits batch_wait seconds for others to join, then
+    encodes everyone's texts together, up to max_batch texts per model call.
+    Once its own rows are ready it hands the lead to the next waiting
+    caller, so no request keeps serving other people's work. Model calls
+    never normalize; each caller's rows are normalized afterwards if it
+    asked for that.
+
+    Other attributes, such as get_sentence_embedding_dimension, pass through
+    to the wrapped model.
+    """
+    def __init__(self, model, batch_wait: float = 0.002, max_batch: int = 256):
+        self.model = model
+        self.batch_wait = batch_wait
+        self.max_batch = max_batch
+        self._pending = []
+        self._leading = False
+        self._lock = native_lock()
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def encode(self, sentences, batch_size: int = 64, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        request = _EncodeRequest(list(sentences))
+        with self._lock:
+            self._pending.append(request)
+            lead = not self._leading
+            self._leading = True
+
+        if lead:
+            native_sleep(self.batch_wait)
+        else:
+            request.done.acquire()
+            lead = request.lead
+        if lead:
+            while request.result is None and request.error is None:
+                self._run_batch(request, batch_size)
+            self._hand_off()
+
+        if request.error is not None:
+            raise request.error
+        vectors = request.result
+        if normalize_embeddings:
+            vectors = vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+    def _run_batch(self, leader: _EncodeRequest, batch_size: int):
+        with self._lock:
+            batch, count = [], 0
+            while self._pending and (not batch or count + len(self._pending[0].texts) <= self.max_batch):
+                request = self._pending.pop(0)
+                batch.append(request)
+                count += len(request.texts)
+
+        try:
+            vectors = self._encode([text for request in batch for text in request.texts], batch_size)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].error = e
+            else:
+                # Retry one by one so a bad input only fails the request it came from
+                for request in batch:
+                    try:
+                        request.result = self._encode(request.texts, batch_size)
+                    except Exception as error:
+                        request.error = error
+        else:
+            offset = 0
+            for request in batch:
+                request.result = vectors[offset:offset + len(request.texts)]
+                offset += len(request.texts)
+
+        for request in batch:
+            if request is not leader:
+                request.done.release()
+
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        vectors = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _hand_off(self):
+        with self._lock:
+            if self._pending:
+                self._pending[0].lead = True
+                self._pending[0].done.release()
+            else:
+                self._leading = False
+
+
+def _load(model_name: str, backend: str, onnx_file: str = None, threads: int = 0, onnx_cache_dir: str = None):
+    if backend == 'onnx-int8':
+        from app.services.onnx_embedder import DEFAULT_ONNX_FILE, OnnxEmbedder
+        return OnnxEmbedder(model_name, onnx_file or DEFAULT_ONNX_FILE, threads=threads, cache_dir=onnx_cache_dir)
+    if backend == 'torch':
+        # sentence_transformers (and torch with it) is imported here rather than at
+        # module level; the import alone takes several seconds
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+def get_embedding_model(model_name: str = DEFAULT_MODEL_NAME, backend: str = 'torch', onnx_file: str = None,
+                        threads: int = 0, batch_wait: float = 0.0, max_batch: int = 256, onnx_cache_dir: str = None):
+    """
+    Return the shared embedding model, loading it on first use.
+
+    The model lives at module level rather than on each ResumeAnalyzer. When it
+    is loaded in the gunicorn master before workers fork, every worker shares
+    the same weights copy-on-write.
+
+    Args:
+        model_name: sentence-transformers model name
+        backend: 'torch' for the float32 SentenceTransformer, 'onnx-int8' for OnnxEmbedder
+        onnx_file: Quantized ONNX file in the model repo (or a local path) for 'onnx-int8'
+        threads: onnxruntime intra-op threads, 0 for its default
+        batch_wait: Seconds to wait for concurrent encode calls to share a batch; 0 turns batching off
+        max_batch: Most texts one shared batch holds
+        onnx_cache_dir: Where 'onnx-int8' writes a locally quantized model when the repo publishes none
+
+    Returns:
+        An object with SentenceTransformer's encode()
+    """
+    key = (model_name, backend)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            started = time.perf_counter()
+            model = _load(model_name, backend, onnx_file, threads, onnx_cache_dir)
+            if batch_wait > 0:
+                model = BatchingEncoder(model, batch_wait, max_batch)
+            _models[key] = model
+            _ready.set()
+            logger.info("Loaded embedding model %s (%s) in %.2fs", model_name, backend, time.perf_counter() - started)
+    return model
+
+def is_embedding_model_ready() -> bool:
+    """Return True once the embedding model has been loaded in this process."""
+    return _ready.is_set()
@@ -0,0 +1,282 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from typing import Callable, Dict, Optional
+
+from app.services.token_budget import RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('done', 'failed')
+
+
+class QueueFull(Exception):
+    """Raised when the queue is at max_depth; retry_after estimates when there will be room."""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """
+    A local job queue for long-running generations, with no external broker.
+
+    Jobs live in sqlite, so any worker can accept a job and any worker can
+    answer a status poll for it. Each process runs a small pool of worker
+    threads, started by the first submit(), that claim queued jobs atomically
+    and run the handler registered for the job's kind. Idle workers poll with
+    a plain read and only take the write lock once there is a job to claim.
+
+    - submit() refuses work past max_depth with QueueFull.
+    - Finished jobs expire after ttl seconds.
+    - Jobs still 'running' after stale_after seconds are assumed lost with
+      their worker process and are queued again. Expiry and this check run
+      every cleanup_interval seconds rather than on every poll.
+    - Jobs that hit the token rate limit go back to the queue until the
+      limit allows them.
+
+    With path=None the jobs live in a shared in-memory database that only
+    this process sees. Shared-cache sqlite reports 'database table is
+    locked' at once instead of waiting on the busy timeout, so every access
+    to that database goes through one process-wide lock (_serialized).
+    """
+    def __init__(self, handlers: Dict[str, Callable[[dict], str]], path: str = None, workers: int = 4,
+                 max_depth: int = 100, ttl: float = 3600, stale_after: float = 600, poll_interval: float = 0.5,
+                 cleanup_interval: float = 60):
+        self.handlers = handlers
+        self.workers = workers
+        self.max_depth = max_depth
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.cleanup_interval = cleanup_interval
+        self._next_cleanup = 0.0
+        self._local = threading.local()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._finished = threading.Condition()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._database, self._uri = path, False
+            self._serialized = nullcontext()
+        else:
+            self._database, self._uri = f'file:job_queue_{id(self)}?mode=memory&cache=shared', True
+            # Shared-cache tables report SQLITE_LOCKED without honouring the busy timeout,
+            # so in-memory access is serialized within the process instead
+            self._serialized = threading.RLock()
+            self._keepalive = self._connect()
+
+        self._connect().execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL,'
+            ' payload TEXT NOT NULL, result TEXT, error TEXT,'
+            ' created_at REAL NOT NULL, available_at REAL NOT NULL,'
+            ' started_at REAL, finished_at REAL, expires_at REAL NOT NULL)'
+        )
+        self._connect().execute('CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, available_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._database, timeout=10, isolation_level=None, uri=self._uri)
+            if not self._uri:
+                conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def start(self):
+        """Start this process's worker threads; later calls do nothing."""
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{number}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def depth(self) -> int:
+        with self._serialized:
+            row = self._connect().execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()
+        return row[0]
+
+    def _retry_after(self, depth: int) -> float:
+        with self._serialized:
+            row = self._connect().execute(
+                "SELECT AVG(finished_at - started_at) FROM jobs WHERE status = 'done' AND finished_at IS NOT NULL"
+            ).fetchone()
+        average = row[0] or 10.0
+        return max(1.0, average * (depth - self.max_depth + 1) / max(self.workers, 1))
+
+    def submit(self, kind: str, payload: dict) -> str:
+        """
+        Queue a job and return its id.
+
+        Raises:
+            QueueFull: when max_depth jobs are already queued or running
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job type: {kind}")
+
+        # Worker threads don't survive a fork, so each process starts its own once it has work
+        self.start()
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._serialized:
+            conn = self._connect()
+            # Count and insert in one write transaction so concurrent submits can't overshoot max_depth
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+                if depth < self.max_depth:
+                    conn.execute(
+                        'INSERT INTO jobs (id, kind, status, payload, created_at, available_at, expires_at) '
+                        "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                        (job_id, kind, json.dumps(payload), now, now, now + self.ttl)
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        if depth >= self.max_depth:
+            raise QueueFull("Too many jobs are queued. Please try again later.", self._retry_after(depth))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return a job's status and result, or None if it doesn't exist or has expired."""
+        with self._serialized:
+            job = self._get(job_id)
+        if job is not None and job['status'] == 'queued':
+            # Jobs left by a restarted worker still run when only status polls come in
+            self.start()
+        return job
+
+    def _get(self, job_id: str) -> Optional[dict]:
+        row = self._connect().execute(
+            'SELECT id, kind, status, result, error, created_at, started_at, finished_at, expires_at '
+            'FROM jobs WHERE id = ?',
+            (job_id,)
+        ).fetchone()
+        if row is None or row[8] <= time.time():
+            return None
+
+        job_id, kind, status, result, error, created_at, started_at, finished_at, _ = row
+        job = {'id': job_id, 'type': kind, 'status': status, 'created_at': created_at}
+        if started_at:
+            job['started_at'] = started_at
+        if finished_at:
+            job['finished_at'] = finished_at
+        if status == 'queued':
+            job['position'] = self._connect().execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at <= ?", (created_at,)
+            ).fetchone()[0]
+        if status == 'done':
+            job['result'] = result
+        if status == 'failed':
+            job['error'] = error
+        return job
+
+    def wait(self, job_id: str, timeout: float) -> Optional[dict]:
+        """Block until the job finishes or timeout passes, then return its current state."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in TERMINAL_STATUSES or remaining <= 0:
+                return job
+            # Woken early by jobs finishing in this process; polls for the other workers
+            with self._finished:
+                self._finished.wait(min(self.poll_interval, remaining))
+
+    def _claim(self) -> Optional[tuple]:
+        now = time.time()
+        if now >= self._next_cleanup:
+            self._next_cleanup = now + self.cleanup_interval
+            with self._serialized:
+                self._clean_up(now)
+        with self._serialized:
+            # A plain read takes no lock, so idle workers don't queue up behind submits and each other
+            claimable = self._connect().execute(
+                "SELECT 1 FROM jobs WHERE status = 'queued' AND available_at <= ? LIMIT 1", (now,)
+            ).fetchone()
+            if claimable is None:
+                return None
+            return self._claim_next()
+
+    def _clean_up(self, now: float):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('DELETE FROM jobs WHERE expires_at <= ?', (now,))
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running' AND started_at <= ?",
+                (now - self.stale_after,)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _claim_next(self) -> Optional[tuple]:
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                "SELECT id, kind, payload FROM jobs WHERE status = 'queued' AND available_at <= ? "
+                'ORDER BY created_at LIMIT 1',
+                (now,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (now, row[0]))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return row
+
+    def _finish(self, job_id: str, status: str, result: str = None, error: str = None):
+        now = time.time()
+        with self._serialized:
+            self._connect().execute(
+                'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, expires_at = ? WHERE id = ?',
+                (status, result, error, now, now + self.ttl, job_id)
+            )
+        with self._finished:
+            self._finished.notify_all()
+
+    def _work(self):
+        while True:
+            try:
+                job = self._claim()
+            except Exception:
+                logger.exception("Could not claim a job")
+                time.sleep(self.poll_interval)
+                continue
+
+            if job is None:
+                time.sleep(self.poll_interval)
+                continue
+
+            job_id, kind, payload = job
+            try:
+                result = self.handlers[kind](json.loads(payload))
+            except RateLimitExceeded as e:
+                # Not a failure: put it back until the token buckets have refilled
+                with self._serialized:
+                    self._connect().execute(
+                        "UPDATE jobs SET status = 'queued', started_at = NULL, available_at = ? WHERE id = ?",
+                        (time.time() + e.retry_after, job_id)
+                    )
+                continue
+            except Exception as e:
+                logger.exception("Job %s (%s) failed", job_id, kind)
+                self._finish(job_id, 'failed', error=str(e))
+                continue
+            self._finish(job_id, 'done', result=result)
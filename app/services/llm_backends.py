@@ -0,0 +1,206 @@
+import math
+import random
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from typing import Iterator, List, NamedTuple
+
+from app.utils.token_utils import estimate_tokens
+
+_FAKE_URL = 'http://fake-llm/openai/v1/chat/completions'
+_FAKE_WORDS = (
+    'candidate', 'experience', 'skills', 'role', 'python', 'team', 'delivered', 'results',
+    'strong', 'match', 'requirements', 'projects', 'improve', 'impact', 'led', 'systems'
+)
+
+
+def load_llm_sdk():
+    """
+    Import the groq SDK, which is deferred until first use to keep app startup fast.
+
+    Its pydantic models take about half a second to import; warmup calls
+    this in the background.
+    """
+    import groq
+    return groq
+
+
+def is_llm_sdk_loaded() -> bool:
+    return 'groq' in sys.modules
+
+
+class GroqBackend:
+    """
+    The real Groq API behind one pooled HTTP client.
+
+    base_url points the client at any Groq/OpenAI-compatible server, such
+    as loadtest/fake_groq_server.py.
+    """
+    def __init__(self, api_key: str, base_url: str = None, timeout: float = 30, pool_size: int = 20):
+        groq = load_llm_sdk()
+        import httpx
+
+        self._not_given = groq.NOT_GIVEN
+        # Retries belong to ResilientLLMClient, so the SDK's own are turned off
+        self.client = groq.Groq(
+            api_key=api_key,
+            base_url=base_url,
+            max_retries=0,
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            http_client=httpx.Client(
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+        )
+
+    def create(self, messages: List[dict], model: str, stream: bool = False, timeout: float = None, **params):
+        return self.client.chat.completions.create(
+            messages=messages,
+            model=model,
+            stream=stream,
+            # None would switch the timeout off rather than keep the client default
+            timeout=self._not_given if timeout is None else timeout,
+            **params
+        )
+
+
+def parse_latency(spec: str):
+    """
+    Build a sampler of seconds from a latency spec.
+
+    'fixed:0.5', 'uniform:0.2,1.5' or 'lognormal:0.8,0.5' (median seconds and sigma).
+    """
+    kind, _, args = spec.partition(':')
+    values = [float(value) for value in args.split(',') if value]
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'lognormal' and len(values) == 2:
+        # lognormvariate takes the mean of the underlying normal, whose exp() is the median
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+class FakeCall(NamedTuple):
+    outcome: str  # 'ok', 'error' or 'rate_limited'
+    first_token_delay: float
+    words: List[str]
+    prompt_tokens: int
+
+
+class FakeBackend:
+    """
+    An in-process stand-in for Groq for load tests and offline development.
+
+    Latency is sampled from latency (time to first token), then tokens
+    arrive at tokens_per_second. A fraction of calls fail with a 503 or a
+    429, raised as the same groq exceptions the real client raises.
+    Responses have the shape of Groq's, including the usage on the last
+    streamed chunk.
+    """
+    def __init__(self, latency: str = 'lognormal:0.6,0.4', tokens_per_second: float = 250,
+                 completion_tokens: int = 300, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 seed: int = None):
+        self.first_token_latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self, messages: List[dict], model: str) -> FakeCall:
+        """Decide how one call will go: its outcome, latency and completion."""
+        with self._lock:
+            roll = self._rng.random()
+            delay = self.first_token_latency(self._rng)
+            count = max(1, int(self._rng.gauss(self.completion_tokens, self.completion_tokens / 5)))
+            words = [self._rng.choice(_FAKE_WORDS) for _ in range(count)]
+
+        if roll < self.error_rate:
+            outcome = 'error'
+        elif roll < self.error_rate + self.rate_limit_rate:
+            outcome = 'rate_limited'
+        else:
+            outcome = 'ok'
+        words[:3] = ['Fake', model, 'response:']
+        return FakeCall(outcome, delay, words, sum(estimate_tokens(m['content']) for m in messages))
+
+    @staticmethod
+    def error_for(call: FakeCall) -> Exception:
+        groq = load_llm_sdk()
+        import httpx
+
+        request = httpx.Request('POST', _FAKE_URL)
+        if call.outcome == 'rate_limited':
+            response = httpx.Response(429, request=request, headers={'retry-after': '1'})
+            return groq.RateLimitError('Rate limit reached (injected)', response=response, body=None)
+        response = httpx.Response(503, request=request)
+        return groq.InternalServerError('Service unavailable (injected)', response=response, body=None)
+
+    def _wait(self, seconds: float, deadline: float = None):
+        if deadline is not None and time.monotonic() + seconds > deadline:
+            time.sleep(max(0.0, deadline - time.monotonic()))
+            import httpx
+            raise load_llm_sdk().APITimeoutError(request=httpx.Request('POST', _FAKE_URL))
+        time.sleep(seconds)
+
+    def create(self, messages: List[dict], model: str, stream: bool = False, timeout: float = None, **params):
+        call = self.sample(messages, model)
+        deadline = time.monotonic() + timeout if timeout else None
+        if call.outcome != 'ok':
+            self._wait(min(call.first_token_delay, 0.05), deadline)
+            raise self.error_for(call)
+
+        self._wait(call.first_token_delay, deadline)
+        usage = SimpleNamespace(
+            prompt_tokens=call.prompt_tokens,
+            completion_tokens=len(call.words),
+            total_tokens=call.prompt_tokens + len(call.words)
+        )
+        if stream:
+            return self._stream(call, usage, deadline)
+
+        self._wait(len(call.words) / self.tokens_per_second, deadline)
+        message = SimpleNamespace(role='assistant', content=' '.join(call.words))
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(index=0, message=message, finish_reason='stop')],
+            usage=usage
+        )
+
+    def _stream(self, call: FakeCall, usage, deadline: float = None) -> Iterator[SimpleNamespace]:
+        for position, word in enumerate(call.words):
+            if position:
+                self._wait(1 / self.tokens_per_second, deadline)
+            delta = SimpleNamespace(content=word if position == 0 else ' ' + word)
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta, finish_reason=None)], x_groq=None)
+        yield SimpleNamespace(
+            choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=None), finish_reason='stop')],
+            x_groq=SimpleNamespace(usage=usage)
+        )
+
+
+def create_backend(backend: str, api_key: str = None, base_url: str = None, timeout: float = 30,
+                   pool_size: int = 20, fake_options: dict = None):
+    """
+    Build the LLM backend ResilientLLMClient sends calls to.
+
+    Args:
+        backend: 'groq' for the Groq API (or a compatible server at base_url), 'fake' for FakeBackend
+        api_key: Groq API key
+        base_url: Optional Groq-compatible server URL
+        timeout: Default per-request timeout in seconds
+        pool_size: Maximum pooled HTTP connections
+        fake_options: Keyword arguments for FakeBackend
+
+    Returns:
+        GroqBackend or FakeBackend
+    """
+    if backend == 'groq':
+        return GroqBackend(api_key, base_url=base_url, timeout=timeout, pool_size=pool_size)
+    if backend == 'fake':
+        return FakeBackend(**(fake_options or {}))
+    raise ValueError(f"Unknown LLM backend: {backend}")
@@ -0,0 +1,33 @@
+import json
+from typing import List
+from app.utils.cache import content_hash
+
+class LLMResponseCache:
+    """
+    Caches chat completions by model, prompt messages and sampling parameters.
+
+    Each kind of generation ('analyze', 'custom_resume', 'cover_letter') has
+    its own TTL. Storage is any cache from app.utils.cache, so responses can
+    stay in-process or be shared by workers through sqlite.
+    """
+    def __init__(self, backend, ttls: dict = None):
+        self.backend = backend
+        self.ttls = ttls or {}
+
+    @staticmethod
+    def key_for(model: str, messages: List[dict], params: dict) -> str:
+        payload = json.dumps(
+            {'model': model, 'messages': messages, 'temperature': params.get('temperature')},
+            sort_keys=True,
+            separators=(',', ':')
+        )
+        return content_hash(payload)
+
+    def get(self, key: str):
+        return self.backend.get(key)
+
+    def set(self, kind: str, key: str, content: str):
+        self.backend.set(key, content, ttl=self.ttls.get(kind))
+
+    def stats(self) -> dict:
+        return self.backend.stats()
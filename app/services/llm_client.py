@@ -0,0 +1,250 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Tuple
+
+from app.services.llm_backends import load_llm_sdk
+from app.utils.metrics import LLM_ATTEMPTS, LLM_FALLBACKS
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUnavailable(Exception):
+    """Raised when no model could answer before the deadline; retry_after hints when to try again."""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Stops calling a model after failure_threshold consecutive failures.
+
+    While open, calls are refused for reset_timeout seconds. After that one
+    trial call is let through: success closes the breaker, failure opens it
+    again.
+    """
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return 'open'
+        return 'half_open'
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def release(self):
+        """Give back a trial call that never reached the model."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class _RetryableError(Exception):
+    def __init__(self, cause: Exception, retry_after: float = None):
+        super().__init__(str(cause))
+        self.cause = cause
+        self.retry_after = retry_after
+
+
+def _classify(error: Exception):
+    """Return a _RetryableError for errors worth retrying, or the error itself."""
+    groq = load_llm_sdk()
+    if isinstance(error, (groq.APITimeoutError, groq.APIConnectionError)):
+        return _RetryableError(error)
+    if isinstance(error, groq.APIStatusError):
+        if error.status_code == 429 or error.status_code == 408 or error.status_code >= 500:
+            retry_after = None
+            try:
+                retry_after = float(error.response.headers.get('retry-after'))
+            except (TypeError, ValueError):
+                pass
+            return _RetryableError(error, retry_after)
+    return error
+
+
+class ResilientLLMClient:
+    """
+    A chat client that keeps working through slow or failing models.
+
+    Calls go to a backend from app.services.llm_backends: the Groq API
+    through one pooled HTTP client, or a fake for load tests. Backends
+    raise the groq SDK's exceptions, which drive the retries below.
+
+    - Each call has an overall deadline, and each attempt's timeout is capped
+      by the time left.
+    - Timeouts, connection errors, 429s and 5xx responses are retried with
+      full-jitter exponential backoff. A Retry-After from Groq is honoured
+      when it fits the deadline.
+    - When a model keeps failing, the call moves on to that model's fallbacks.
+      Each model has a circuit breaker, so a model that is down is skipped
+      rather than waited on.
+    - With hedge_after set, a non-streaming call that hasn't answered by then
+      is sent a second time, and the first response wins. The losing request
+      still finishes in the background and uses tokens.
+    """
+    def __init__(self, backend, fallbacks: Dict[str, List[str]] = None, timeout: float = 30,
+                 deadline: float = 60, max_attempts: int = 3, backoff_base: float = 0.5, backoff_max: float = 8,
+                 hedge_after: float = None, pool_size: int = 20, breaker_threshold: int = 5,
+                 breaker_reset: float = 30):
+        self.backend = backend
+        self.fallbacks = fallbacks or {}
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge_after = hedge_after
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+        self._hedge_pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='llm-hedge') if hedge_after else None
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._breakers_lock:
+            if model not in self._breakers:
+                self._breakers[model] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+            return self._breakers[model]
+
+    def breaker_states(self) -> Dict[str, str]:
+        with self._breakers_lock:
+            return {model: breaker.state for model, breaker in self._breakers.items()}
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _send(self, messages: List[dict], model: str, timeout: float, stream: bool, params: dict):
+        return self.backend.create(messages, model, stream=stream, timeout=timeout, **params)
+
+    def _send_hedged(self, messages: List[dict], model: str, timeout: float, params: dict):
+        primary = self._hedge_pool.submit(self._send, messages, model, timeout, False, params)
+        done, _ = wait([primary], timeout=self.hedge_after)
+        if done:
+            return primary.result()
+
+        logger.info("Hedging slow %s request after %.1fs", model, self.hedge_after)
+        hedge = self._hedge_pool.submit(self._send, messages, model, max(timeout - self.hedge_after, 1.0), False, params)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    return future.result()
+                except Exception as e:
+                    error = e
+        raise error
+
+    def create(self, messages: List[dict], model: str, stream: bool = False, deadline: float = None,
+               **params) -> Tuple[object, str]:
+        """
+        Run a chat completion on model or one of its fallbacks.
+
+        Streaming calls are retried only while the stream is being opened;
+        once chunks arrive, errors go to the caller.
+
+        Returns:
+            Tuple: the Groq response (or stream) and the model that produced it
+
+        Raises:
+            LLMUnavailable: when every candidate model failed or was skipped before the deadline
+        """
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        candidates = [model] + [m for m in self.fallbacks.get(model, []) if m != model]
+        last_error = None
+        retry_after = None
+
+        for candidate in candidates:
+            breaker = self.breaker(candidate)
+            if not breaker.allow():
+                LLM_ATTEMPTS.inc(candidate, 'skipped')
+                wait_hint = breaker.retry_after()
+                retry_after = wait_hint if retry_after is None else min(retry_after, wait_hint)
+                continue
+
+            for attempt in range(self.max_attempts):
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    breaker.release()
+                    break
+                try:
+                    timeout = min(self.timeout, remaining)
+                    if self.hedge_after and not stream and self.hedge_after < timeout:
+                        response = self._send_hedged(messages, candidate, timeout, params)
+                    else:
+                        response = self._send(messages, candidate, timeout, stream, params)
+                except Exception as e:
+                    error = _classify(e)
+                    if not isinstance(error, _RetryableError):
+                        LLM_ATTEMPTS.inc(candidate, 'rejected')
+                        breaker.record_success()
+                        if isinstance(e, load_llm_sdk().APIStatusError) and e.status_code in (400, 404, 413, 422):
+                            # e.g. a prompt too long for this model's window; another model may take it
+                            last_error = e
+                            break
+                        raise LLMUnavailable(f"The language model rejected the request: {e}", retry_after=0.0) from e
+
+                    LLM_ATTEMPTS.inc(candidate, 'error')
+                    last_error = error.cause
+                    logger.warning("%s attempt %d failed: %s", candidate, attempt + 1, error.cause)
+                    if attempt + 1 == self.max_attempts:
+                        breaker.record_failure()
+                        break
+                    delay = error.retry_after if error.retry_after is not None else self._backoff(attempt)
+                    if time.monotonic() + delay >= deadline_at:
+                        breaker.record_failure()
+                        break
+                    time.sleep(delay)
+                    continue
+
+                LLM_ATTEMPTS.inc(candidate, 'ok')
+                breaker.record_success()
+                if candidate != model:
+                    LLM_FALLBACKS.inc(model, candidate)
+                    logger.info("Fell back from %s to %s", model, candidate)
+                return response, candidate
+
+            if time.monotonic() >= deadline_at:
+                break
+
+        raise LLMUnavailable(
+            f"The language model is currently unavailable. Please try again later. ({last_error or 'all models paused'})",
+            retry_after=max(retry_after if retry_after is not None else self.backoff_max, 1.0)
+        )
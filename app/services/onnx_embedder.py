@@ -0,0 +1,133 @@
+import json
+import logging
+import os
+from typing import List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Dynamically quantized int8 export published alongside the sentence-transformers weights.
+# AVX2 runs on any x86-64 host; the avx512/vnni and arm64 variants are faster where supported.
+DEFAULT_ONNX_FILE = 'onnx/model_quint8_avx2.onnx'
+DEFAULT_MAX_SEQ_LENGTH = 128
+
+
+def _resolve_repo(model_name: str) -> str:
+    if os.path.isdir(model_name) or '/' in model_name:
+        return model_name
+    return f'sentence-transformers/{model_name}'
+
+
+def _fetch(repo: str, filename: str) -> str:
+    """Return a local path for a file of the model, downloading it from the Hugging Face Hub if needed."""
+    if os.path.isdir(repo):
+        path = os.path.join(repo, filename)
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return path
+    from huggingface_hub import hf_hub_download
+    return hf_hub_download(repo, filename)
+
+
+def _quantized_model_path(repo: str, onnx_file: str, cache_dir: str = None) -> str:
+    """
+    Find the int8 ONNX model, quantizing the float export into cache_dir when no int8 file is published.
+    """
+    if os.path.isfile(onnx_file):
+        return onnx_file
+    try:
+        return _fetch(repo, onnx_file)
+    except Exception as e:
+        logger.info("No %s for %s (%s); quantizing the float ONNX export", onnx_file, repo, e)
+
+    if cache_dir is None:
+        raise ValueError(f"{repo} publishes no {onnx_file}, and no cache_dir was given to quantize one into")
+    target = os.path.join(cache_dir, repo.strip('/').replace('/', '--'), 'model_qint8.onnx')
+    if not os.path.exists(target):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        quantize_dynamic(_fetch(repo, 'onnx/model.onnx'), target, weight_type=QuantType.QInt8)
+    return target
+
+
+class OnnxEmbedder:
+    """
+    The sentence-transformers model run as int8 ONNX on onnxruntime.
+
+    Weights are a quarter the size of float32, and neither torch nor
+    sentence_transformers is imported, which saves a few hundred MB of RSS
+    per worker. Tokenization uses the model's own tokenizer.json, and
+    pooling is the model's mean over token embeddings. encode() takes the
+    same arguments as SentenceTransformer.encode for the calls this app
+    makes. Scores stay close to the float model's; check with
+    benchmarks/embedding_parity.py.
+    """
+    def __init__(self, model_name: str, onnx_file: str = DEFAULT_ONNX_FILE, threads: int = 0,
+                 cache_dir: str = None):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        repo = _resolve_repo(model_name)
+        max_seq_length = DEFAULT_MAX_SEQ_LENGTH
+        try:
+            with open(_fetch(repo, 'sentence_bert_config.json')) as f:
+                max_seq_length = json.load(f).get('max_seq_length') or max_seq_length
+            with open(_fetch(repo, '1_Pooling/config.json')) as f:
+                pooling = json.load(f)
+        except Exception:
+            # Older exports ship without these; MiniLM models use mean pooling
+            pooling = {'pooling_mode_mean_tokens': True}
+        if not pooling.get('pooling_mode_mean_tokens'):
+            raise ValueError(f"{model_name} doesn't use mean pooling, which is all OnnxEmbedder implements")
+
+        self.tokenizer = Tokenizer.from_file(_fetch(repo, 'tokenizer.json'))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            # Several workers per host each get their own threads; the default would use every core
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            _quantized_model_path(repo, onnx_file, cache_dir),
+            options,
+            providers=['CPUExecutionProvider']
+        )
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.dimension = self.session.get_outputs()[0].shape[-1]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        inputs = {'input_ids': input_ids, 'attention_mask': attention_mask}
+        if 'token_type_ids' in self._input_names:
+            inputs['token_type_ids'] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        return (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """Embed sentences; returns a float32 array with one row per sentence."""
+        if isinstance(sentences, str):
+            return self.encode([sentences], batch_size, convert_to_numpy, normalize_embeddings)[0]
+        if not len(sentences):
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        # Sorting by length keeps padding, and so wasted compute, to a minimum within each batch
+        order = np.argsort([-len(sentence) for sentence in sentences], kind='stable')
+        vectors = np.empty((len(sentences), self.dimension), dtype=np.float32)
+        for start in range(0, len(sentences), batch_size):
+            indexes = order[start:start + batch_size]
+            vectors[indexes] = self._encode_batch([sentences[i] for i in indexes])
+
+        if normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
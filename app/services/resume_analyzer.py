@@ -1,46 +1,241 @@
-from sentence_transformers import SentenceTransformer
-from groq import Groq
-from typing import List
-import re
+from app.services.embedding_model import DEFAULT_MODEL_NAME, get_embedding_model
+from typing import Iterator, List
+from app.utils.text_utils import split_into_segments
+from app.utils.skill_matcher import default_matcher
+from app.utils.token_utils import estimate_tokens
+from app.utils.prompt_utils import PromptInputs, compact_prompt_inputs
+from app.utils.resume_parser import parse_resume
+from app.utils.metrics import record_llm_usage, stage
+from app.services.token_budget import RateLimitExceeded
+from app.services.llm_client import LLMUnavailable, ResilientLLMClient
+from app.services.llm_backends import GroqBackend
+import numpy as np
 import logging
 
+logger = logging.getLogger(__name__)
+
+# Groq model used for each kind of generation
+GENERATION_MODELS = {
+    'analyze': "llama3-70b-8192",
+    'custom_resume': "llama-3.3-70b-versatile",
+    'cover_letter': "gemma2-9b-it"
+}
+
+# Resume sections each generation reads: (kept whole, cut to the first lines of each entry).
+# The cover letter only needs to know where the candidate studied, not every course and honour.
+PROMPT_SECTIONS = {
+    'analyze': (('header', 'summary', 'skills', 'experience', 'projects', 'education', 'certifications',
+                 'languages', 'awards', 'volunteer', 'other'), ()),
+    'custom_resume': (('header', 'summary', 'skills', 'experience', 'projects', 'education', 'certifications',
+                       'languages', 'awards', 'volunteer', 'other'), ()),
+    'cover_letter': (('header', 'summary', 'skills', 'experience', 'projects', 'certifications', 'awards', 'other'),
+                     ('education',)),
+}
+# Sections local scoring matches requirements against; contact details and hobbies only add noise
+SCORING_SECTIONS = ('summary', 'skills', 'experience', 'projects', 'education', 'certifications', 'languages',
+                    'awards', 'volunteer', 'other')
+
+# Section layout the custom resume must follow, built once rather than on every call
+CUSTOM_RESUME_TEMPLATE = '''\
+PROFESSIONAL SUMMARY
+3-4 sentences strategic overview highlighting top qualifications and directly addressing job requirements.
+
+KEY SKILLS
+- Technical skills matching job description
+- Soft skills and additional competencies
+- Prioritize skills from job posting
+
+PROFESSIONAL EXPERIENCE
+**Company Name** | *Job Title* (***Employment Dates***)
+- Achievement-focused bullet point with quantifiable result
+- Another metric-driven accomplishment
+- Demonstrates impact using strong action verbs
+
+[Repeat for each professional experience]
+
+EDUCATION
+University Name
+**Degree** | *Graduation Period*
+- Relevant academic achievements or honors
+
+ADDITIONAL INFORMATION
+LANGUAGES
+- Language - proficiencies
+
+CERTIFICATIONS
+- Professional certifications
+
+OPTIONAL SECTIONS
+- Volunteer work
+- Additional achievements
+'''
+
 class ResumeAnalyzer:
     """
     A class to analyze the match between a resume and job description.
     """
-    def __init__(self, groq_api_key):
-        self.groq_client = Groq(api_key=groq_api_key)
-        self.model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
-        self.max_token_limit = 15000
-        self.used_tokens = 0
+    def __init__(self, groq_api_key, embedding_model_name: str = DEFAULT_MODEL_NAME, embedding_cache=None,
+                 response_cache=None, token_budget=None, completion_token_estimate: int = 1024,
+                 context_windows: dict = None, compact_prompts: bool = True, llm_client: ResilientLLMClient = None,
+                 select_sections: bool = True, embedder_options: dict = None):
+        self.llm_client = llm_client or ResilientLLMClient(GroqBackend(groq_api_key))
+        self.embedding_model_name = embedding_model_name
+        self.embedder_options = embedder_options or {}
+        self.embedding_cache = embedding_cache
+        self.response_cache = response_cache
+        self.token_budget = token_budget
+        self.completion_token_estimate = completion_token_estimate
+        self.context_windows = context_windows or {}
+        self.compact_prompts = compact_prompts
+        self.select_sections = select_sections
+
+    @property
+    def model(self):
+        """The embedding model, loaded on first access and shared across analyzers."""
+        return get_embedding_model(self.embedding_model_name, **self.embedder_options)
 
     def extract_skills(self, text: str) -> List[str]:
         """Extract skills from text using simple keyword matching."""
-        skill_indicators = ['proficient in', 'experience with', 'skilled in', 
-                            'knowledge of', 'familiar with', 'expertise in',
-                            'qualifications', 'skills', 'abilities']
-        skills = set()
-        sentences = text.lower().split('.')
-        
-        for sentence in sentences:
-            for indicator in skill_indicators:
-                if indicator in sentence:
-                    parts = sentence.split(indicator)
-                    if len(parts) > 1:
-                        potential_skills = re.split(r'[,;&]', parts[1])
-                        skills.update(skill.strip() for skill in potential_skills if skill.strip())
-        
-        return list(skills)
+        return default_matcher.extract(text)
 
+    def find_known_skills(self, text: str) -> List[dict]:
+        """Find dictionary skills (languages, frameworks, tools) in text with their character offsets."""
+        return default_matcher.find_known(text)
 
-    def analyze_match_with_groq(self, resume_text: str, job_description: str) -> str:
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts in one batched call; rows are L2-normalized so dot products are cosines."""
+        if self.embedding_cache is not None:
+            return self.embedding_cache.encode(texts, self._encode)
+        return self._encode(texts)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        with stage('embed'):
+            return self.model.encode(
+                texts,
+                batch_size=128 if len(texts) > 256 else 64,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+
+    def embed_document(self, text: str) -> np.ndarray:
+        """Embed a whole document as the normalized mean of its segment embeddings."""
+        segments = split_into_segments(text) or [text]
+        vector = self.embed(segments).mean(axis=0)
+        return vector / max(np.linalg.norm(vector), 1e-12)
+
+    def resume_sections(self, kind: str, resume_text: str) -> str:
         """
-        Analyze how well a resume matches a job description using Groq.
+        Return the parts of a resume one task reads.
+
+        kind is a generation kind from PROMPT_SECTIONS, or 'score' for local
+        scoring. The resume is parsed once per content hash, so every task
+        selects from the same parse.
         """
-        if self.used_tokens >= self.max_token_limit:
-            return "Token limit reached. Please try again later."
-        
-        prompt = [
+        if not self.select_sections:
+            return resume_text
+        parsed = parse_resume(resume_text)
+        if kind == 'score':
+            return parsed.select(SCORING_SECTIONS)
+        names, brief = PROMPT_SECTIONS[kind]
+        return parsed.select(names, brief=brief)
+
+    def score_match(self, resume_text: str, job_description: str, threshold: float = 0.5, top_k: int = 5) -> dict:
+        """
+        Score how well a resume covers a job description using local embeddings only.
+
+        Each job description line is matched to its most similar resume
+        sentence. The score is the mean of those best similarities on a 0-100
+        scale.
+
+        Args:
+            resume_text: Extracted resume text
+            job_description: Job description text
+            threshold: Cosine similarity at which a requirement counts as matched
+            top_k: How many matched and unmatched requirements to return
+
+        Returns:
+            dict: score, matched requirements with their resume evidence, and unmatched requirements
+        """
+        resume_segments = split_into_segments(self.resume_sections('score', resume_text))
+        requirements = split_into_segments(job_description)
+        if not resume_segments or not requirements:
+            return {
+                'score': 0.0,
+                'matched': [],
+                'unmatched': [{'requirement': r, 'similarity': 0.0} for r in requirements[:top_k]]
+            }
+
+        similarities = self.embed(requirements) @ self.embed(resume_segments).T
+        best_index = similarities.argmax(axis=1)
+        best = similarities[np.arange(len(requirements)), best_index]
+        order = np.argsort(-best)
+
+        matched = [
+            {
+                'requirement': requirements[i],
+                'evidence': resume_segments[best_index[i]],
+                'similarity': round(float(best[i]), 3)
+            }
+            for i in order[:top_k] if best[i] >= threshold
+        ]
+        unmatched = [
+            {'requirement': requirements[i], 'similarity': round(float(best[i]), 3)}
+            for i in order[::-1][:top_k] if best[i] < threshold
+        ]
+
+        return {
+            'score': round(float(np.clip(best, 0, 1).mean() * 100), 1),
+            'matched': matched,
+            'unmatched': unmatched
+        }
+
+
+    def rank_resumes(self, resume_texts: List[str], job_description: str, threshold: float = 0.5) -> List[dict]:
+        """
+        Rank many resumes against one job description with a single similarity matrix.
+
+        Every resume's segments are embedded in one batch alongside the job
+        description's requirements. The best match per requirement is then
+        reduced per resume, and resumes are scored the same way as score_match.
+
+        Args:
+            resume_texts: Extracted text of each resume
+            job_description: Job description text
+            threshold: Cosine similarity at which a requirement counts as matched
+
+        Returns:
+            List[dict]: index into resume_texts, score and coverage for each resume, best first
+        """
+        requirements = split_into_segments(job_description)
+        segments = []
+        offsets = []
+        indexes = []
+        for index, text in enumerate(resume_texts):
+            resume_segments = split_into_segments(self.resume_sections('score', text))
+            if resume_segments:
+                offsets.append(len(segments))
+                indexes.append(index)
+                segments.extend(resume_segments)
+
+        scores = {index: (0.0, 0.0) for index in range(len(resume_texts))}
+        if requirements and segments:
+            similarities = self.embed(segments) @ self.embed(requirements).T
+            # Best similarity per requirement for each resume: (resumes, requirements)
+            best = np.maximum.reduceat(similarities, offsets, axis=0)
+            resume_scores = np.clip(best, 0, 1).mean(axis=1) * 100
+            coverage = (best >= threshold).mean(axis=1)
+            for row, index in enumerate(indexes):
+                scores[index] = (float(resume_scores[row]), float(coverage[row]))
+
+        ranked = sorted(scores.items(), key=lambda item: item[1][0], reverse=True)
+        return [
+            {'index': index, 'score': round(score, 1), 'coverage': round(coverage, 3)}
+            for index, (score, coverage) in ranked
+        ]
+
+    def _analysis_prompt(self, resume_text: str, job_description: str) -> List[dict]:
+        return [
             {"role": "system", "content": "You are a career coach assessing a resume against a job description."},
             {"role": "user", "content": f"Job Description: {job_description}"},
             {"role": "user", "content": f"Resume: {resume_text}"},
@@ -55,64 +250,28 @@ class ResumeAnalyzer:
                 "Overall Rating: Score from 1-10 (10 being perfect match) with brief explanation\n\n"
             )}
         ]
+
+    def analyze_match_with_groq(self, resume_text: str, job_description: str, use_cache: bool = True,
+                                client_id: str = None) -> str:
+        """
+        Analyze how well a resume matches a job description using Groq.
+        """
+        prompt = self._prompt('analyze', resume_text, job_description)
         
         try:
-            response = self.groq_client.chat.completions.create(
-                messages=prompt,
-                model="llama3-70b-8192"
-            )
-            feedback = response.choices[0].message.content
-            # Estimate tokens used
-            self.used_tokens += len(resume_text.split()) + len(job_description.split())
+            feedback = self._complete('analyze', prompt, GENERATION_MODELS['analyze'], use_cache, client_id)
+        except (RateLimitExceeded, LLMUnavailable):
+            raise
         except Exception as e:
             feedback = f"An error occurred while analyzing with Groq: {e}"
         
         return feedback
  
  
-    def generate_custom_resume_logic(self, resume_text: str, job_description: str) -> str:
-        """
-        Generate a custom resume by incorporating job description details.
-        
-        STRICT TEMPLATE COMPLIANCE IS MANDATORY
-        """
-        
-        template_example = '''
-        PROFESSIONAL SUMMARY
-        3-4 sentences strategic overview highlighting top qualifications and directly addressing job requirements.
-
-        KEY SKILLS
-        - Technical skills matching job description
-        - Soft skills and additional competencies
-        - Prioritize skills from job posting
-
-        PROFESSIONAL EXPERIENCE
-        **Company Name** | *Job Title* (***Employment Dates***)
-        - Achievement-focused bullet point with quantifiable result
-        - Another metric-driven accomplishment
-        - Demonstrates impact using strong action verbs
-
-        [Repeat for each professional experience]
-
-        EDUCATION
-        University Name
-        **Degree** | *Graduation Period*
-        - Relevant academic achievements or honors
-
-        ADDITIONAL INFORMATION
-        LANGUAGES
-        - Language - proficiencies
-
-        CERTIFICATIONS
-        - Professional certifications
-
-        OPTIONAL SECTIONS
-        - Volunteer work
-        - Additional achievements
-        '''
+    def _custom_resume_prompt(self, resume_text: str, job_description: str) -> str:
         # Example prompt for a language model
         prompt = (
-        f"TEMPLATE REFERENCE:\n{template_example}\n\n"
+        f"TEMPLATE REFERENCE:\n{CUSTOM_RESUME_TEMPLATE}\n\n"
         f"User Resume:\n{resume_text}\n\n"
         f"Job Description:\n{job_description}\n\n"
         "Resume Writing Instructions:\n"
@@ -184,26 +343,38 @@ class ResumeAnalyzer:
         
         "CRITICAL INSTRUCTION: ABSOLUTELY MIRROR THE PROVIDED TEMPLATE FORMAT. "
         )
+        return prompt
+
+    def generate_custom_resume_logic(self, resume_text: str, job_description: str, use_cache: bool = True,
+                                     client_id: str = None) -> str:
+        """
+        Generate a custom resume by incorporating job description details.
+        
+        STRICT TEMPLATE COMPLIANCE IS MANDATORY
+
+        Pass use_cache=False for a freshly sampled variant instead of a cached one.
+        """
+        prompt = self._prompt('custom_resume', resume_text, job_description)
         
         try:
-            response = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model = "llama-3.3-70b-versatile",
-                temperature=0.8,
-                
+            custom_resume = self._complete(
+                'custom_resume',
+                prompt,
+                GENERATION_MODELS['custom_resume'],
+                use_cache,
+                client_id,
+                temperature=0.8
             )
-            custom_resume = response.choices[0].message.content
+        except (RateLimitExceeded, LLMUnavailable):
+            raise
         except Exception as e:
             custom_resume = f"An error occurred while generating the custom resume: {e}"
         
         return custom_resume
  
  
-    def generate_cover_letter(self, resume_text: str, job_description: str) -> str:
-        """
-        Generate a custom cover letter based on resume and job description.
-        """
-        prompt = (
+    def _cover_letter_prompt(self, resume_text: str, job_description: str) -> str:
+        return (
             f"User Resume:\n{resume_text}\n\n"
             f"Job Description:\n{job_description}\n\n"
             "You are a professional cover letter writer. Create a custom, engaging cover letter that:\n"
@@ -228,15 +399,207 @@ class ResumeAnalyzer:
             "- Use only information from the provided resume and job description.\n"
             "- Avoid generic phrases; focus on tailored and specific content that demonstrates value."
         )
+
+    def generate_cover_letter(self, resume_text: str, job_description: str, use_cache: bool = True,
+                              client_id: str = None) -> str:
+        """
+        Generate a custom cover letter based on resume and job description.
+        """
+        prompt = self._prompt('cover_letter', resume_text, job_description)
         
         try:
-            response = self.groq_client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="gemma2-9b-it",
-                temperature=0.7,
+            cover_letter = self._complete(
+                'cover_letter',
+                prompt,
+                GENERATION_MODELS['cover_letter'],
+                use_cache,
+                client_id,
+                temperature=0.7
             )
-            cover_letter = response.choices[0].message.content
+        except (RateLimitExceeded, LLMUnavailable):
+            raise
         except Exception as e:
             cover_letter = f"An error occurred while generating the cover letter: {e}"
         
         return cover_letter
+
+    def _messages(self, kind: str, resume_text: str, job_description: str) -> List[dict]:
+        if kind == 'analyze':
+            return self._analysis_prompt(resume_text, job_description)
+        if kind == 'custom_resume':
+            return [{"role": "user", "content": self._custom_resume_prompt(resume_text, job_description)}]
+        return [{"role": "user", "content": self._cover_letter_prompt(resume_text, job_description)}]
+
+    def _input_token_limit(self, kind: str):
+        """Tokens left for the resume and job description in the model's window, or None if it isn't known."""
+        window = self.context_windows.get(GENERATION_MODELS[kind])
+        if not window:
+            return None
+        instructions = sum(estimate_tokens(message['content']) for message in self._messages(kind, '', ''))
+        return max(window - instructions - self.completion_token_estimate, 256)
+
+    def prepare_inputs(self, kind: str, resume_text: str, job_description: str) -> PromptInputs:
+        """
+        Select the resume sections for one kind of generation, then compact
+        the resume and job description.
+
+        Results are memoized, so calling this to report tokens_saved costs
+        nothing extra when the generation itself runs afterwards.
+        """
+        original_tokens = estimate_tokens(resume_text) + estimate_tokens(job_description)
+        selected = self.resume_sections(kind, resume_text)
+        if not self.compact_prompts:
+            return PromptInputs(
+                selected,
+                job_description,
+                original_tokens,
+                estimate_tokens(selected) + estimate_tokens(job_description)
+            )
+        inputs = compact_prompt_inputs(selected, job_description, self._input_token_limit(kind))
+        return inputs._replace(original_tokens=original_tokens)
+
+    def _prompt(self, kind: str, resume_text: str, job_description: str) -> List[dict]:
+        with stage('prompt'):
+            inputs = self.prepare_inputs(kind, resume_text, job_description)
+            if inputs.tokens_saved:
+                logger.info("Compacted %s prompt inputs from %d to %d tokens", kind, inputs.original_tokens, inputs.tokens)
+            return self._messages(kind, inputs.resume_text, inputs.job_description)
+
+    def _reserve_tokens(self, messages: List[dict], model: str, client_id: str = None):
+        """Reserve the call's estimated prompt and completion tokens, or return None without a budget."""
+        if self.token_budget is None:
+            return None
+        estimate = sum(estimate_tokens(message['content']) for message in messages) + self.completion_token_estimate
+        return self.token_budget.acquire(model, client_id, estimate)
+
+    def _settle(self, reservation, used_model: str, prompt_tokens: int, completion_tokens: int):
+        """Settle a reservation, charging a fallback model instead when one answered."""
+        if used_model == reservation.model:
+            self.token_budget.settle(reservation, prompt_tokens, completion_tokens)
+            return
+        self.token_budget.settle(reservation, 0, 0)
+        self.token_budget.charge(used_model, reservation.client_id, prompt_tokens, completion_tokens)
+
+    def _complete(self, kind: str, messages: List[dict], model: str, use_cache: bool = True,
+                  client_id: str = None, **params) -> str:
+        """
+        Run a chat completion, answering from the response cache when possible.
+
+        With use_cache=False the cache isn't read, but the fresh response still
+        replaces the cached one. Answers from a fallback model are never
+        cached: they would be served under the requested model's key for the
+        full TTL, long after that model recovers. Calls that reach Groq are
+        charged to the token budget using the usage Groq reports.
+        """
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.key_for(model, messages, params)
+            if use_cache:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+        reservation = self._reserve_tokens(messages, model, client_id)
+        try:
+            with stage('llm'):
+                response, used_model = self.llm_client.create(messages, model, **params)
+        except Exception:
+            if reservation is not None:
+                self.token_budget.settle(reservation, 0, 0)
+            raise
+
+        record_llm_usage(used_model, response.usage.prompt_tokens, response.usage.completion_tokens)
+        if reservation is not None:
+            self._settle(reservation, used_model, response.usage.prompt_tokens, response.usage.completion_tokens)
+
+        content = response.choices[0].message.content
+        if cache_key is not None and content and used_model == model:
+            self.response_cache.set(kind, cache_key, content)
+        return content
+
+    def _stream_completion(self, kind: str, messages: List[dict], model: str, use_cache: bool = True,
+                           client_id: str = None, **params) -> Iterator[str]:
+        """
+        Yield content deltas from a streamed Groq chat completion as they arrive.
+
+        A cached response is yielded whole; a completed stream is cached for
+        next time unless a fallback model answered it (see _complete).
+        """
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = self.response_cache.key_for(model, messages, params)
+            if use_cache:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    yield cached
+                    return
+
+        reservation = self._reserve_tokens(messages, model, client_id)
+        parts = []
+        usage = None
+        used_model = model
+        try:
+            with stage('llm'):
+                stream, used_model = self.llm_client.create(messages, model, stream=True, **params)
+                for chunk in stream:
+                    # Groq reports usage on the final chunk
+                    x_groq = getattr(chunk, 'x_groq', None)
+                    if x_groq is not None and getattr(x_groq, 'usage', None) is not None:
+                        usage = x_groq.usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        parts.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+        finally:
+            if usage is not None:
+                record_llm_usage(used_model, usage.prompt_tokens, usage.completion_tokens)
+            if reservation is not None:
+                if usage is not None:
+                    self._settle(reservation, used_model, usage.prompt_tokens, usage.completion_tokens)
+                elif parts:
+                    prompt_tokens = sum(estimate_tokens(message['content']) for message in messages)
+                    self._settle(reservation, used_model, prompt_tokens, estimate_tokens(''.join(parts)))
+                else:
+                    self.token_budget.settle(reservation, 0, 0)
+
+        if cache_key is not None and parts and used_model == model:
+            self.response_cache.set(kind, cache_key, ''.join(parts))
+
+    def stream_analysis(self, resume_text: str, job_description: str, use_cache: bool = True,
+                        client_id: str = None) -> Iterator[str]:
+        """
+        Stream the analyze_match_with_groq feedback token by token.
+
+        Errors are raised to the caller rather than returned as text, so a
+        stream can report them separately from content already sent.
+        """
+        yield from self._stream_completion(
+            'analyze',
+            self._prompt('analyze', resume_text, job_description),
+            GENERATION_MODELS['analyze'],
+            use_cache,
+            client_id
+        )
+
+    def stream_custom_resume(self, resume_text: str, job_description: str, use_cache: bool = True,
+                             client_id: str = None) -> Iterator[str]:
+        """Stream the generate_custom_resume_logic output token by token."""
+        yield from self._stream_completion(
+            'custom_resume',
+            self._prompt('custom_resume', resume_text, job_description),
+            GENERATION_MODELS['custom_resume'],
+            use_cache,
+            client_id,
+            temperature=0.8
+        )
+
+    def stream_cover_letter(self, resume_text: str, job_description: str, use_cache: bool = True,
+                            client_id: str = None) -> Iterator[str]:
+        """Stream the generate_cover_letter output token by token."""
+        yield from self._stream_completion(
+            'cover_letter',
+            self._prompt('cover_letter', resume_text, job_description),
+            GENERATION_MODELS['cover_letter'],
+            use_cache,
+            client_id,
+            temperature=0.7
+        )
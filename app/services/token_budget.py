@@ -0,0 +1,206 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+from typing import List, NamedTuple, Optional
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request can't get its tokens within the allowed wait."""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Bucket(NamedTuple):
+    key: str
+    capacity: float
+    refill_per_second: float
+
+
+class Reservation(NamedTuple):
+    buckets: List[Bucket]
+    model: str
+    client_id: Optional[str]
+    tokens: int
+
+
+class TokenBudget:
+    """
+    Token-bucket rate limiting and usage accounting shared by all workers.
+
+    Every model has a tokens-per-minute bucket and every client a
+    tokens-per-hour bucket, both kept in sqlite. A call reserves its estimated
+    tokens from both buckets before it is sent. If a bucket is short, the
+    caller waits for the refill up to max_wait seconds, and past that gets
+    RateLimitExceeded with a retry-after hint. Once the response arrives,
+    settle() swaps the estimate for the real usage reported by Groq and adds
+    it to the per-day totals.
+
+    With path=None the buckets live in a shared in-memory database and only
+    this process sees them. Shared-cache sqlite reports 'database table is
+    locked' at once instead of waiting on the busy timeout, so every access
+    to that database goes through one process-wide lock (_serialized).
+    """
+    def __init__(self, model_limits: dict, client_tokens_per_hour: int = None, path: str = None,
+                 max_wait: float = 5.0):
+        self.model_limits = model_limits
+        self.client_tokens_per_hour = client_tokens_per_hour
+        self.max_wait = max_wait
+        self._local = threading.local()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._database, self._uri = path, False
+            self._serialized = nullcontext()
+        else:
+            self._database, self._uri = f'file:token_budget_{id(self)}?mode=memory&cache=shared', True
+            # Shared-cache tables report SQLITE_LOCKED without honouring the busy timeout,
+            # so in-memory access is serialized within the process instead
+            self._serialized = threading.RLock()
+            # Keep one connection open so the in-memory database outlives individual threads
+            self._keepalive = self._connect()
+
+        conn = self._connect()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS token_buckets ('
+            ' key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS token_usage ('
+            ' day TEXT NOT NULL, model TEXT NOT NULL, client_id TEXT NOT NULL,'
+            ' requests INTEGER NOT NULL, prompt_tokens INTEGER NOT NULL, completion_tokens INTEGER NOT NULL,'
+            ' PRIMARY KEY (day, model, client_id))'
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._database, timeout=10, isolation_level=None, uri=self._uri)
+            if not self._uri:
+                conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def _buckets(self, model: str, client_id: str = None) -> List[Bucket]:
+        buckets = []
+        tokens_per_minute = self.model_limits.get(model)
+        if tokens_per_minute:
+            buckets.append(Bucket(f'model:{model}', tokens_per_minute, tokens_per_minute / 60))
+        if client_id and self.client_tokens_per_hour:
+            buckets.append(Bucket(f'client:{client_id}', self.client_tokens_per_hour, self.client_tokens_per_hour / 3600))
+        return buckets
+
+    def _take(self, buckets: List[Bucket], tokens: int) -> float:
+        """Take tokens from every bucket atomically; return 0 on success or the seconds to wait."""
+        with self._serialized:
+            return self._take_locked(buckets, tokens)
+
+    def _take_locked(self, buckets: List[Bucket], tokens: int) -> float:
+        conn = self._connect()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            levels = []
+            wait = 0.0
+            for bucket in buckets:
+                row = conn.execute('SELECT tokens, updated_at FROM token_buckets WHERE key = ?', (bucket.key,)).fetchone()
+                level = bucket.capacity if row is None else min(
+                    bucket.capacity, row[0] + (now - row[1]) * bucket.refill_per_second
+                )
+                levels.append(level)
+                # Requests bigger than a whole bucket only wait for it to be full
+                needed = min(tokens, bucket.capacity)
+                if level < needed:
+                    wait = max(wait, (needed - level) / bucket.refill_per_second)
+
+            if wait == 0.0:
+                for bucket, level in zip(buckets, levels):
+                    conn.execute(
+                        'INSERT OR REPLACE INTO token_buckets (key, tokens, updated_at) VALUES (?, ?, ?)',
+                        (bucket.key, level - tokens, now)
+                    )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def acquire(self, model: str, client_id: str, estimated_tokens: int) -> Reservation:
+        """
+        Reserve estimated_tokens for one call, waiting up to max_wait for the buckets to refill.
+
+        Raises:
+            RateLimitExceeded: when the tokens won't be available within max_wait
+        """
+        buckets = self._buckets(model, client_id)
+        deadline = time.monotonic() + self.max_wait
+        while buckets:
+            wait = self._take(buckets, estimated_tokens)
+            if wait == 0.0:
+                break
+            if time.monotonic() + wait > deadline:
+                raise RateLimitExceeded(
+                    f"Token rate limit reached for {model}. Please try again later.",
+                    retry_after=wait
+                )
+            time.sleep(wait)
+        return Reservation(buckets, model, client_id, estimated_tokens)
+
+    def settle(self, reservation: Reservation, prompt_tokens: int, completion_tokens: int):
+        """Replace a reservation's estimate with the tokens the call actually used and record the usage."""
+        with self._serialized:
+            self._settle_locked(reservation, prompt_tokens, completion_tokens)
+
+    def _settle_locked(self, reservation: Reservation, prompt_tokens: int, completion_tokens: int):
+        actual = prompt_tokens + completion_tokens
+        correction = reservation.tokens - actual
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for bucket in reservation.buckets:
+                # Overruns may push a bucket below zero; later callers wait for it to recover
+                conn.execute(
+                    'UPDATE token_buckets SET tokens = MIN(?, tokens + ?) WHERE key = ?',
+                    (bucket.capacity, correction, bucket.key)
+                )
+            if actual:
+                conn.execute(
+                    'INSERT INTO token_usage (day, model, client_id, requests, prompt_tokens, completion_tokens) '
+                    'VALUES (?, ?, ?, 1, ?, ?) '
+                    'ON CONFLICT (day, model, client_id) DO UPDATE SET '
+                    ' requests = requests + 1,'
+                    ' prompt_tokens = prompt_tokens + excluded.prompt_tokens,'
+                    ' completion_tokens = completion_tokens + excluded.completion_tokens',
+                    (time.strftime('%Y-%m-%d', time.gmtime()), reservation.model, reservation.client_id or '',
+                     prompt_tokens, completion_tokens)
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def charge(self, model: str, client_id: str, prompt_tokens: int, completion_tokens: int):
+        """Charge tokens that were used without a reservation, e.g. by a fallback model."""
+        self.settle(Reservation(self._buckets(model, client_id), model, client_id, 0), prompt_tokens, completion_tokens)
+
+    def usage(self, client_id: str = None, day: str = None) -> List[dict]:
+        """Return per-model token usage for a day (UTC, default today), optionally for one client."""
+        day = day or time.strftime('%Y-%m-%d', time.gmtime())
+        query = 'SELECT model, client_id, requests, prompt_tokens, completion_tokens FROM token_usage WHERE day = ?'
+        params = [day]
+        if client_id is not None:
+            query += ' AND client_id = ?'
+            params.append(client_id)
+        with self._serialized:
+            rows = self._connect().execute(query, params).fetchall()
+        return [
+            {
+                'model': model,
+                'client_id': client,
+                'requests': requests,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens
+            }
+            for model, client, requests, prompt_tokens, completion_tokens in rows
+        ]
@@ -0,0 +1,466 @@
+import fcntl
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_STATE_KEYS = ('dim', 'count', 'capacity', 'trained_count', 'ivf_probe', 'seq', 'vectors_gen', 'ivf_gen')
+
+
+class VectorIndex:
+    """
+    A persistent cosine-similarity index over L2-normalized document embeddings.
+
+    Vectors live in a memory-mapped float32 file that grows as documents are
+    added. Corpora are searched brute force with one matrix-vector product
+    until they reach ivf_threshold documents; below about 100k vectors that
+    is both exact and faster than any IVF probe. Past it, an IVF index is
+    trained: spherical k-means with about sqrt(N) centroids and an inverted
+    list per centroid. Training then measures recall@10 against brute force
+    on a sample of indexed vectors and doubles the number of probed lists,
+    starting from n_probe, until recall reaches target_recall. If that would
+    mean scanning more than half the lists, the index stays brute force.
+
+    Ids, metadata and tombstones are rows in a sqlite file next to the
+    vectors. Each write stamps the rows it touches with a new sequence
+    number, so other workers catch up by reading only what changed since
+    they last looked, and metadata is only read for search hits. Deletes
+    are tombstones; re-adding an id replaces the document. Once tombstones
+    make up more than compact_ratio of the rows, the vectors are rewritten
+    without them. Files that get rewritten rather than appended to (the
+    compacted vectors, retrained centroids and assignments) are written
+    under a new generation number, so readers never see one half-written.
+    Writes take an exclusive file lock.
+    """
+    def __init__(self, directory: str, ivf_threshold: int = 100000, n_probe: int = 16, target_recall: float = 0.95,
+                 compact_ratio: float = 0.25):
+        self.directory = directory
+        self.ivf_threshold = ivf_threshold
+        self.n_probe = n_probe
+        self.target_recall = target_recall
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._db_path = os.path.join(directory, 'index.sqlite3')
+        os.makedirs(directory, exist_ok=True)
+        with self._transaction(write=True) as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS docs ('
+                ' row INTEGER PRIMARY KEY, doc_id TEXT NOT NULL, metadata TEXT NOT NULL,'
+                ' deleted INTEGER NOT NULL DEFAULT 0, seq INTEGER NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS docs_seq ON docs (seq)')
+            conn.execute('CREATE INDEX IF NOT EXISTS docs_id ON docs (doc_id)')
+            conn.execute('CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER)')
+        self._reset()
+        self._refresh()
+
+    def _reset(self):
+        self.dim = None
+        self.count = 0
+        self.capacity = 0
+        self.ids = []
+        self.rows = {}
+        self.deleted = set()
+        self.trained_count = 0
+        # Lists probed per query, as calibrated by _train; 0 searches brute force
+        self.ivf_probe = 0
+        self.seq = 0
+        self.vectors_gen = 0
+        self.ivf_gen = 0
+        self._vectors = None
+        self._centroids = None
+        self._assignments = None
+        self._lists = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._db_path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, write: bool = False):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE' if write else 'BEGIN')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @contextmanager
+    def _file_lock(self):
+        with open(os.path.join(self.directory, 'lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _path(self, name: str, generation: int) -> str:
+        return os.path.join(self.directory, name.format(generation))
+
+    def _remove_old(self, name: str, generation: int):
+        """Delete files from generations before the previous one; a reader may still be opening that one."""
+        for path in glob.glob(os.path.join(self.directory, name.format('*'))):
+            try:
+                file_generation = int(os.path.basename(path).split('.')[1])
+            except (IndexError, ValueError):
+                continue
+            if file_generation < generation - 1:
+                os.remove(path)
+
+    def _refresh(self):
+        """Catch up with whatever other processes have committed since we last looked."""
+        with self._transaction() as conn:
+            state = dict(conn.execute('SELECT key, value FROM state').fetchall())
+            if not state or state['seq'] == self.seq:
+                return
+            if state['vectors_gen'] != self.vectors_gen:
+                # Compaction renumbered the rows; start over
+                self._reset()
+            changes = conn.execute(
+                'SELECT row, doc_id, deleted FROM docs WHERE seq > ?', (self.seq,)
+            ).fetchall()
+
+        for row, doc_id, deleted in changes:
+            if row >= len(self.ids):
+                self.ids.extend([None] * (row + 1 - len(self.ids)))
+            self.ids[row] = doc_id
+            if deleted:
+                self.deleted.add(row)
+                if self.rows.get(doc_id) == row:
+                    del self.rows[doc_id]
+            else:
+                self.rows[doc_id] = row
+
+        capacity_changed = state['capacity'] != self.capacity
+        ivf_changed = state['ivf_gen'] != self.ivf_gen
+        self.dim = state['dim']
+        self.count = state['count']
+        self.capacity = state['capacity']
+        self.trained_count = state['trained_count']
+        self.ivf_probe = state['ivf_probe']
+        self.seq = state['seq']
+        self.vectors_gen = state['vectors_gen']
+        self.ivf_gen = state['ivf_gen']
+
+        if self._vectors is None or capacity_changed:
+            self._vectors = np.memmap(
+                self._path('vectors.{}.f32', self.vectors_gen), dtype=np.float32, mode='r+',
+                shape=(self.capacity, self.dim)
+            )
+        if self.trained_count:
+            if self._centroids is None or ivf_changed:
+                self._centroids = np.load(self._path('centroids.{}.npy', self.ivf_gen))
+            if self._assignments is None or ivf_changed or capacity_changed:
+                self._assignments = np.memmap(
+                    self._path('assignments.{}.i32', self.ivf_gen), dtype=np.int32, mode='r+', shape=(self.capacity,)
+                )
+            self._build_lists()
+
+    def _save_state(self, conn: sqlite3.Connection):
+        conn.executemany(
+            'INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)',
+            [(key, getattr(self, key)) for key in _STATE_KEYS]
+        )
+
+    def _ensure_capacity(self, needed: int, dim: int):
+        if self.dim is None:
+            self.dim = dim
+        elif dim != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional vectors, got {dim}")
+
+        if needed <= self.capacity:
+            return
+
+        capacity = max(1024, self.capacity)
+        while capacity < needed:
+            capacity *= 2
+
+        if self._vectors is not None:
+            self._vectors.flush()
+        # Growing the file in place keeps existing rows where they are, including for other readers
+        vectors_path = self._path('vectors.{}.f32', self.vectors_gen)
+        with open(vectors_path, 'ab') as f:
+            f.truncate(capacity * self.dim * 4)
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+
+        if self._assignments is not None:
+            self._assignments.flush()
+            assignments_path = self._path('assignments.{}.i32', self.ivf_gen)
+            with open(assignments_path, 'ab') as f:
+                f.truncate(capacity * 4)
+            self._assignments = np.memmap(assignments_path, dtype=np.int32, mode='r+', shape=(capacity,))
+        self.capacity = capacity
+
+    def add(self, doc_ids: List[str], vectors: np.ndarray, metadata: List[dict] = None):
+        """
+        Add or replace documents.
+
+        Args:
+            doc_ids: Unique id per document
+            vectors: One L2-normalized row per document
+            metadata: Optional JSON-serializable dict per document, returned with search hits
+        """
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        metadata = metadata or [{} for _ in doc_ids]
+        with self._lock, self._file_lock():
+            self._refresh()
+            self._ensure_capacity(self.count + len(doc_ids), vectors.shape[1])
+
+            seq = self.seq + 1
+            start = self.count
+            inserted, replaced = [], []
+            for offset, doc_id in enumerate(doc_ids):
+                if doc_id in self.rows:
+                    self.deleted.add(self.rows[doc_id])
+                    replaced.append((seq, self.rows[doc_id]))
+                row = start + offset
+                self.rows[doc_id] = row
+                self.ids.append(doc_id)
+                inserted.append((row, doc_id, json.dumps(metadata[offset]), seq))
+            self._vectors[start:start + len(doc_ids)] = vectors
+            self._vectors.flush()
+            self.count += len(doc_ids)
+            self.seq = seq
+
+            if self.trained_count:
+                self._assign(start, self.count)
+            active = self.count - len(self.deleted)
+            # Train once the corpus is big enough, and retrain whenever it doubles
+            if active >= self.ivf_threshold and active >= 2 * self.trained_count:
+                self._train()
+
+            with self._transaction(write=True) as conn:
+                # Inserts first: an id repeated within this batch tombstones a row inserted just now
+                conn.executemany('INSERT INTO docs (row, doc_id, metadata, deleted, seq) VALUES (?, ?, ?, 0, ?)', inserted)
+                conn.executemany("UPDATE docs SET deleted = 1, metadata = '{}', seq = ? WHERE row = ?", replaced)
+                self._save_state(conn)
+            self._remove_old('centroids.{}.npy', self.ivf_gen)
+            self._remove_old('assignments.{}.i32', self.ivf_gen)
+            self._compact_if_needed()
+
+    def delete(self, doc_id: str) -> bool:
+        """Remove a document; returns False if the id isn't in the index."""
+        with self._lock, self._file_lock():
+            self._refresh()
+            row = self.rows.pop(doc_id, None)
+            if row is None:
+                return False
+            self.deleted.add(row)
+            self.seq += 1
+            with self._transaction(write=True) as conn:
+                conn.execute("UPDATE docs SET deleted = 1, metadata = '{}', seq = ? WHERE row = ?", (self.seq, row))
+                self._save_state(conn)
+            self._compact_if_needed()
+            return True
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self.rows)
+
+    def _compact_if_needed(self):
+        if self.deleted and len(self.deleted) > self.compact_ratio * self.count:
+            self._compact()
+
+    def _compact(self, batch: int = 8192):
+        """Rewrite the vectors, and IVF assignments if trained, without tombstoned rows."""
+        keep = np.array(sorted(self.rows.values()), dtype=np.int64)
+        capacity = 1024
+        while capacity < len(keep):
+            capacity *= 2
+        vectors_gen = self.vectors_gen + 1
+        vectors = np.memmap(
+            self._path('vectors.{}.f32', vectors_gen), dtype=np.float32, mode='w+', shape=(capacity, self.dim)
+        )
+        for offset in range(0, len(keep), batch):
+            rows = keep[offset:offset + batch]
+            vectors[offset:offset + len(rows)] = self._vectors[rows]
+        vectors.flush()
+
+        ivf_gen = self.ivf_gen
+        if self.trained_count:
+            ivf_gen += 1
+            np.save(self._path('centroids.{}.npy', ivf_gen), self._centroids)
+            assignments = np.memmap(
+                self._path('assignments.{}.i32', ivf_gen), dtype=np.int32, mode='w+', shape=(capacity,)
+            )
+            assignments[:len(keep)] = self._assignments[keep]
+            assignments.flush()
+
+        deleted = len(self.deleted)
+        self.count, self.capacity = len(keep), capacity
+        self.vectors_gen, self.ivf_gen = vectors_gen, ivf_gen
+        self.seq += 1
+        with self._transaction(write=True) as conn:
+            conn.execute('DELETE FROM docs WHERE deleted = 1')
+            # Ascending order: every lower row number is already free by the time a row moves into it
+            conn.executemany(
+                'UPDATE docs SET row = ?, seq = ? WHERE row = ?',
+                [(new, self.seq, int(old)) for new, old in enumerate(keep) if new != old]
+            )
+            self._save_state(conn)
+        self._remove_old('vectors.{}.f32', vectors_gen)
+        self._remove_old('centroids.{}.npy', ivf_gen)
+        self._remove_old('assignments.{}.i32', ivf_gen)
+        logger.info("Compacted %s: dropped %d deleted rows, kept %d", self.directory, deleted, len(keep))
+
+        self._reset()
+        self._refresh()
+
+    def _train(self, iterations: int = 10, sample_size: int = 50000):
+        active = np.array(sorted(self.rows.values()), dtype=np.int64)
+        n_lists = max(1, int(np.sqrt(len(active))))
+        rng = np.random.default_rng(0)
+        sample = self._vectors[rng.choice(active, size=min(sample_size, len(active)), replace=False)]
+
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = (sample @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        # Retraining writes a new generation; readers keep using the old files until they see it
+        self.ivf_gen += 1
+        self._centroids = centroids.astype(np.float32)
+        np.save(self._path('centroids.{}.npy', self.ivf_gen), self._centroids)
+        self._assignments = np.memmap(
+            self._path('assignments.{}.i32', self.ivf_gen), dtype=np.int32, mode='w+', shape=(self.capacity,)
+        )
+        self._assign(0, self.count)
+        self.trained_count = len(active)
+        self.ivf_probe = self._calibrate(active)
+        logger.info(
+            "Trained IVF index in %s with %d lists over %d vectors; probing %s",
+            self.directory, n_lists, len(active), f"{self.ivf_probe} lists" if self.ivf_probe else "all (brute force)"
+        )
+
+    def _exact_top(self, queries: np.ndarray, k: int, alive: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        """Brute-force top-k rows for each query, scanning the vectors in chunks."""
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, self.count, chunk):
+            stop = min(start + chunk, self.count)
+            scores = queries @ self._vectors[start:stop].T
+            scores[:, ~alive[start:stop]] = -np.inf
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate([best_rows, np.broadcast_to(np.arange(start, stop), (len(queries), stop - start))], axis=1)
+            top = np.argpartition(-scores, min(k, scores.shape[1]) - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_rows = np.take_along_axis(rows, top, axis=1)
+        return best_rows
+
+    def _calibrate(self, active: np.ndarray, k: int = 10, queries: int = 200) -> int:
+        """
+        Find the fewest lists to probe for recall@k of at least target_recall.
+
+        Queries are a sample of indexed vectors, and the reference is brute
+        force over the whole corpus. Returns 0 when reaching the target would
+        mean probing more than half the lists.
+        """
+        rng = np.random.default_rng(1)
+        sample = np.asarray(self._vectors[rng.choice(active, size=min(queries, len(active)), replace=False)])
+        alive = np.zeros(self.count, dtype=bool)
+        alive[active] = True
+        truth = self._exact_top(sample, k, alive)
+
+        n_probe = max(1, self.n_probe)
+        while n_probe <= len(self._centroids) // 2:
+            found = 0
+            for query, expected in zip(sample, truth):
+                candidates = self._ivf_candidates(query, n_probe)
+                candidates = candidates[alive[candidates]]
+                if not len(candidates):
+                    # The probed lists only hold deleted rows, so nothing is found
+                    continue
+                top = candidates[np.argpartition(-(self._vectors[candidates] @ query), min(k, len(candidates)) - 1)[:k]]
+                found += len(np.intersect1d(top, expected))
+            recall = found / truth.size
+            if recall >= self.target_recall:
+                logger.info("IVF recall@%d is %.3f probing %d of %d lists", k, recall, n_probe, len(self._centroids))
+                return n_probe
+            n_probe *= 2
+        return 0
+
+    def _ivf_candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        probes = np.argpartition(-(self._centroids @ query), min(n_probe, len(self._centroids)) - 1)[:n_probe]
+        return np.concatenate([self._lists[probe] for probe in probes])
+
+    def _assign(self, start: int, stop: int, batch: int = 8192):
+        for offset in range(start, stop, batch):
+            chunk = self._vectors[offset:min(offset + batch, stop)]
+            self._assignments[offset:offset + len(chunk)] = (chunk @ self._centroids.T).argmax(axis=1)
+        self._assignments.flush()
+        self._build_lists()
+
+    def _build_lists(self):
+        assignments = np.asarray(self._assignments[:self.count])
+        order = np.argsort(assignments, kind='stable')
+        boundaries = np.searchsorted(assignments[order], np.arange(len(self._centroids) + 1))
+        self._lists = [order[boundaries[i]:boundaries[i + 1]] for i in range(len(self._centroids))]
+
+    def _metadata(self, doc_ids: List[str]) -> dict:
+        rows = self._connect().execute(
+            f"SELECT doc_id, metadata FROM docs WHERE deleted = 0 AND doc_id IN ({','.join('?' * len(doc_ids))})",
+            doc_ids
+        ).fetchall()
+        return {doc_id: json.loads(metadata) for doc_id, metadata in rows}
+
+    def search(self, vector: np.ndarray, k: int = 10) -> List[dict]:
+        """
+        Return the k most similar documents to a normalized query vector.
+
+        Returns:
+            List[dict]: id, similarity score and metadata for each hit, best first
+        """
+        with self._lock:
+            self._refresh()
+            if not self.rows:
+                return []
+
+            query = np.asarray(vector, dtype=np.float32).reshape(-1)
+            if self._lists is not None and self.ivf_probe:
+                candidates = self._ivf_candidates(query, self.ivf_probe)
+                scores = self._vectors[candidates] @ query
+            else:
+                candidates = None
+                scores = self._vectors[:self.count] @ query
+
+            if self.deleted:
+                deleted = np.fromiter(self.deleted, dtype=np.int64, count=len(self.deleted))
+                if candidates is None:
+                    scores[deleted] = -np.inf
+                else:
+                    scores[np.isin(candidates, deleted)] = -np.inf
+
+            k = min(k, len(scores))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            top = [i for i in top if np.isfinite(scores[i])]
+
+            doc_ids = [self.ids[candidates[i] if candidates is not None else i] for i in top]
+            metadata = self._metadata(doc_ids) if doc_ids else {}
+            return [
+                {'id': doc_id, 'score': round(float(scores[i]), 4), 'metadata': metadata.get(doc_id, {})}
+                for i, doc_id in zip(top, doc_ids)
+            ]
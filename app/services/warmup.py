@@ -0,0 +1,105 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable
+
+from app.utils.concurrency import native_lock, start_native_thread
+
+logger = logging.getLogger(__name__)
+
+
+class Component:
+    """
+    A dependency that is slow the first time it is used, such as the embedding model.
+
+    load() does the slow part and probe() says whether it has been done, by
+    warmup or by a request that got there first. A component is required
+    for readiness once it is scheduled for warmup.
+    """
+    def __init__(self, name: str, load: Callable[[], object], probe: Callable[[], bool]):
+        self.name = name
+        self.load = load
+        self.probe = probe
+        self.required = False
+        self.state = 'cold'  # cold, warming, ready or failed
+        self.seconds = None
+        self.error = None
+        # Warmup may run on a native thread under gevent, where a patched lock can't block it
+        self._lock = native_lock()
+
+    def warm(self) -> bool:
+        with self._lock:
+            if self.probe():
+                self.state = 'ready'
+                return True
+            self.state = 'warming'
+            started = time.perf_counter()
+            try:
+                self.load()
+            except Exception as e:
+                self.state, self.error = 'failed', str(e)
+                logger.exception("Warming %s failed", self.name)
+                return False
+            finally:
+                self.seconds = time.perf_counter() - started
+            self.state = 'ready'
+            logger.info("Warmed %s in %.2fs", self.name, self.seconds)
+            return True
+
+    def status(self) -> dict:
+        status = {'state': 'ready' if self.probe() else self.state, 'required': self.required}
+        if self.seconds is not None:
+            status['seconds'] = round(self.seconds, 3)
+        if self.error:
+            status['error'] = self.error
+        return status
+
+
+_components: Dict[str, Component] = {}
+
+
+def register_component(name: str, load: Callable[[], object], probe: Callable[[], bool]) -> Component:
+    """Register (or replace) a component that warmup can load and readiness reports on."""
+    component = _components[name] = Component(name, load, probe)
+    return component
+
+
+def component_status() -> Dict[str, dict]:
+    return {name: component.status() for name, component in _components.items()}
+
+
+def is_ready() -> bool:
+    """Return True once every component scheduled for warmup is loaded in this process."""
+    return all(component.probe() for component in _components.values() if component.required)
+
+
+def warm_components(names: Iterable[str]) -> bool:
+    """Load components now, in order; returns False if any failed."""
+    components = [_components[name] for name in names]
+    for component in components:
+        component.required = True
+    return all([component.warm() for component in components])
+
+
+def start_warmup(names: Iterable[str]):
+    """Load components on a background native thread so the app can start serving while they load."""
+    names = list(names)
+    for name in names:
+        _components[name].required = True
+
+    def warmup():
+        started = time.perf_counter()
+        warm_components(names)
+        logger.info("Background warmup finished in %.2fs", time.perf_counter() - started)
+
+    return start_native_thread(warmup, name='warmup')
+
+
+@contextmanager
+def startup_phase(name: str):
+    """Log how long one phase of app startup took."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.info("Startup phase %s took %.2fs", name, time.perf_counter() - started)
@@ -0,0 +1,238 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_hash(data) -> str:
+    """
+    Return a stable hex digest for bytes or text.
+
+    Args:
+        data: bytes, bytearray, memoryview or str to hash
+
+    Returns:
+        str: SHA-256 hex digest of the content
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+class MemoryCache:
+    """
+    A thread-safe in-process cache with LRU eviction and an optional TTL.
+    """
+    def __init__(self, max_entries: int = 256, ttl: float = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'backend': 'memory',
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SqliteCache:
+    """
+    A cache stored in a sqlite file so every gunicorn worker on the host shares it.
+
+    Entries expire after the TTL and are evicted least-recently-used once
+    max_entries is exceeded. Both are enforced in batches rather than on
+    every write: every evict_interval writes, a namespace over max_entries
+    is trimmed to 90% of it, so it can briefly overshoot by about
+    evict_interval entries per worker. Recency is only rewritten when an
+    entry's last recorded access is older than touch_interval seconds, so
+    hits are plain reads. Values are pickled, so only store data produced by
+    this service.
+    """
+    def __init__(self, path: str, max_entries: int = 1024, ttl: float = None, namespace: str = 'default',
+                 evict_interval: int = None, touch_interval: float = 60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.namespace = namespace
+        self.evict_interval = evict_interval or max(1, min(1000, max_entries // 20))
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                ' namespace TEXT NOT NULL,'
+                ' key TEXT NOT NULL,'
+                ' value BLOB NOT NULL,'
+                ' expires_at REAL,'
+                ' accessed_at REAL NOT NULL,'
+                ' PRIMARY KEY (namespace, key))'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_lru ON cache (namespace, accessed_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_expiry ON cache (namespace, expires_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str, default=None):
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute(
+            'SELECT value, expires_at, accessed_at FROM cache WHERE namespace = ? AND key = ?',
+            (self.namespace, key)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return default
+
+        value, expires_at, accessed_at = row
+        if expires_at is not None and expires_at <= now:
+            conn.execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (self.namespace, key))
+            self.misses += 1
+            return default
+
+        if now - accessed_at >= self.touch_interval:
+            conn.execute(
+                'UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?',
+                (now, self.namespace, key)
+            )
+        self.hits += 1
+        return pickle.loads(value)
+
+    def set(self, key: str, value, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, accessed_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (self.namespace, key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), expires_at, now)
+        )
+        with self._writes_lock:
+            self._writes += 1
+            due = self._writes % self.evict_interval == 0
+        if due:
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired entries, then trim the least recently used down to 90% of max_entries."""
+        conn.execute(
+            'DELETE FROM cache WHERE namespace = ? AND expires_at IS NOT NULL AND expires_at <= ?',
+            (self.namespace, time.time())
+        )
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return
+        # Walks the (namespace, accessed_at) index from the oldest end; no full sort
+        conn.execute(
+            'DELETE FROM cache WHERE namespace = ? AND key IN ('
+            ' SELECT key FROM cache WHERE namespace = ?'
+            ' ORDER BY accessed_at LIMIT ?)',
+            (self.namespace, self.namespace, excess + self.max_entries // 10)
+        )
+
+    def delete(self, key: str):
+        self._connect().execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (self.namespace, key))
+
+    def clear(self):
+        self._connect().execute('DELETE FROM cache WHERE namespace = ?', (self.namespace,))
+
+    def __len__(self):
+        row = self._connect().execute(
+            'SELECT COUNT(*) FROM cache WHERE namespace = ?', (self.namespace,)
+        ).fetchone()
+        return row[0]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'backend': 'sqlite',
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+def create_cache(backend: str, max_entries: int, ttl: float = None, path: str = None, namespace: str = 'default'):
+    """
+    Build a cache for the configured backend.
+
+    Args:
+        backend: 'memory' for a per-process LRU, 'sqlite' for a cache shared by workers
+        max_entries: Maximum number of entries kept before LRU eviction
+        ttl: Seconds before an entry expires, or None to keep entries until evicted
+        path: sqlite file path, required for the 'sqlite' backend
+        namespace: Keeps several caches apart inside one sqlite file
+
+    Returns:
+        MemoryCache or SqliteCache
+    """
+    if backend == 'memory':
+        return MemoryCache(max_entries=max_entries, ttl=ttl)
+    if backend == 'sqlite':
+        if not path:
+            raise ValueError("A cache path is required for the sqlite backend")
+        return SqliteCache(path, max_entries=max_entries, ttl=ttl, namespace=namespace)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,78 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+def _gevent_hub():
+    """Return the gevent hub when the process is monkey-patched, else None."""
+    try:
+        from gevent import monkey, get_hub
+    except ImportError:
+        return None
+    if not monkey.is_module_patched('threading'):
+        return None
+    return get_hub()
+
+def run_blocking(fn, *args, **kwargs):
+    """
+    Run CPU-bound work (PDF parsing, embedding) without stalling the event loop.
+
+    Under gevent workers the call runs on the hub's native thread pool, so
+    other greenlets keep serving streamed tokens and Groq responses meanwhile.
+    In sync workers it is a plain call.
+    """
+    hub = _gevent_hub()
+    if hub is None:
+        return fn(*args, **kwargs)
+    return hub.threadpool.apply(fn, args, kwargs)
+
+def start_native_thread(fn, *args, name: str = None):
+    """
+    Run fn in the background on a native thread and return without waiting for it.
+
+    Under gevent a patched threading.Thread is only a greenlet, and CPU-bound
+    work on it (importing torch, loading a model) would stall every request
+    the worker is serving. There it runs on the hub's native thread pool
+    instead; in sync workers it gets a daemon thread.
+    """
+    hub = _gevent_hub()
+    if hub is None:
+        import threading
+        thread = threading.Thread(target=fn, args=args, name=name, daemon=True)
+        thread.start()
+        return thread
+    return hub.threadpool.spawn(fn, *args)
+
+def _original(module: str, name: str):
+    try:
+        from gevent import monkey
+    except ImportError:
+        return getattr(__import__(module), name)
+    return monkey.get_original(module, name)
+
+def native_lock():
+    """
+    Return a lock from the unpatched _thread module.
+
+    Work sent through run_blocking runs on native threads even under gevent,
+    where the patched primitives would try to switch greenlets instead of
+    blocking the thread.
+    """
+    return _original('_thread', 'allocate_lock')()
+
+def native_sleep(seconds: float):
+    """time.sleep that blocks the calling native thread, even when gevent has patched time."""
+    _original('time', 'sleep')(seconds)
+
+# One pool per size: PDF page splitting and bulk extraction are sized independently
+_process_pools = {}
+_process_pools_lock = native_lock()
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Return this process's shared pool of `workers` spawned processes, creating it on first use."""
+    with _process_pools_lock:
+        pool = _process_pools.get(workers)
+        if pool is None:
+            # spawn rather than fork: gunicorn workers may hold torch and client threads
+            pool = _process_pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return pool
@@ -0,0 +1,247 @@
+import codecs
+import io
+import zipfile
+from concurrent.futures import as_completed
+from xml.etree import ElementTree
+from app.utils.concurrency import get_process_pool
+from app.utils.pdf_utils import ExtractionResult, extract_text_with_budget, read_text_from_pdf
+from app.utils.token_utils import tokens_to_chars, truncate_at_word
+
+DOCUMENT_FORMATS = ('pdf', 'docx', 'text')
+
+# Enough of the file to find a PDF header and to tell text from binary
+SNIFF_BYTES = 8 * 1024
+
+# Inflated size of word/document.xml past which a DOCX is refused rather than parsed
+MAX_DOCX_XML_BYTES = 20 * 1024 * 1024
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+_TEXT_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+class UnsupportedDocument(ValueError):
+    """Raised for uploads that aren't a PDF, a DOCX or plain text."""
+
+def _head(source, size: int) -> bytes:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source[:size])
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return f.read(size)
+    position = source.tell()
+    try:
+        return source.read(size)
+    finally:
+        source.seek(position)
+
+def _read_all(source) -> bytes:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            return f.read()
+    source.seek(0)
+    return source.read()
+
+def _open_zip(source) -> zipfile.ZipFile:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return zipfile.ZipFile(io.BytesIO(source))
+    return zipfile.ZipFile(source)
+
+def _is_docx(source) -> bool:
+    position = None if isinstance(source, (str, bytes, bytearray, memoryview)) else source.tell()
+    try:
+        with _open_zip(source) as zf:
+            return 'word/document.xml' in zf.namelist()
+    except zipfile.BadZipFile:
+        return False
+    finally:
+        if position is not None:
+            source.seek(position)
+
+def _text_encoding(head: bytes):
+    """Return the encoding to read a plain text file with, or None if the bytes don't look like text."""
+    for bom, encoding in _TEXT_BOMS:
+        if head.startswith(bom):
+            return encoding
+    if b'\x00' in head:
+        return None
+    # cp1252 decodes almost anything, so what rules out binary files is the share of control characters
+    for encoding in ('utf-8', 'cp1252'):
+        try:
+            # Not final: the sniffed head may end partway through a character
+            text = codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+        except UnicodeDecodeError:
+            continue
+        control = sum(1 for ch in text if ch < ' ' and ch not in '\t\n\r\f')
+        return encoding if control <= len(text) * 0.01 else None
+    return None
+
+def detect_format(source):
+    """
+    Work out what kind of document an upload is from its leading bytes.
+
+    The filename is never consulted, so a resume saved without an
+    extension, or a Word file renamed to .pdf, still goes to the right
+    reader. Streams are left at the position they were passed in at.
+
+    Args:
+        source: Path, document bytes or seekable binary stream
+
+    Returns:
+        str: 'pdf', 'docx' or 'text', or None for anything else
+    """
+    head = _head(source, SNIFF_BYTES)
+    # PDF readers accept the header anywhere in the first 1KB
+    if b'%PDF-' in head[:1024]:
+        return 'pdf'
+    if head.startswith(b'PK\x03\x04'):
+        return 'docx' if _is_docx(source) else None
+    if _text_encoding(head) is not None:
+        return 'text'
+    return None
+
+def _collect_docx_text(element, parts: list, lines: list):
+    for child in element:
+        tag = child.tag
+        if tag.endswith('Pr'):
+            # Paragraph, run and table properties; their tab stops aren't text
+            continue
+        if tag == f'{_W}t':
+            parts.append(child.text or '')
+        elif tag == f'{_W}tab':
+            parts.append('\t')
+        elif tag in (f'{_W}br', f'{_W}cr'):
+            parts.append('\n')
+        elif tag == f'{_W}p':
+            paragraph = []
+            if child.find(f'{_W}pPr/{_W}numPr') is not None:
+                # List numbering lives in numbering.xml; mark the item so it still reads as a bullet
+                paragraph.append('- ')
+            _collect_docx_text(child, paragraph, lines)
+            lines.append(''.join(paragraph))
+        else:
+            _collect_docx_text(child, parts, lines)
+
+def read_docx_text(source) -> str:
+    """
+    Extract the body text of a Word document, one line per paragraph.
+
+    Table cells and text boxes contribute their paragraphs in document
+    order; headers, footers and tracked deletions are left out.
+
+    Args:
+        source: Path, DOCX bytes or seekable binary stream
+
+    Returns:
+        str: Text of the document
+    """
+    try:
+        with _open_zip(source) as zf:
+            info = zf.getinfo('word/document.xml')
+            # Check the declared size before inflating anything
+            if info.file_size > MAX_DOCX_XML_BYTES:
+                raise ValueError("document body is too large")
+            root = ElementTree.fromstring(zf.read(info))
+    except Exception as e:
+        raise Exception(f"Error reading DOCX: {str(e)}")
+
+    lines = []
+    _collect_docx_text(root, [], lines)
+    return "\n".join(lines).strip()
+
+def read_plain_text(source) -> str:
+    """Decode a plain text upload, honouring a UTF-8 or UTF-16 byte order mark."""
+    data = _read_all(source)
+    encoding = _text_encoding(data[:SNIFF_BYTES]) or 'utf-8'
+    text = data.decode(encoding, errors='replace')
+    return text.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+def _fit_budget(text: str, max_tokens: int) -> ExtractionResult:
+    if max_tokens:
+        budget = tokens_to_chars(max_tokens)
+        if len(text) > budget:
+            return ExtractionResult(truncate_at_word(text, budget), True, None)
+    return ExtractionResult(text, False, None)
+
+def extract_document(source, max_tokens: int = None, max_pages: int = None, workers: int = 0,
+                     min_parallel_pages: int = 16, engine: str = 'auto') -> ExtractionResult:
+    """
+    Extract the text of an uploaded resume, whatever format it came in.
+
+    PDFs go through the tiered PDF reader (see iter_pdf_pages). DOCX and
+    plain text files are read directly and never touch a PDF engine.
+
+    Args:
+        source: Path, document bytes or seekable binary stream
+        max_tokens: Token budget for the returned text; for PDFs, pages past the budget are never parsed
+        max_pages: Only read this many pages of a PDF
+        workers: Split long PDFs across this many processes; ignored when max_tokens is set
+        min_parallel_pages: PDFs shorter than this are always read in this process
+        engine: PDF engine, 'auto', 'pdfium' or 'pdfplumber'
+
+    Returns:
+        ExtractionResult: The text, whether anything was cut off, and how many PDF pages were parsed
+
+    Raises:
+        UnsupportedDocument: The upload is not a PDF, DOCX or plain text file
+    """
+    kind = detect_format(source)
+    if kind == 'pdf':
+        if max_tokens:
+            return extract_text_with_budget(source, max_tokens=max_tokens, max_pages=max_pages, engine=engine)
+        text = read_text_from_pdf(
+            source,
+            max_pages=max_pages,
+            workers=workers,
+            min_parallel_pages=min_parallel_pages,
+            engine=engine
+        )
+        return ExtractionResult(text, False, None)
+    if kind == 'docx':
+        return _fit_budget(read_docx_text(source), max_tokens)
+    if kind == 'text':
+        return _fit_budget(read_plain_text(source), max_tokens)
+    raise UnsupportedDocument("Unsupported file type; upload a PDF, DOCX or plain text resume")
+
+def extract_many(sources, max_tokens: int = None, max_pages: int = None, workers: int = 0, engine: str = 'auto'):
+    """
+    Extract text from many documents, yielding each result as soon as it is ready.
+
+    Args:
+        sources: List of document paths or bytes, in any format extract_document reads
+        max_tokens: Token budget per document (see extract_document)
+        max_pages: Page cap per PDF
+        workers: Spread documents across this many processes; 0 or 1 reads them in order here
+        engine: PDF engine (see iter_pdf_pages)
+
+    Yields:
+        tuple: (index into sources, ExtractionResult or the Exception that document raised)
+    """
+    if workers <= 1:
+        for index, source in enumerate(sources):
+            try:
+                yield index, extract_document(source, max_tokens=max_tokens, max_pages=max_pages, engine=engine)
+            except Exception as e:
+                yield index, e
+        return
+
+    pool = get_process_pool(workers)
+    futures = {
+        pool.submit(extract_document, source, max_tokens, max_pages, 0, 16, engine): index
+        for index, source in enumerate(sources)
+    }
+    try:
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+    finally:
+        # The client may stop reading early; don't leave queued documents behind
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,179 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Request latencies run from milliseconds (cache hits) to tens of seconds (LLM calls)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    """A monotonically increasing value per label combination."""
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{_label_text(self.labelnames, labels)} {value}'
+
+
+class Histogram:
+    """Bucketed observations per label combination, with their sum and count."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                # One slot per bucket plus +Inf, then the running sum
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[len(self.buckets)] += 1
+            counts[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            values = [(labels, list(counts)) for labels, counts in self._values.items()]
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound}"'
+                yield f'{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}'
+            yield f'{self.name}_sum{_label_text(self.labelnames, labels)} {counts[-1]}'
+            yield f'{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}'
+
+
+class Registry:
+    """
+    Metrics rendered in the Prometheus text format.
+
+    Counters and histograms are updated in the request path under a short
+    lock. Values that already live elsewhere, such as cache hit counts, are
+    read by collectors only when /api/metrics is scraped. Each gunicorn
+    worker keeps its own registry, so a scrape reports the worker that
+    answered it.
+    """
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]):
+        """Add a callback yielding (name, kind, help, labels, value) samples at scrape time."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+
+        described = set()
+        for collect in self._collectors:
+            for name, kind, help, labels, value in collect():
+                if name not in described:
+                    described.add(name)
+                    lines.append(f'# HELP {name} {help}')
+                    lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name}{_label_text(tuple(labels), tuple(labels.values()))} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter('http_requests_total', 'Requests handled', ('endpoint', 'method', 'status'))
+HTTP_DURATION = REGISTRY.histogram('http_request_duration_seconds', 'Time to build the response', ('endpoint',))
+HTTP_ERRORS = REGISTRY.counter('http_errors_total', 'Requests that failed with a server error', ('endpoint', 'error'))
+STAGE_DURATION = REGISTRY.histogram('stage_duration_seconds', 'Time spent in each request stage', ('stage',))
+LLM_TOKENS = REGISTRY.counter('llm_tokens_total', 'Tokens reported by the LLM', ('model', 'type'))
+LLM_ATTEMPTS = REGISTRY.counter('llm_attempts_total', 'LLM call attempts by outcome', ('model', 'outcome'))
+LLM_FALLBACKS = REGISTRY.counter('llm_fallbacks_total', 'Calls answered by a fallback model', ('model', 'fallback'))
+
+_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('stage_timings', default=None)
+# Threads started with a copy of the request context add to the same dict
+_timings_lock = threading.Lock()
+
+
+def start_timings():
+    """Start collecting stage timings for the current request."""
+    _timings.set({})
+
+
+def current_timings() -> Dict[str, float]:
+    return _timings.get() or {}
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block as one request stage; repeated stages add up."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.observe(elapsed, name)
+        timings = _timings.get()
+        if timings is not None:
+            with _timings_lock:
+                timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def server_timing(timings: Dict[str, float], total: float = None) -> str:
+    """Format stage timings as a Server-Timing header value (durations in milliseconds)."""
+    entries: List[str] = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in timings.items()]
+    if total is not None:
+        entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+
+def record_llm_usage(model: str, prompt_tokens: int, completion_tokens: int):
+    LLM_TOKENS.inc(model, 'prompt', amount=prompt_tokens)
+    LLM_TOKENS.inc(model, 'completion', amount=completion_tokens)
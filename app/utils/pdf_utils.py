@@ -1,23 +1,329 @@
-import pdfplumber
+import hashlib
+import io
+import logging
 import os
+import tempfile
+import sys
+from contextlib import contextmanager
+from typing import NamedTuple
+from app.utils.concurrency import get_process_pool, native_lock
+from app.utils.token_utils import tokens_to_chars, truncate_at_word
 
-def read_text_from_pdf(pdf_path: str) -> str:
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# 'auto' reads the text layer with pdfium and re-reads pages whose text looks wrong with pdfplumber
+PDF_ENGINES = ('auto', 'pdfium', 'pdfplumber')
+
+# pdfium keeps global state and isn't thread-safe; run_blocking may parse on several native threads
+_pdfium_lock = native_lock()
+
+class ExtractionResult(NamedTuple):
+    text: str
+    truncated: bool
+    pages_read: int
+
+def load_pdf_engine():
+    """
+    Import pdfplumber, which is deferred until first use to keep app startup fast.
+
+    pdfplumber pulls in pdfminer and Pillow; warmup calls this in the
+    background, along with pypdfium2, so the first upload doesn't pay for
+    either import.
+    """
+    import pdfplumber
+    load_fast_pdf_engine()
+    return pdfplumber
+
+def load_fast_pdf_engine():
+    """Import pypdfium2, the raw text-layer reader tried before pdfplumber."""
+    import pypdfium2
+    return pypdfium2
+
+def is_pdf_engine_loaded() -> bool:
+    """
+    Return True once pypdfium2, the engine every PDF is read with first, is imported.
+
+    pdfplumber only reads pages pdfium garbles, so a worker that has served
+    PDFs may never have imported it; readiness doesn't wait on it.
+    """
+    return 'pypdfium2' in sys.modules
+
+def _as_pdf_source(source):
+    """Turn bytes-like input into a stream pdfplumber can open; paths and streams pass through."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+def _looks_garbled(text: str) -> bool:
+    """
+    Guess whether pdfium's text for a page came out wrong.
+
+    Fonts without a usable Unicode map come out as replacement or control
+    characters, and PDFs that position words without space characters come
+    out as long runs of glued words. pdfplumber decodes fonts through
+    pdfminer and infers spaces from glyph positions, so it often does better
+    on both. Empty pages aren't garbled: pdfplumber reads the same text
+    layer and finds nothing either.
+    """
+    text = text.strip()
+    if not text:
+        return False
+    bad = sum(1 for ch in text if ch == '\ufffd' or (ch < ' ' and ch not in '\n\t'))
+    if bad > len(text) * 0.01:
+        return True
+    words = text.split()
+    return sum(len(word) for word in words) / len(words) > 15
+
+def _page_range(page_count: int, max_pages: int, start: int, stop: int) -> range:
+    stop = page_count if stop is None else min(stop, page_count)
+    if max_pages is not None:
+        stop = min(stop, start + max_pages)
+    return range(start, stop)
+
+def _open_pdfium(source):
+    if not isinstance(source, str):
+        # pdfium gets its own copy, so a pdfplumber fallback can read the same stream
+        source = bytes(source) if isinstance(source, (bytes, bytearray, memoryview)) else _as_pdf_source(source).read()
+    pdfium = load_fast_pdf_engine()
+    with _pdfium_lock:
+        return pdfium.PdfDocument(source)
+
+def _pdfium_page_text(pdf, index: int) -> str:
+    with _pdfium_lock:
+        page = pdf[index]
+        try:
+            textpage = page.get_textpage()
+            try:
+                text = textpage.get_text_range()
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+    # pdfium marks hyphens at line breaks with U+FFFE or U+0002
+    return text.replace('\r\n', '\n').replace('\r', '\n').replace('\ufffe', '-').replace('\x02', '-')
+
+def _iter_pdfplumber_pages(source, max_pages: int, start: int, stop: int):
+    with load_pdf_engine().open(_as_pdf_source(source)) as pdf:
+        for index in _page_range(len(pdf.pages), max_pages, start, stop):
+            page = pdf.pages[index]
+            try:
+                yield page.extract_text() or ""
+            finally:
+                page.close()
+
+def iter_pdf_pages(source, max_pages: int = None, start: int = 0, stop: int = None, engine: str = 'auto'):
+    """
+    Yield the text of each page of a PDF, one page at a time.
+
+    Each page's parsed layout objects are released as soon as its text has
+    been extracted, so memory stays flat no matter how long the document is.
+
+    With engine 'auto', pages are read from the raw text layer with pdfium,
+    which is tens of times faster than pdfplumber and keeps each column of a
+    multi-column layout together. Only pages whose pdfium text looks wrong
+    (see _looks_garbled), or documents pdfium can't open, are parsed with
+    pdfplumber.
+
+    Args:
+        source: Path, PDF bytes or seekable binary stream (see read_text_from_pdf)
+        max_pages: Stop after this many pages, or None for no cap
+        start: Index of the first page to read
+        stop: Index one past the last page to read, or None for the end
+        engine: 'auto', 'pdfium' or 'pdfplumber'
+
+    Yields:
+        str: Text of each page, empty for pages without a text layer
+    """
+    if engine not in PDF_ENGINES:
+        raise ValueError(f"Unknown PDF engine: {engine}")
+    if engine == 'pdfplumber':
+        yield from _iter_pdfplumber_pages(source, max_pages, start, stop)
+        return
+
+    try:
+        pdf = _open_pdfium(source)
+    except Exception as e:
+        if engine == 'pdfium':
+            raise
+        logger.info("pdfium couldn't open the PDF (%s); reading it with pdfplumber", e)
+        yield from _iter_pdfplumber_pages(source, max_pages, start, stop)
+        return
+
+    fallback = None
+    try:
+        for index in _page_range(len(pdf), max_pages, start, stop):
+            text = _pdfium_page_text(pdf, index)
+            if engine == 'auto' and _looks_garbled(text):
+                if fallback is None:
+                    fallback = load_pdf_engine().open(_as_pdf_source(source))
+                page = fallback.pages[index]
+                try:
+                    text = page.extract_text() or ""
+                finally:
+                    page.close()
+            yield text
+    finally:
+        if fallback is not None:
+            fallback.close()
+        with _pdfium_lock:
+            pdf.close()
+
+def count_pdf_pages(source, engine: str = 'auto') -> int:
+    """Return the number of pages in a PDF without extracting any text."""
+    if engine != 'pdfplumber':
+        try:
+            pdf = _open_pdfium(source)
+        except Exception:
+            if engine == 'pdfium':
+                raise
+        else:
+            with _pdfium_lock:
+                try:
+                    return len(pdf)
+                finally:
+                    pdf.close()
+    with load_pdf_engine().open(_as_pdf_source(source)) as pdf:
+        return len(pdf.pages)
+
+def _extract_page_range(source, start: int, stop: int, engine: str = 'auto') -> list:
+    return list(iter_pdf_pages(source, start=start, stop=stop, engine=engine))
+
+def _read_pages_in_parallel(source, page_count: int, workers: int, engine: str = 'auto') -> list:
+    if not isinstance(source, str):
+        # Streams and memoryviews can't be pickled across processes
+        source = bytes(source) if isinstance(source, (bytes, bytearray, memoryview)) else _as_pdf_source(source).read()
+
+    chunk = -(-page_count // workers)
+    pool = get_process_pool(workers)
+    futures = [
+        pool.submit(_extract_page_range, source, start, min(start + chunk, page_count), engine)
+        for start in range(0, page_count, chunk)
+    ]
+    return [text for future in futures for text in future.result()]
+
+def extract_text_with_budget(source, max_chars: int = None, max_tokens: int = None, max_pages: int = None,
+                             engine: str = 'auto') -> ExtractionResult:
+    """
+    Extract text from a PDF, stopping as soon as a size budget is met.
+
+    Pages after the one that fills the budget are never parsed.
+
+    Args:
+        source: Path, PDF bytes or seekable binary stream (see read_text_from_pdf)
+        max_chars: Character budget for the returned text
+        max_tokens: Token budget for the returned text; the tighter of the two budgets wins
+        max_pages: Only read this many pages from the start of the document
+        engine: 'auto', 'pdfium' or 'pdfplumber' (see iter_pdf_pages)
+
+    Returns:
+        ExtractionResult: The text, whether anything was cut off, and how many pages were parsed
+    """
+    try:
+        return _extract_with_budget(source, max_chars, max_tokens, max_pages, engine)
+    except Exception as e:
+        raise Exception(f"Error reading PDF: {str(e)}")
+
+def _extract_with_budget(source, max_chars, max_tokens, max_pages, engine='auto') -> ExtractionResult:
+    budget = max_chars
+    if max_tokens is not None:
+        budget = min(budget, tokens_to_chars(max_tokens)) if budget is not None else tokens_to_chars(max_tokens)
+
+    # Ask for one page past the cap so we know whether the cap cut anything off
+    pages = iter_pdf_pages(source, max_pages=max_pages + 1 if max_pages is not None else None, engine=engine)
+    texts = []
+    length = 0
+    pages_read = 0
+    truncated = False
+    try:
+        for page_text in pages:
+            if max_pages is not None and pages_read == max_pages:
+                truncated = True
+                break
+
+            pages_read += 1
+            texts.append(page_text)
+            length += len(page_text) + 1
+            if budget is not None and length > budget:
+                truncated = True
+                break
+    finally:
+        pages.close()
+
+    text = "\n".join(texts).strip()
+    if budget is not None and len(text) > budget:
+        text = truncate_at_word(text, budget)
+    return ExtractionResult(text, truncated, pages_read)
+
+def read_text_from_pdf(source, max_pages: int = None, workers: int = 0, min_parallel_pages: int = 16,
+                       max_chars: int = None, max_tokens: int = None, engine: str = 'auto') -> str:
     """
     Extract text from a PDF file.
     
     Args:
-        pdf_path: Path to the PDF file
+        source: Path to the PDF file, the PDF bytes (bytes, bytearray or memoryview),
+            or a seekable binary stream such as a werkzeug FileStorage stream
+        max_pages: Only read this many pages from the start of the document
+        workers: Split long documents across this many processes; 0 reads in this process.
+            Ignored when max_chars or max_tokens is given, since budgeted reads go page by page
+        min_parallel_pages: Documents shorter than this are always read in this process
+        max_chars: Stop parsing once this many characters have been extracted
+        max_tokens: Stop parsing once this many prompt tokens have been extracted
+        engine: 'auto', 'pdfium' or 'pdfplumber' (see iter_pdf_pages)
         
     Returns:
         str: Extracted text from the PDF
     """
     try:
-        # Extract text directly from the path
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        
-        return text.strip()
+        if max_chars is not None or max_tokens is not None:
+            # Budgeted reads stop early, which only works page by page
+            return _extract_with_budget(source, max_chars, max_tokens, max_pages, engine).text
+
+        if workers > 1:
+            page_count = count_pdf_pages(source, engine)
+            if max_pages is not None:
+                page_count = min(page_count, max_pages)
+            if page_count >= min_parallel_pages:
+                return "\n".join(_read_pages_in_parallel(source, page_count, workers, engine)).strip()
+
+        return "\n".join(iter_pdf_pages(source, max_pages=max_pages, engine=engine)).strip()
     except Exception as e:
-        raise Exception(f"Error reading PDF: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error reading PDF: {str(e)}")
+
+@contextmanager
+def spooled_upload(stream, max_memory_size: int, temp_dir: str):
+    """
+    Read an upload stream once, hashing it on the way.
+
+    Uploads up to max_memory_size bytes stay in memory. Larger ones are
+    copied to a uniquely named temp file in temp_dir, which is removed when
+    the context exits.
+
+    Args:
+        stream: Binary stream of the uploaded file
+        max_memory_size: Largest upload, in bytes, kept in memory
+        temp_dir: Directory for the temp file fallback
+
+    Yields:
+        tuple: (SHA-256 hex digest of the upload, memoryview or temp file path)
+    """
+    data = stream.read(max_memory_size + 1)
+    if len(data) <= max_memory_size:
+        yield hashlib.sha256(data).hexdigest(), memoryview(data)
+        return
+
+    digest = hashlib.sha256(data)
+    fd, temp_path = tempfile.mkstemp(suffix='.upload', dir=temp_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            del data
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                f.write(chunk)
+        yield digest.hexdigest(), temp_path
+    finally:
+        os.remove(temp_path)
@@ -0,0 +1,174 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+from app.utils.text_utils import split_sections
+from app.utils.token_utils import estimate_tokens, tokens_to_chars
+
+_INLINE_WHITESPACE = re.compile(r'[ \t\u00a0\u2000-\u200b\u3000]+')
+_BLANK_LINES = re.compile(r'\n{3,}')
+_PAGE_NUMBER = re.compile(r'^(?:page\s*)?-?\s*\d{1,3}\s*(?:(?:of|/)\s*\d{1,3})?\s*-?$', re.IGNORECASE)
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# Lines at least this long are dropped when they repeat, e.g. running headers and footers
+_MIN_DUPLICATE_CHARS = 25
+
+# Equal-opportunity, accommodation and agency statements that don't help the model
+JD_BOILERPLATE = re.compile(
+    r'equal (?:employment )?opportunity|without regard to|regardless of (?:race|age|gender|sex|religion)'
+    r'|affirmative action|reasonable accommodation|e-verify|pay transparency'
+    r'|(?:applicant|candidate|recruitment) privacy (?:notice|policy)'
+    r'|unsolicited (?:resumes|applications|agency)|recruitment agenc|agency submissions'
+    r'|this job description is not (?:designed|intended)',
+    re.IGNORECASE
+)
+
+# Heading keyword -> priority when a prompt has to be cut; lower numbers are kept first
+RESUME_SECTION_PRIORITIES = (
+    ('experience', 0), ('employment', 0), ('work history', 0),
+    ('skill', 1), ('summary', 2), ('profile', 2), ('objective', 3),
+    ('project', 3), ('education', 4), ('certification', 4), ('language', 5),
+    ('award', 6), ('publication', 6), ('volunteer', 6),
+    ('interest', 8), ('hobbies', 8), ('reference', 9),
+)
+JD_SECTION_PRIORITIES = (
+    ('requirement', 0), ('qualification', 0), ('skill', 0), ('must have', 0),
+    ('responsibilit', 1), ('what you', 1), ('role', 2), ('nice to have', 3), ('preferred', 3),
+    ('about us', 6), ('about the company', 6), ('who we are', 6), ('culture', 6),
+    ('benefit', 8), ('perk', 8), ('compensation', 8), ('salary', 8),
+)
+# Untitled text before the first heading: contact details on a resume, the intro on a job description
+UNTITLED_PRIORITY = 2
+DEFAULT_PRIORITY = 5
+
+# Smallest remainder worth filling with the start of a cut section
+_MIN_PARTIAL_TOKENS = 50
+
+
+class PromptInputs(NamedTuple):
+    resume_text: str
+    job_description: str
+    original_tokens: int
+    tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of spaces and tabs, trim every line and keep at most one blank line in a row."""
+    lines = (_INLINE_WHITESPACE.sub(' ', line).strip() for line in text.replace('\r', '\n').split('\n'))
+    return _BLANK_LINES.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def remove_repeated_lines(text: str) -> str:
+    """
+    Drop page numbers and later copies of long repeated lines.
+
+    pdfplumber repeats running headers and footers on every page. Short lines
+    such as job titles are left alone even when they repeat, since they
+    usually carry meaning in context.
+    """
+    seen = set()
+    lines = []
+    for line in text.split('\n'):
+        if _PAGE_NUMBER.match(line):
+            continue
+        if len(line) >= _MIN_DUPLICATE_CHARS:
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def strip_boilerplate(text: str, pattern: re.Pattern = JD_BOILERPLATE) -> str:
+    """Remove the sentences of text that match a boilerplate pattern."""
+    lines = []
+    for line in text.split('\n'):
+        if pattern.search(line):
+            line = ' '.join(s for s in _SENTENCE_END.split(line) if not pattern.search(s))
+            if not line:
+                continue
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def _section_priority(heading: str, priorities: Tuple[Tuple[str, int], ...]) -> int:
+    if not heading:
+        return UNTITLED_PRIORITY
+    heading = heading.lower()
+    for keyword, priority in priorities:
+        if keyword in heading:
+            return priority
+    return DEFAULT_PRIORITY
+
+
+def fit_sections(text: str, max_tokens: int, priorities: Tuple[Tuple[str, int], ...]) -> str:
+    """
+    Fit text into max_tokens by keeping its most important sections.
+
+    Sections are kept in priority order until the budget runs out. The first
+    section that doesn't fit is cut at a line boundary, and the rest are
+    dropped. Kept sections stay in document order.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    sections = split_sections(text)
+    order = sorted(range(len(sections)), key=lambda i: (_section_priority(sections[i][0], priorities), i))
+    kept = {}
+    remaining = max_tokens
+    for i in order:
+        heading, body = sections[i]
+        section = '\n'.join(part for part in (heading, body) if part)
+        cost = estimate_tokens(section) + 1
+        if cost <= remaining:
+            kept[i] = section
+            remaining -= cost
+            continue
+        if remaining >= _MIN_PARTIAL_TOKENS:
+            cut = section[:tokens_to_chars(remaining - 1)]
+            kept[i] = cut[:cut.rfind('\n')] if '\n' in cut else cut
+        break
+    return '\n'.join(kept[i] for i in sorted(kept) if kept[i])
+
+
+@lru_cache(maxsize=128)
+def compact_prompt_inputs(resume_text: str, job_description: str, max_tokens: int = None) -> PromptInputs:
+    """
+    Shrink a resume and job description before they are sent to a model.
+
+    Whitespace is normalized, repeated headers, footers and page numbers are
+    removed, and equal-opportunity boilerplate is stripped from the job
+    description. If the two still exceed max_tokens, each is cut by section
+    priority. The job description keeps at least a third of the budget, and
+    the resume gets the rest.
+
+    Args:
+        resume_text: Extracted resume text
+        job_description: Job description text
+        max_tokens: Token budget for both texts together, or None for no limit
+
+    Returns:
+        PromptInputs: the compacted texts with token estimates before and after
+    """
+    original_tokens = estimate_tokens(resume_text) + estimate_tokens(job_description)
+    resume_text = remove_repeated_lines(normalize_whitespace(resume_text))
+    job_description = strip_boilerplate(remove_repeated_lines(normalize_whitespace(job_description)))
+
+    resume_tokens = estimate_tokens(resume_text)
+    jd_tokens = estimate_tokens(job_description)
+    if max_tokens is not None and resume_tokens + jd_tokens > max_tokens:
+        jd_budget = min(jd_tokens, max(max_tokens // 3, max_tokens - resume_tokens))
+        job_description = fit_sections(job_description, jd_budget, JD_SECTION_PRIORITIES)
+        resume_text = fit_sections(resume_text, max_tokens - estimate_tokens(job_description), RESUME_SECTION_PRIORITIES)
+
+    return PromptInputs(
+        resume_text,
+        job_description,
+        original_tokens,
+        estimate_tokens(resume_text) + estimate_tokens(job_description)
+    )
@@ -0,0 +1,219 @@
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from app.utils.cache import MemoryCache, content_hash
+from app.utils.metrics import stage
+from app.utils.text_utils import is_heading
+
+# Heading keyword -> section name; the first keyword found in a heading wins
+SECTION_KEYWORDS = (
+    ('summary', ('summary', 'profile', 'objective', 'about me')),
+    ('experience', ('experience', 'employment', 'work history', 'career history')),
+    ('skills', ('skill', 'competenc', 'technolog', 'tools', 'expertise')),
+    ('education', ('education', 'academic', 'qualification')),
+    ('certifications', ('certification', 'licen', 'course', 'training')),
+    ('projects', ('project', 'portfolio')),
+    ('languages', ('language',)),
+    ('awards', ('award', 'honor', 'honour', 'achievement', 'publication')),
+    ('volunteer', ('volunteer', 'community')),
+    ('interests', ('interest', 'hobbies', 'hobby')),
+    ('references', ('reference',)),
+)
+# Text before the first heading: usually the name and contact details
+HEADER = 'header'
+OTHER = 'other'
+# Sections made of separate jobs, degrees or projects
+ENTRY_SECTIONS = ('experience', 'education', 'projects')
+
+_BULLET = re.compile(r'^\s*(?:[•●▪‣⁃∙\-\*–—>]|\d{1,2}[\.\)])\s*')
+_DATE_RANGE = re.compile(
+    r'(?:\b(?:19|20)\d{2}|\bpresent\b|\bcurrent\b)\s*(?:-|–|—|to)\s*(?:(?:19|20)\d{2}\b|present\b|current\b|now\b)'
+    r'|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+(?:19|20)\d{2}\b',
+    re.IGNORECASE
+)
+
+parsed_resume_cache = MemoryCache(max_entries=256)
+
+
+class Entry(NamedTuple):
+    """One job, degree or project inside a section, with its offsets in the resume text."""
+    text: str
+    start: int
+    end: int
+
+
+class ResumeSection(NamedTuple):
+    name: str
+    heading: str
+    text: str  # heading and body as they appear in the resume
+    start: int
+    end: int
+    entries: Tuple[Entry, ...] = ()
+
+    @property
+    def body(self) -> str:
+        return self.text[len(self.heading):].strip() if self.heading else self.text
+
+
+class ParsedResume(NamedTuple):
+    """A resume split into named sections; offsets index into the extracted text."""
+    digest: str
+    sections: Tuple[ResumeSection, ...]
+
+    def section(self, name: str) -> Optional[ResumeSection]:
+        """Return the first section with this name, or None."""
+        return next((section for section in self.sections if section.name == name), None)
+
+    @property
+    def summary(self) -> str:
+        section = self.section('summary')
+        return section.body if section else ''
+
+    @property
+    def skills(self) -> str:
+        return '\n'.join(section.body for section in self.sections if section.name == 'skills')
+
+    @property
+    def experience(self) -> List[Entry]:
+        return [entry for section in self.sections if section.name == 'experience' for entry in section.entries]
+
+    @property
+    def education(self) -> List[Entry]:
+        return [entry for section in self.sections if section.name == 'education' for entry in section.entries]
+
+    @property
+    def certifications(self) -> str:
+        return '\n'.join(section.body for section in self.sections if section.name == 'certifications')
+
+    def select(self, names: Iterable[str] = None, brief: Iterable[str] = (), brief_lines: int = 2) -> str:
+        """
+        Join the named sections back into text, in document order.
+
+        Sections named in brief keep their heading and the first brief_lines
+        lines of each entry. A resume without headings is returned whole,
+        since there is nothing to choose between.
+
+        Args:
+            names: Section names to keep, or None for all of them
+            brief: Section names to shorten rather than keep whole
+            brief_lines: Lines kept per entry of a brief section
+
+        Returns:
+            str: The selected text
+        """
+        if len(self.sections) <= 1 or (names is None and not brief):
+            return '\n'.join(section.text for section in self.sections)
+
+        names = None if names is None else set(names)
+        brief = set(brief)
+        parts = []
+        for section in self.sections:
+            if section.name in brief:
+                lines = [section.heading] if section.heading else []
+                for entry in section.entries or (Entry(section.body, section.start, section.end),):
+                    lines.extend(entry.text.split('\n')[:brief_lines])
+                parts.append('\n'.join(lines))
+            elif names is None or section.name in names:
+                parts.append(section.text)
+        return '\n'.join(parts)
+
+
+def section_name(heading: str) -> str:
+    """Map a heading such as 'Work Experience' or 'TECHNICAL SKILLS' to its section name."""
+    heading = heading.lower()
+    for name, keywords in SECTION_KEYWORDS:
+        if any(keyword in heading for keyword in keywords):
+            return name
+    return OTHER
+
+
+def _lines_with_offsets(text: str, start: int, end: int) -> Iterable[Tuple[str, int]]:
+    position = start
+    for line in text[start:end].split('\n'):
+        yield line, position
+        position += len(line) + 1
+
+
+def split_entries(text: str, start: int, end: int) -> Tuple[Entry, ...]:
+    """
+    Split a section body into entries such as jobs or degrees.
+
+    A new entry starts at a plain (non-bullet) line that follows bullet
+    points or a blank line, or at a second line with dates in it, which
+    catches entries written without bullets. Lines continuing a wrapped
+    bullet in lower case stay with it.
+    """
+    entries = []
+    entry_start = entry_end = None
+    after_bullets = after_blank = has_dates = False
+    for line, position in _lines_with_offsets(text, start, end):
+        if not line.strip():
+            after_blank = entry_start is not None
+            continue
+        bullet = bool(_BULLET.match(line))
+        dated = bool(_DATE_RANGE.search(line))
+        # Bullet text wrapped onto the next line carries on in lower case
+        continuation = after_bullets and line.lstrip()[:1].islower()
+        new_entry = after_bullets or after_blank or (dated and has_dates)
+        if entry_start is not None and not bullet and not continuation and new_entry:
+            entries.append(Entry(text[entry_start:entry_end], entry_start, entry_end))
+            entry_start = None
+        if entry_start is None:
+            entry_start, has_dates = position, False
+        entry_end = position + len(line)
+        after_bullets = bullet or continuation
+        after_blank = False
+        has_dates = has_dates or dated
+    if entry_start is not None:
+        entries.append(Entry(text[entry_start:entry_end], entry_start, entry_end))
+    return tuple(entries)
+
+
+def _build_section(text: str, heading: str, start: int, end: int) -> ResumeSection:
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    name = section_name(heading) if heading else HEADER
+    body_start = start + len(text[start:end].split('\n', 1)[0]) + 1 if heading else start
+    entries = split_entries(text, body_start, end) if name in ENTRY_SECTIONS else ()
+    return ResumeSection(name, heading, text[start:end], start, end, entries)
+
+
+def parse_resume(text: str) -> ParsedResume:
+    """
+    Split resume text into named sections with their character offsets.
+
+    Sections start at heading-like lines (see is_heading) and are named by
+    their heading keywords. Experience, education and project sections are
+    split further into entries. Results are cached by the text's content
+    hash, so every prompt and the local scoring for a resume share one parse.
+
+    Args:
+        text: Extracted resume text
+
+    Returns:
+        ParsedResume: the sections in document order
+    """
+    digest = content_hash(text)
+    parsed = parsed_resume_cache.get(digest)
+    if parsed is not None:
+        return parsed
+
+    with stage('parse'):
+        sections = []
+        heading, start = '', 0
+        for line, position in _lines_with_offsets(text, 0, len(text)):
+            if not is_heading(line):
+                continue
+            # Employers and schools are often in capitals ('IBM', 'MIT'); inside a list of
+            # entries, only a recognised heading starts the next section
+            if heading and section_name(heading) in ENTRY_SECTIONS and section_name(line) == OTHER:
+                continue
+            if heading or text[start:position].strip():
+                sections.append(_build_section(text, heading, start, position))
+            heading, start = line.strip(), position + len(line) - len(line.lstrip())
+        if heading or text[start:].strip():
+            sections.append(_build_section(text, heading, start, len(text)))
+        parsed = ParsedResume(digest, tuple(sections))
+
+    parsed_resume_cache.set(digest, parsed)
+    return parsed
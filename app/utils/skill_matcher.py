@@ -0,0 +1,179 @@
+import re
+from typing import Iterable, List
+
+SKILL_INDICATORS = (
+    'proficient in', 'experience with', 'skilled in',
+    'knowledge of', 'familiar with', 'expertise in',
+    'qualifications', 'skills', 'abilities'
+)
+
+# A starting dictionary of common languages, frameworks and tools
+DEFAULT_SKILLS = (
+    'python', 'java', 'javascript', 'typescript', 'c++', 'c#', 'golang', 'rust', 'ruby',
+    'php', 'swift', 'kotlin', 'scala', 'matlab', 'sql', 'nosql', 'bash', 'html', 'css',
+    'react', 'react native', 'angular', 'vue', 'vue.js', 'next.js', 'node.js', 'express', 'django',
+    'flask', 'fastapi', 'spring', 'spring boot', '.net', 'asp.net', 'ruby on rails', 'laravel',
+    'pandas', 'numpy', 'scikit-learn', 'tensorflow', 'pytorch', 'keras', 'spark', 'hadoop',
+    'kafka', 'airflow', 'tableau', 'power bi', 'excel', 'machine learning', 'deep learning',
+    'natural language processing', 'nlp', 'computer vision', 'data analysis', 'data science',
+    'postgresql', 'mysql', 'mongodb', 'redis', 'elasticsearch', 'sqlite', 'oracle', 'dynamodb',
+    'aws', 'azure', 'gcp', 'google cloud', 'docker', 'kubernetes', 'terraform', 'ansible',
+    'jenkins', 'github actions', 'ci/cd', 'git', 'linux', 'rest', 'graphql', 'grpc', 'microservices',
+    'agile', 'scrum', 'jira', 'figma', 'project management', 'communication', 'leadership',
+)
+
+# Skill-like tokens: keeps 'c++', 'c#', 'node.js' and 'ci/cd' whole, drops sentence-final dots
+_TOKEN = re.compile(r"[a-z0-9+#]+(?:[./\-][a-z0-9+#]+)*|\.[a-z][a-z0-9]*")
+_SKILL_SEPARATORS = re.compile(r'[,;&]')
+
+
+class SkillTrie:
+    """
+    A token-level trie over a skill dictionary.
+
+    The trie is compiled into one regex whose alternations follow the trie's
+    branches, so the text is scanned once in C and shared prefixes are only
+    tried once. At each position the longest dictionary entry wins, so
+    'spring boot' beats 'spring'. The pattern is matched against the
+    lowercased text rather than compiled with re.IGNORECASE, which is
+    several times slower.
+    """
+    def __init__(self, skills: Iterable[str]):
+        self._root = {}
+        self._skills = {}
+        for skill in skills:
+            tokens = _TOKEN.findall(skill.lower())
+            if not tokens:
+                continue
+            node = self._root
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[None] = skill
+            self._skills[' '.join(tokens)] = skill
+
+        self._pattern = self._ignorecase_pattern = None
+        if self._skills:
+            pattern = rf'(?<![a-z0-9+#]){self._node_pattern(self._root)}(?![a-z0-9+#]|[./\-][a-z0-9+#])'
+            self._pattern = re.compile(pattern)
+            self._ignorecase_pattern = re.compile(pattern, re.IGNORECASE)
+
+    def _node_pattern(self, node: dict) -> str:
+        branches = []
+        for token in sorted((t for t in node if t is not None), key=len, reverse=True):
+            child = node[token]
+            if any(t is not None for t in child):
+                # A greedy optional continuation prefers the longer skill
+                optional = '?' if None in child else ''
+                branches.append(rf'{re.escape(token)}(?:\s+{self._node_pattern(child)}){optional}')
+            else:
+                branches.append(re.escape(token))
+        return '(?:' + '|'.join(branches) + ')'
+
+    def find(self, text: str) -> List[dict]:
+        """
+        Find dictionary skills in text.
+
+        Returns:
+            List[dict]: skill, start and end character offsets for each match, in text order
+        """
+        if self._pattern is None:
+            return []
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self._pattern.finditer(lowered)
+        else:
+            # A few characters (e.g. 'İ') lowercase to two, which would shift the offsets
+            matches = self._ignorecase_pattern.finditer(text)
+        return [
+            {'skill': self._skills[' '.join(match.group().lower().split())], 'start': match.start(), 'end': match.end()}
+            for match in matches
+        ]
+
+
+class SkillMatcher:
+    """
+    Extracts skills from text in a single pass.
+
+    The indicator phrases present in the text are compiled into one
+    alternation regex, grouped by first letter like a trie so each position
+    is only tested against the indicators that could start there, and the
+    lowercased text is scanned once. Checking which indicators occur at all
+    is a substring search over the whole text, which is much faster than
+    the regex; resumes usually contain one or two indicators, and the
+    smaller alternation scans several times faster than the full one.
+    Within each sentence, the text between an indicator's first occurrence
+    and its next one (or the end of the sentence) is split on separators
+    into skill phrases, which is what splitting each sentence on each
+    indicator it contains gives. An optional SkillTrie adds direct matches
+    against known skills.
+    """
+    def __init__(self, indicators: Iterable[str] = SKILL_INDICATORS, skills: Iterable[str] = DEFAULT_SKILLS):
+        self.indicators = tuple(sorted({indicator for indicator in indicators if indicator}, key=len, reverse=True))
+        self._patterns = {}
+        # Indicators that start where a longer one matched; the alternation only reports the longest
+        self._also_starting = {
+            indicator: [other for other in self.indicators if other != indicator and indicator.startswith(other)]
+            for indicator in self.indicators
+        }
+        self.trie = SkillTrie(skills) if skills else None
+
+    def _pattern_for(self, indicators: tuple) -> re.Pattern:
+        pattern = self._patterns.get(indicators)
+        if pattern is None:
+            by_letter = {}
+            for indicator in indicators:
+                by_letter.setdefault(indicator[0], []).append(re.escape(indicator[1:]))
+            pattern = self._patterns[indicators] = re.compile('|'.join(
+                re.escape(letter) + (rest[0] if len(rest) == 1 else '(?:' + '|'.join(rest) + ')')
+                for letter, rest in by_letter.items()
+            ))
+        return pattern
+
+    def extract(self, text: str) -> List[str]:
+        """Return the distinct skill phrases that follow an indicator phrase."""
+        lowered = text.lower()
+        present = tuple(indicator for indicator in self.indicators if indicator in lowered)
+        if not present:
+            return []
+        pattern = self._pattern_for(present)
+        skills = set()
+        sentence_end = -1
+        # indicator -> [end of its first occurrence, start of the next one] in the current sentence
+        spans = {}
+        match = pattern.search(lowered)
+        while match is not None:
+            start = match.start()
+            if start > sentence_end:
+                self._collect(lowered, spans, sentence_end, skills)
+                spans = {}
+                # Indicators never contain '.', so each one lies inside a single sentence
+                sentence_end = lowered.find('.', start)
+                if sentence_end < 0:
+                    sentence_end = len(lowered)
+            longest = match.group()
+            for indicator in (longest, *self._also_starting[longest]):
+                span = spans.get(indicator)
+                if span is None:
+                    spans[indicator] = [start + len(indicator), None]
+                elif span[1] is None and start >= span[0]:
+                    span[1] = start
+            # Resume one character on, so indicators overlapping this one are found too
+            match = pattern.search(lowered, start + 1)
+        self._collect(lowered, spans, sentence_end, skills)
+        return list(skills)
+
+    @staticmethod
+    def _collect(text: str, spans: dict, sentence_end: int, skills: set):
+        for first_end, next_start in spans.values():
+            segment = text[first_end:sentence_end if next_start is None else next_start]
+            for skill in _SKILL_SEPARATORS.split(segment):
+                skill = skill.strip()
+                if skill:
+                    skills.add(skill)
+
+    def find_known(self, text: str) -> List[dict]:
+        """Return dictionary skills found in text with their character offsets."""
+        return self.trie.find(text) if self.trie else []
+
+
+default_matcher = SkillMatcher()
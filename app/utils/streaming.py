@@ -0,0 +1,70 @@
+import json
+from concurrent.futures import Future, as_completed
+from typing import Dict, Iterable, Iterator
+from flask import Response, stream_with_context
+
+STREAM_FORMATS = ('sse', 'ndjson')
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def ndjson_event(event: str, data: dict) -> str:
+    """Format one newline-delimited JSON record, tagged with its event type."""
+    return json.dumps({'event': event, **data}) + "\n"
+
+def stream_events(chunks: Iterable[str], meta: dict, fmt: str = 'sse') -> Iterator[str]:
+    """
+    Wrap a stream of generated text as 'meta', 'token', 'done' and 'error' events.
+
+    The meta event goes out before generation starts, so clients get their
+    first byte immediately. Errors raised mid-stream become an 'error' event,
+    because the 200 status has already been sent by then.
+    """
+    format_event = ndjson_event if fmt == 'ndjson' else sse_event
+    yield format_event('meta', meta)
+    try:
+        for chunk in chunks:
+            yield format_event('token', {'text': chunk})
+    except Exception as e:
+        error = {'error': str(e)}
+        if hasattr(e, 'retry_after'):
+            error['retry_after'] = round(e.retry_after, 1)
+        yield format_event('error', error)
+        return
+    yield format_event('done', {})
+
+def section_events(futures: Dict[Future, str], meta: dict, fmt: str = 'sse') -> Iterator[str]:
+    """
+    Emit a 'section' event for each finished future, in completion order.
+
+    Args:
+        futures: Maps each running future to the name of the section it produces
+        meta: Payload for the leading 'meta' event
+        fmt: 'sse' or 'ndjson'
+    """
+    format_event = ndjson_event if fmt == 'ndjson' else sse_event
+    yield format_event('meta', meta)
+    for future in as_completed(futures):
+        try:
+            yield format_event('section', {'section': futures[future], 'content': future.result()})
+        except Exception as e:
+            yield format_event('error', {'section': futures[future], 'error': str(e)})
+    yield format_event('done', {})
+
+def event_stream_response(events: Iterable[str], fmt: str = 'sse') -> Response:
+    """Build an unbuffered SSE or NDJSON response from already formatted events."""
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/event-stream'
+    return Response(
+        stream_with_context(events),
+        mimetype=mimetype,
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop nginx-style proxies from buffering the stream
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+def streaming_response(chunks: Iterable[str], meta: dict, fmt: str = 'sse') -> Response:
+    """Build an unbuffered SSE or NDJSON response around a text stream."""
+    return event_stream_response(stream_events(chunks, meta, fmt), fmt)
@@ -0,0 +1,81 @@
+import re
+from typing import List, Tuple
+
+# Sentence ends, or runs of bullet characters that pdfplumber leaves inline
+_SEGMENT_SPLIT = re.compile(r'(?<=[.!?;])\s+|\s*[•●▪‣⁃∙]\s*')
+_LEADING_MARKER = re.compile(r'^\s*(?:[\-\*–—>]+|\d{1,2}[\.\)])\s*')
+
+def split_into_segments(text: str, min_chars: int = 12, max_chars: int = 400) -> List[str]:
+    """
+    Split resume or job description text into sentence-sized segments for embedding.
+
+    Lines are split further at sentence ends and inline bullets. List markers
+    are stripped, fragments shorter than min_chars are dropped, and duplicates
+    are removed while keeping the original order.
+
+    Args:
+        text: Text to split
+        min_chars: Shortest segment to keep
+        max_chars: Longer segments are cut to this length
+
+    Returns:
+        List[str]: The segments in document order
+    """
+    segments = []
+    seen = set()
+    for line in text.splitlines():
+        for piece in _SEGMENT_SPLIT.split(line):
+            piece = _LEADING_MARKER.sub('', piece).strip()
+            if len(piece) < min_chars:
+                continue
+            piece = piece[:max_chars]
+            key = piece.lower()
+            if key not in seen:
+                seen.add(key)
+                segments.append(piece)
+    return segments
+
+_HEADING_KEYWORDS = re.compile(
+    r'summary|profile|objective|experience|employment|work history|skills|competencies|education'
+    r'|projects|certifications?|awards|publications|languages|interests|hobbies|references|volunteer'
+    r'|requirements|qualifications|responsibilities|about|benefits|perks|compensation|what you|who you|nice to have',
+    re.IGNORECASE
+)
+
+def is_heading(line: str) -> bool:
+    """
+    Guess whether a line is a section heading.
+
+    Headings are short and either ALL CAPS, or contain a known heading word
+    and end with a colon or capitalize every longer word ('Work Experience').
+    """
+    line = line.strip()
+    colon = line.endswith(':')
+    line = line.rstrip(':').strip()
+    if not line or len(line) > 40 or line[-1] in '.,;' or len(line.split()) > 4:
+        return False
+    letters = [c for c in line if c.isalpha()]
+    if len(letters) >= 3 and all(c.isupper() for c in letters):
+        return True
+    if not _HEADING_KEYWORDS.search(line):
+        return False
+    return colon or all(word[0].isupper() for word in line.split() if len(word) > 3)
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Split text into (heading, body) sections at heading-like lines.
+
+    Text before the first heading is returned with an empty heading.
+    """
+    sections = []
+    heading, body = '', []
+    for line in text.split('\n'):
+        if is_heading(line):
+            if heading or any(body_line.strip() for body_line in body):
+                sections.append((heading, '\n'.join(body).strip()))
+            heading, body = line.strip(), []
+        else:
+            body.append(line)
+    if heading or any(body_line.strip() for body_line in body):
+        sections.append((heading, '\n'.join(body).strip()))
+    return sections
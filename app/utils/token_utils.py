@@ -0,0 +1,16 @@
+# Llama-family tokenizers average roughly four characters of English text per token
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimate how many tokens a piece of text will use in a prompt."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def tokens_to_chars(tokens: int) -> int:
+    """Return the number of characters that fit in a token budget."""
+    return tokens * CHARS_PER_TOKEN
+
+def truncate_at_word(text: str, max_chars: int) -> str:
+    """Cut text to at most max_chars, at the last space when that doesn't lose more than half of it."""
+    cut = text[:max_chars]
+    boundary = cut.rfind(' ')
+    return cut[:boundary] if boundary > max_chars // 2 else cut
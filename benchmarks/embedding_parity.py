@@ -0,0 +1,141 @@
+"""
+Check that an embedding backend scores like the float32 reference model.
+
+Both backends embed the segments of synthetic resumes and job descriptions.
+The script compares what score_match and rank_resumes depend on: the cosine
+between each requirement and each resume segment, which segment is the best
+match, and which requirements clear MATCH_SIMILARITY_THRESHOLD. It also
+reports sentences/sec and, with --memory, each backend's peak RSS measured
+in a fresh process. The exit status is 1 if the scores drift more than
+--tolerance allows.
+
+    python benchmarks/embedding_parity.py --candidate onnx-int8
+    python benchmarks/embedding_parity.py --candidate onnx-int8 --memory
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from run import open_job_description
+from synthetic_pdfs import build_pdf
+
+
+def parity_texts():
+    """Resume segments and job requirements to score, from the same generator the benchmarks use."""
+    from app.utils.pdf_utils import read_text_from_pdf
+    from app.utils.text_utils import split_into_segments
+
+    segments = []
+    for seed in range(3):
+        text = read_text_from_pdf(io.BytesIO(build_pdf(4, 'single_column', 'dense', seed=seed)))
+        segments.extend(split_into_segments(text))
+    return segments, split_into_segments(open_job_description())
+
+
+def load(model_name: str, backend: str, options: dict):
+    from app.services.embedding_model import get_embedding_model
+    return get_embedding_model(model_name, **{**options, 'backend': backend, 'batch_wait': 0})
+
+
+def encode(model, texts, batch_size: int = 64) -> np.ndarray:
+    return np.asarray(
+        model.encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True,
+                     show_progress_bar=False),
+        dtype=np.float32
+    )
+
+
+def throughput(model, texts, seconds: float = 3.0) -> float:
+    encode(model, texts)
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        encode(model, texts)
+        count += len(texts)
+    return count / (time.perf_counter() - started)
+
+
+def compare(reference: dict, candidate: dict, threshold: float) -> dict:
+    """Summarize how far the candidate's vectors and match scores are from the reference's."""
+    same_text = (reference['segments'] * candidate['segments']).sum(axis=1)
+    ref_scores = reference['requirements'] @ reference['segments'].T
+    cand_scores = candidate['requirements'] @ candidate['segments'].T
+    drift = np.abs(ref_scores - cand_scores)
+    ref_best, cand_best = ref_scores.max(axis=1), cand_scores.max(axis=1)
+    return {
+        'vector_cosine_min': float(same_text.min()),
+        'vector_cosine_mean': float(same_text.mean()),
+        'score_abs_diff_max': float(drift.max()),
+        'score_abs_diff_mean': float(drift.mean()),
+        'score_correlation': float(np.corrcoef(ref_scores.ravel(), cand_scores.ravel())[0, 1]),
+        'best_match_agreement': float((ref_scores.argmax(axis=1) == cand_scores.argmax(axis=1)).mean()),
+        'threshold_agreement': float(((ref_best >= threshold) == (cand_best >= threshold)).mean()),
+        'match_score_diff': float(abs(np.clip(ref_best, 0, 1).mean() - np.clip(cand_best, 0, 1).mean()) * 100),
+    }
+
+
+def peak_rss_mb(backend: str) -> float:
+    """Load a backend and encode once in a fresh interpreter, then return its peak RSS."""
+    output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--rss-of', backend])
+    return json.loads(output)['rss_mb']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--reference', default='torch', help="backend whose scores are treated as correct")
+    parser.add_argument('--candidate', default='onnx-int8', help="backend to check")
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="largest allowed change in any requirement-segment cosine score")
+    parser.add_argument('--memory', action='store_true', help="also measure each backend's peak RSS")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    parser.add_argument('--rss-of', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    from config import Config
+
+    if args.rss_of:
+        model = load(Config.EMBEDDING_MODEL_NAME, args.rss_of, Config.EMBEDDER_OPTIONS)
+        encode(model, parity_texts()[0])
+        # ru_maxrss is in kilobytes on Linux
+        print(json.dumps({'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+        return
+
+    segments, requirements = parity_texts()
+    report = {'model': Config.EMBEDDING_MODEL_NAME, 'segments': len(segments), 'requirements': len(requirements)}
+    vectors = {}
+    for role, backend in (('reference', args.reference), ('candidate', args.candidate)):
+        model = load(Config.EMBEDDING_MODEL_NAME, backend, Config.EMBEDDER_OPTIONS)
+        vectors[role] = {'segments': encode(model, segments), 'requirements': encode(model, requirements)}
+        report[role] = {'backend': backend, 'sentences_per_second': round(throughput(model, segments), 1)}
+        if args.memory:
+            report[role]['peak_rss_mb'] = round(peak_rss_mb(backend), 1)
+
+    report['parity'] = compare(vectors['reference'], vectors['candidate'], Config.MATCH_SIMILARITY_THRESHOLD)
+    passed = report['parity']['score_abs_diff_max'] <= args.tolerance
+    report['passed'] = passed
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for role in ('reference', 'candidate'):
+            details = ', '.join(f'{key} {value}' for key, value in report[role].items() if key != 'backend')
+            print(f"{role:<10} {report[role]['backend']:<10} {details}")
+        for key, value in report['parity'].items():
+            print(f"  {key:<24} {value:.4f}")
+        print('PASS' if passed else f"FAIL: scores differ by more than {args.tolerance}")
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
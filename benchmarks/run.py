@@ -0,0 +1,264 @@
+"""
+Benchmarks for the ingestion and analysis hot paths.
+
+Times PDF extraction over synthetic resumes of varying size, layout and
+density, skill extraction, prompt compaction, MiniLM encoding at several
+batch sizes on the configured EMBEDDING_BACKEND, and whole requests through
+the Flask test client with the fake LLM backend. Results are written as
+JSON; with --baseline, medians are compared against an earlier run and the
+exit status is 1 if anything got slower than --threshold allows.
+
+    python benchmarks/run.py --output benchmarks/baseline.json
+    python benchmarks/run.py --baseline benchmarks/baseline.json --threshold 0.15
+"""
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# The LLM is stubbed and nothing shared is touched; must be set before config.py is imported
+BENCH_ENV = {
+    'LLM_BACKEND': 'fake',
+    'FAKE_LLM_LATENCY': 'fixed:0',
+    'FAKE_LLM_TOKENS_PER_SECOND': '1000000000',
+    'LLM_CACHE_BACKEND': 'none',
+    'TOKEN_BUDGET_SHARED': 'false',
+    'JOB_QUEUE_SHARED': 'false',
+    'EMBEDDER_WARMUP': 'false',
+    'TPM_LLAMA3_70B': str(10 ** 9),
+    'TPM_LLAMA33_70B': str(10 ** 9),
+    'TPM_GEMMA2_9B': str(10 ** 9),
+    'CLIENT_TOKENS_PER_HOUR': str(10 ** 9),
+}
+for _name, _value in BENCH_ENV.items():
+    os.environ.setdefault(_name, _value)
+
+from synthetic_pdfs import build_pdf
+
+
+def measure(fn, repeat: int, warmup: int = 1, setup=None) -> dict:
+    """Run fn warmup + repeat times and summarize the timed runs in milliseconds."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'runs': repeat,
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'min_ms': round(timings[0], 3),
+        'p95_ms': round(timings[max(0, math.ceil(0.95 * repeat) - 1)], 3),
+        'stdev_ms': round(statistics.stdev(timings), 3) if repeat > 1 else 0.0,
+    }
+
+
+def pdf_benchmarks(repeat: int):
+    from app.utils.pdf_utils import read_text_from_pdf
+
+    cases = [(pages, 'single_column', 'normal') for pages in (1, 3, 10, 30)]
+    cases += [(3, layout, density) for layout in ('single_column', 'two_column') for density in ('sparse', 'dense')]
+    for pages, layout, density in dict.fromkeys(cases):
+        pdf = build_pdf(pages, layout, density)
+        yield f'pdf.read_text[pages={pages},layout={layout},density={density}]', lambda: measure(
+            lambda: read_text_from_pdf(io.BytesIO(pdf)), max(3, repeat // max(1, pages // 3))
+        )
+
+    # The pdfplumber-only path that 'auto' falls back to for pages pdfium gets wrong
+    for layout in ('single_column', 'two_column'):
+        pdf = build_pdf(3, layout, 'dense')
+        yield f'pdf.read_text[pages=3,layout={layout},density=dense,engine=pdfplumber]', lambda: measure(
+            lambda: read_text_from_pdf(io.BytesIO(pdf), engine='pdfplumber'), repeat
+        )
+
+    pdf = build_pdf(30, 'single_column', 'normal')
+    yield 'pdf.read_text[pages=30,workers=4]', lambda: measure(
+        lambda: read_text_from_pdf(io.BytesIO(pdf), workers=4, min_parallel_pages=16), max(3, repeat // 10)
+    )
+
+
+def text_benchmarks(repeat: int):
+    from app.services.llm_backends import FakeBackend
+    from app.services.llm_client import ResilientLLMClient
+    from app.services.resume_analyzer import ResumeAnalyzer
+    from app.utils.pdf_utils import read_text_from_pdf
+    from app.utils.prompt_utils import compact_prompt_inputs
+
+    analyzer = ResumeAnalyzer(None, llm_client=ResilientLLMClient(FakeBackend()))
+    job_description = open_job_description()
+    for pages in (1, 3, 10):
+        text = read_text_from_pdf(io.BytesIO(build_pdf(pages, 'single_column', 'dense')))
+        yield f'text.extract_skills[pages={pages}]', lambda: measure(lambda: analyzer.extract_skills(text), repeat * 5)
+        yield f'text.find_known_skills[pages={pages}]', lambda: measure(lambda: analyzer.find_known_skills(text), repeat * 5)
+        # The memoized wrapper would only time cache hits
+        yield f'text.compact_prompt_inputs[pages={pages}]', lambda: measure(
+            lambda: compact_prompt_inputs.__wrapped__(text, job_description, 2000), repeat * 5
+        )
+
+
+def encode_benchmarks(repeat: int, model_name: str, options: dict):
+    from app.services.embedding_model import get_embedding_model
+    from app.utils.text_utils import split_into_segments
+    from app.utils.pdf_utils import read_text_from_pdf
+
+    try:
+        # The raw model: shared batching only helps concurrent callers, which these aren't
+        model = get_embedding_model(model_name, **{**options, 'batch_wait': 0})
+    except Exception as e:
+        print(f"skipping encode benchmarks: could not load {model_name}: {e}", file=sys.stderr)
+        return
+
+    segments = split_into_segments(read_text_from_pdf(io.BytesIO(build_pdf(30, 'single_column', 'dense'))))
+    for batch in (1, 16, 64, 256):
+        texts = (segments * (batch // max(1, len(segments)) + 1))[:batch]
+        yield f'encode[batch={batch}]', lambda: measure(
+            lambda: model.encode(texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True,
+                                 show_progress_bar=False),
+            max(3, repeat // max(1, batch // 16))
+        )
+
+
+def open_job_description() -> str:
+    return (
+        "Senior Backend Engineer\nRequirements:\n- 5+ years with Python and Flask\n"
+        "- PostgreSQL, Redis, Kafka\n- Docker and Kubernetes on AWS\nResponsibilities:\n"
+        "- Build and scale APIs\n- Mentor engineers\n"
+        "We are an equal opportunity employer and value diversity.\n"
+    )
+
+
+def request_benchmarks(repeat: int, with_embeddings: bool):
+    from app import create_app
+    from app import routes
+
+    app = create_app()
+    client = app.test_client()
+    job_description = open_job_description()
+    endpoints = ['/api/analyze', '/api/generate_custom_resume']
+    if with_embeddings:
+        endpoints.append('/api/score')
+
+    def clear_text_cache():
+        if routes.text_cache is not None:
+            routes.text_cache.clear()
+
+    for pages in (1, 3):
+        pdf = build_pdf(pages, 'single_column', 'normal')
+
+        def post(endpoint):
+            response = client.post(endpoint, data={
+                'resume': (io.BytesIO(pdf), 'resume.pdf'),
+                'jobDescription': job_description,
+                'fresh': 'true'
+            })
+            if response.status_code != 200:
+                raise RuntimeError(f"{endpoint} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+        for endpoint in endpoints:
+            # Cold: the resume text cache is emptied first, so every run extracts the PDF
+            yield f'request{endpoint}[pages={pages},text_cache=cold]', lambda: measure(
+                lambda: post(endpoint), repeat, setup=clear_text_cache
+            )
+        yield f'request/api/analyze[pages={pages},text_cache=warm]', lambda: measure(lambda: post('/api/analyze'), repeat)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Print a comparison of median times and return the names that regressed past threshold."""
+    regressions = []
+    print(f"\n{'benchmark':<70} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<70} {'-':>10} {result['median_ms']:>10.3f} {'new':>8}")
+            continue
+        change = result['median_ms'] / previous['median_ms'] - 1 if previous['median_ms'] else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<70} {previous['median_ms']:>10.3f} {result['median_ms']:>10.3f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help="write results JSON here (e.g. to save a new baseline)")
+    parser.add_argument('--baseline', help="results JSON from an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="fractional slowdown of the median that counts as a regression")
+    parser.add_argument('--repeat', type=int, default=20, help="timed runs for the cheaper benchmarks")
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--skip', default='', help="comma-separated groups to skip: pdf,text,encode,request")
+    args = parser.parse_args()
+
+    from config import Config
+
+    skip = set(filter(None, args.skip.split(',')))
+    groups = {
+        'pdf': lambda: pdf_benchmarks(args.repeat),
+        'text': lambda: text_benchmarks(args.repeat),
+        'encode': lambda: encode_benchmarks(args.repeat, Config.EMBEDDING_MODEL_NAME, Config.EMBEDDER_OPTIONS),
+        'request': lambda: request_benchmarks(max(5, args.repeat // 2), with_embeddings='encode' not in skip),
+    }
+
+    results = {}
+    for group, run in groups.items():
+        if group in skip:
+            continue
+        # Groups yield (name, thunk) so filtered-out benchmarks are never run
+        for name, run_benchmark in run():
+            if args.filter and args.filter not in name:
+                continue
+            result = results[name] = run_benchmark()
+            print(f"{name:<70} median {result['median_ms']:>10.3f} ms  p95 {result['p95_ms']:>10.3f} ms")
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'embedding_backend': Config.EMBEDDING_BACKEND,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        },
+        'benchmarks': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['benchmarks']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
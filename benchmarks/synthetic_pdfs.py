@@ -0,0 +1,171 @@
+"""
+Synthetic resume PDFs for benchmarks.
+
+The PDFs are written directly (standard Helvetica, no embedded fonts), so
+generating them needs no extra dependencies. Pages, layout and text density
+vary independently, and a seed makes every document reproducible.
+
+    python benchmarks/synthetic_pdfs.py --pages 3 --layout two_column --density dense -o resume.pdf
+"""
+import argparse
+import random
+from typing import List, Tuple
+
+LAYOUTS = ('single_column', 'two_column')
+DENSITIES = {'sparse': (11, 20, 6), 'normal': (10, 14, 12), 'dense': (8, 10, 24)}  # font size, leading, bullets per role
+
+PAGE_WIDTH, PAGE_HEIGHT, MARGIN = 612, 792, 50
+
+_TITLES = ('Software Engineer', 'Senior Backend Engineer', 'Data Scientist', 'Platform Engineer', 'Tech Lead')
+_COMPANIES = ('Acme Corp', 'Globex', 'Initech', 'Umbrella Labs', 'Hooli', 'Stark Industries', 'Wayne Tech')
+_SKILLS = (
+    'Python', 'Flask', 'Django', 'PostgreSQL', 'Redis', 'Kafka', 'Docker', 'Kubernetes', 'AWS', 'Terraform',
+    'React', 'TypeScript', 'Spark', 'Airflow', 'pandas', 'scikit-learn', 'PyTorch', 'gRPC', 'GraphQL', 'Linux'
+)
+_VERBS = ('Built', 'Led', 'Designed', 'Optimized', 'Migrated', 'Automated', 'Launched', 'Scaled', 'Reduced', 'Improved')
+_OBJECTS = (
+    'the payments API', 'a real-time analytics pipeline', 'the CI/CD workflow', 'search ranking',
+    'an internal developer platform', 'the recommendation service', 'data ingestion jobs', 'on-call tooling'
+)
+_RESULTS = (
+    'cutting p95 latency by {n}%', 'serving {n}k requests per second', 'saving ${n}k per year',
+    'raising test coverage to {n}%', 'for a team of {n} engineers', 'reducing incidents by {n}%'
+)
+
+
+def resume_lines(rng: random.Random, roles: int, bullets_per_role: int) -> List[Tuple[str, str]]:
+    """Return (style, text) lines of a made-up resume; style is 'name', 'heading' or 'body'."""
+    lines = [
+        ('name', f"{rng.choice(('Alex', 'Sam', 'Jordan', 'Taylor'))} {rng.choice(('Kim', 'Patel', 'Garcia', 'Okafor'))}"),
+        ('body', 'alex@example.com | +1 555 0100 | linkedin.com/in/example'),
+        ('heading', 'PROFESSIONAL SUMMARY'),
+        ('body', f"Engineer with {rng.randint(3, 15)} years of experience building reliable, high-traffic systems "
+                 f"with {', '.join(rng.sample(_SKILLS, 3))}."),
+        ('heading', 'SKILLS'),
+        ('body', ', '.join(rng.sample(_SKILLS, 10))),
+        ('heading', 'EXPERIENCE'),
+    ]
+    for _ in range(roles):
+        start = rng.randint(2008, 2020)
+        lines.append(('body', f"{rng.choice(_COMPANIES)} | {rng.choice(_TITLES)} ({start} - {start + rng.randint(1, 4)})"))
+        for _ in range(bullets_per_role):
+            result = rng.choice(_RESULTS).format(n=rng.randint(5, 90))
+            lines.append(('body', f"- {rng.choice(_VERBS)} {rng.choice(_OBJECTS)} using {rng.choice(_SKILLS)}, {result}."))
+    lines += [
+        ('heading', 'EDUCATION'),
+        ('body', f"BSc Computer Science, State University ({rng.randint(2000, 2015)})"),
+    ]
+    return lines
+
+
+def _wrap(text: str, max_chars: int) -> List[str]:
+    words, lines, current = text.split(), [], ''
+    for word in words:
+        if current and len(current) + 1 + len(word) > max_chars:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _layout_pages(lines: List[Tuple[str, str]], pages: int, layout: str, density: str) -> List[bytes]:
+    font_size, leading, _ = DENSITIES[density]
+    columns = 2 if layout == 'two_column' else 1
+    column_width = (PAGE_WIDTH - 2 * MARGIN - (columns - 1) * 20) / columns
+    # Helvetica averages about half an em per character
+    max_chars = int(column_width / (font_size * 0.5))
+    rows_per_column = int((PAGE_HEIGHT - 2 * MARGIN) / leading)
+
+    rendered = []
+    for style, text in lines:
+        size = {'name': font_size + 6, 'heading': font_size + 2}.get(style, font_size)
+        font = 'F2' if style != 'body' else 'F1'
+        for piece in _wrap(text, max_chars):
+            rendered.append((font, size, piece))
+
+    streams = []
+    position = 0
+    for _ in range(pages):
+        ops = []
+        for column in range(columns):
+            x = MARGIN + column * (column_width + 20)
+            for row in range(rows_per_column):
+                font, size, text = rendered[position % len(rendered)]
+                position += 1
+                y = PAGE_HEIGHT - MARGIN - row * leading
+                ops.append(f"BT /{font} {size} Tf {x:.1f} {y:.1f} Td ({_escape(text)}) Tj ET")
+        ops.append(f"BT /F1 8 Tf {PAGE_WIDTH / 2 - 20:.1f} 25 Td (Page {len(streams) + 1} of {pages}) Tj ET")
+        streams.append('\n'.join(ops).encode('latin-1', 'replace'))
+    return streams
+
+
+def build_pdf(pages: int = 2, layout: str = 'single_column', density: str = 'normal', seed: int = 0) -> bytes:
+    """
+    Build a synthetic resume PDF.
+
+    Args:
+        pages: Number of pages; longer documents repeat the resume content
+        layout: 'single_column' or 'two_column'
+        density: 'sparse', 'normal' or 'dense' text
+        seed: Seed for the made-up content
+
+    Returns:
+        bytes: the PDF file
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout}")
+    rng = random.Random(seed)
+    _, _, bullets_per_role = DENSITIES[density]
+    streams = _layout_pages(resume_lines(rng, roles=5, bullets_per_role=bullets_per_role), pages, layout, density)
+
+    # Objects: 1 catalog, 2 page tree, 3-4 fonts, then a page and its content stream per page
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for stream in streams:
+        page_id, content_id = len(objects) + 1, len(objects) + 2
+        page_ids.append(page_id)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=2)
+    parser.add_argument('--layout', choices=LAYOUTS, default='single_column')
+    parser.add_argument('--density', choices=sorted(DENSITIES), default='normal')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args()
+    with open(args.output, 'wb') as f:
+        f.write(build_pdf(args.pages, args.layout, args.density, args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,177 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Runtime state (shared caches, the vector index, converted models) lives outside the source tree
+DATA_DIR = os.getenv(
+    'DATA_DIR',
+    os.path.join(os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'resume-intelli')
+)
+
 class Config:
     GROQ_API_KEY = os.getenv('GROQ_API_KEY')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp_uploads')
+    UPLOAD_FOLDER = os.path.join(BASE_DIR, 'temp_uploads')
+
+    # Shared sqlite file for caches that every gunicorn worker can read
+    CACHE_PATH = os.getenv('CACHE_PATH', os.path.join(DATA_DIR, 'cache.sqlite3'))
+
+    # Extracted resume text, keyed by a hash of the uploaded bytes
+    TEXT_CACHE_BACKEND = os.getenv('TEXT_CACHE_BACKEND', 'memory')  # 'memory' or 'sqlite'
+    TEXT_CACHE_MAX_ENTRIES = int(os.getenv('TEXT_CACHE_MAX_ENTRIES', 512))
+    TEXT_CACHE_TTL = int(os.getenv('TEXT_CACHE_TTL', 60 * 60))  # seconds
+
+    # Uploads up to this size are parsed straight from memory; larger ones spool to UPLOAD_FOLDER
+    UPLOAD_SPOOL_THRESHOLD = int(os.getenv('UPLOAD_SPOOL_THRESHOLD', 4 * 1024 * 1024))
+
+    # PDF extraction limits; pages past PDF_MAX_PAGES are ignored
+    PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', 30))
+    # Processes used to split long documents; 0 (the default) keeps extraction in the request worker.
+    # Only unbudgeted extraction (RESUME_TOKEN_BUDGET=0) is split: a budgeted read stops at the page
+    # that fills the budget, which is usually well before PDF_PARALLEL_MIN_PAGES
+    PDF_PARALLEL_WORKERS = int(os.getenv('PDF_PARALLEL_WORKERS', 0))
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 16))
+    # 'auto' reads the text layer with pdfium and re-reads only pages that look garbled with pdfplumber;
+    # 'pdfium' or 'pdfplumber' forces one engine. DOCX and plain text uploads never touch either.
+    PDF_ENGINE = os.getenv('PDF_ENGINE', 'auto')
+
+    # Prompt tokens of resume text to extract before the PDF reader stops reading pages; 0 reads everything
+    RESUME_TOKEN_BUDGET = int(os.getenv('RESUME_TOKEN_BUDGET', 4000))
+
+    EMBEDDING_MODEL_NAME = os.getenv('EMBEDDING_MODEL_NAME', 'paraphrase-MiniLM-L6-v2')
+    # 'torch' runs the float32 SentenceTransformer; 'onnx-int8' runs the int8-quantized export on
+    # onnxruntime without torch (less memory per worker, more sentences/sec on CPU; needs the packages
+    # in requirements-optional.txt). Setting EMBEDDING_BATCH_WAIT_MS (e.g. 2) makes concurrent encode
+    # calls wait that long to share one model batch; the default 0 leaves batching off.
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')
+    EMBEDDER_OPTIONS = {
+        'backend': EMBEDDING_BACKEND,
+        'onnx_file': os.getenv('EMBEDDING_ONNX_FILE') or None,  # file in the model repo, or a local path
+        'threads': int(os.getenv('EMBEDDING_THREADS', 0)),  # onnxruntime threads per worker, 0 for all cores
+        # Int8 models quantized here when the model repo doesn't publish one
+        'onnx_cache_dir': os.getenv('EMBEDDING_ONNX_CACHE_DIR', os.path.join(DATA_DIR, 'onnx')),
+        'batch_wait': float(os.getenv('EMBEDDING_BATCH_WAIT_MS', 0)) / 1000,
+        'max_batch': int(os.getenv('EMBEDDING_MAX_BATCH', 256))
+    }
+    # Load the embedding model in create_app; with gunicorn's preload_app (see gunicorn.conf.py)
+    # that happens once in the master and forked workers share the weights
+    EMBEDDER_PRELOAD = os.getenv('EMBEDDER_PRELOAD', 'false').lower() == 'true'
+    # Otherwise load it on a background thread in each worker; /api/ready reports when it's done
+    EMBEDDER_WARMUP = os.getenv('EMBEDDER_WARMUP', 'true').lower() == 'true'
+    # Components loaded in order on a background thread at startup (pdf_engine, llm_client, embedder);
+    # /api/ready waits for them. Anything left out loads on first use instead.
+    WARMUP_COMPONENTS = os.getenv('WARMUP_COMPONENTS', 'pdf_engine,llm_client,embedder').split(',')
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
+    # Cosine similarity above which a job requirement counts as covered by the resume
+    MATCH_SIMILARITY_THRESHOLD = float(os.getenv('MATCH_SIMILARITY_THRESHOLD', 0.5))
+
+    # Sentence embeddings, keyed by model name and normalized text
+    EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', 20000))
+    # Also keep embeddings in the shared sqlite file at CACHE_PATH so workers reuse each other's work
+    EMBEDDING_CACHE_PERSISTENT = os.getenv('EMBEDDING_CACHE_PERSISTENT', 'false').lower() == 'true'
+    EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_PERSISTENT_MAX_ENTRIES', 200000))
+
+    # Bulk ranking (/api/rank)
+    BULK_MAX_RESUMES = int(os.getenv('BULK_MAX_RESUMES', 500))
+    BULK_MAX_CONTENT_LENGTH = int(os.getenv('BULK_MAX_CONTENT_LENGTH', 256 * 1024 * 1024))
+    # Total inflated size of the files in uploaded zip archives, checked before anything is inflated
+    BULK_MAX_UNCOMPRESSED_BYTES = int(os.getenv('BULK_MAX_UNCOMPRESSED_BYTES', 256 * 1024 * 1024))
+    BULK_EXTRACT_WORKERS = int(os.getenv('BULK_EXTRACT_WORKERS', os.cpu_count() or 1))
+    # Upper bound on the top_k candidates a caller can send to the LLM, and how many run at once
+    BULK_MAX_LLM_ANALYSES = int(os.getenv('BULK_MAX_LLM_ANALYSES', 10))
+    BULK_LLM_CONCURRENCY = int(os.getenv('BULK_LLM_CONCURRENCY', 4))
+
+    # Vector indexes for resume <-> job search, one directory per index
+    VECTOR_INDEX_DIR = os.getenv('VECTOR_INDEX_DIR', os.path.join(DATA_DIR, 'vector_index'))
+    # Corpus size at which brute-force search switches to an IVF index
+    VECTOR_INDEX_IVF_THRESHOLD = int(os.getenv('VECTOR_INDEX_IVF_THRESHOLD', 100000))
+    # Lists probed per query start here and double until a recall check against brute force passes
+    VECTOR_INDEX_N_PROBE = int(os.getenv('VECTOR_INDEX_N_PROBE', 16))
+    VECTOR_INDEX_TARGET_RECALL = float(os.getenv('VECTOR_INDEX_TARGET_RECALL', 0.95))
+    VECTOR_INDEX_MAX_RESULTS = int(os.getenv('VECTOR_INDEX_MAX_RESULTS', 100))
+
+    # Threads running LLM generations concurrently (/api/application_pack runs three per request)
+    GENERATION_POOL_SIZE = int(os.getenv('GENERATION_POOL_SIZE', 12))
+
+    # LLM responses keyed by model, prompt messages and temperature: 'memory', 'sqlite' or 'none'
+    LLM_CACHE_BACKEND = os.getenv('LLM_CACHE_BACKEND', 'memory')
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 2000))
+    # Seconds each kind of generation stays cached; callers can bypass with fresh=true
+    LLM_CACHE_TTLS = {
+        'analyze': int(os.getenv('LLM_CACHE_TTL_ANALYZE', 24 * 60 * 60)),
+        'custom_resume': int(os.getenv('LLM_CACHE_TTL_CUSTOM_RESUME', 60 * 60)),
+        'cover_letter': int(os.getenv('LLM_CACHE_TTL_COVER_LETTER', 60 * 60))
+    }
+
+    # Token-bucket limits per Groq model (tokens per minute), shared by workers through CACHE_PATH
+    GROQ_MODEL_TOKENS_PER_MINUTE = {
+        'llama3-70b-8192': int(os.getenv('TPM_LLAMA3_70B', 6000)),
+        'llama-3.3-70b-versatile': int(os.getenv('TPM_LLAMA33_70B', 6000)),
+        'gemma2-9b-it': int(os.getenv('TPM_GEMMA2_9B', 15000))
+    }
+    # Per-client quota, keyed on the client address or a signed X-Client-Id; 0 disables it
+    CLIENT_TOKENS_PER_HOUR = int(os.getenv('CLIENT_TOKENS_PER_HOUR', 60000))
+    # X-Client-Id is only trusted when X-Client-Signature is its HMAC-SHA256 under this secret
+    CLIENT_ID_SECRET = os.getenv('CLIENT_ID_SECRET', '')
+    # Reverse proxies in front of the app whose X-Forwarded-For/-Proto headers are trusted; 0 trusts none
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', 0))
+    TOKEN_BUDGET_SHARED = os.getenv('TOKEN_BUDGET_SHARED', 'true').lower() == 'true'
+    # Seconds a request may queue for tokens before it is shed with a 429
+    TOKEN_BUDGET_MAX_WAIT = float(os.getenv('TOKEN_BUDGET_MAX_WAIT', 5))
+    # Completion tokens reserved up front, corrected once Groq reports actual usage
+    COMPLETION_TOKEN_ESTIMATE = int(os.getenv('COMPLETION_TOKEN_ESTIMATE', 1024))
+
+    # Context window of each Groq model; resume and job description are cut by section to fit
+    GROQ_MODEL_CONTEXT_WINDOWS = {
+        'llama3-70b-8192': 8192,
+        'llama-3.3-70b-versatile': 131072,
+        'gemma2-9b-it': 8192
+    }
+    # 'groq' calls the Groq API, or the Groq-compatible server at LLM_BASE_URL (e.g.
+    # loadtest/fake_groq_server.py); 'fake' answers in-process with FAKE_LLM_OPTIONS
+    LLM_BACKEND = os.getenv('LLM_BACKEND', 'groq')
+    LLM_BASE_URL = os.getenv('LLM_BASE_URL') or None
+    FAKE_LLM_OPTIONS = {
+        'latency': os.getenv('FAKE_LLM_LATENCY', 'lognormal:0.6,0.4'),  # time to first token
+        'tokens_per_second': float(os.getenv('FAKE_LLM_TOKENS_PER_SECOND', 250)),
+        'completion_tokens': int(os.getenv('FAKE_LLM_COMPLETION_TOKENS', 300)),
+        'error_rate': float(os.getenv('FAKE_LLM_ERROR_RATE', 0)),
+        'rate_limit_rate': float(os.getenv('FAKE_LLM_RATE_LIMIT_RATE', 0))
+    }
+
+    # Groq calls: per-attempt timeout and overall deadline in seconds, jittered retries on 429/5xx,
+    # then failover to the next model in GROQ_MODEL_FALLBACKS. A model whose calls keep failing is
+    # skipped for LLM_BREAKER_RESET seconds. LLM_HEDGE_AFTER > 0 re-sends calls slower than that.
+    LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 30))
+    LLM_DEADLINE = float(os.getenv('LLM_DEADLINE', 60))
+    LLM_MAX_ATTEMPTS = int(os.getenv('LLM_MAX_ATTEMPTS', 3))
+    LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', 0.5))
+    LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', 8))
+    LLM_HEDGE_AFTER = float(os.getenv('LLM_HEDGE_AFTER', 0))
+    LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', 20))
+    LLM_BREAKER_THRESHOLD = int(os.getenv('LLM_BREAKER_THRESHOLD', 5))
+    LLM_BREAKER_RESET = float(os.getenv('LLM_BREAKER_RESET', 30))
+    LLM_MODEL_FALLBACK = os.getenv('LLM_MODEL_FALLBACK', 'true').lower() == 'true'
+    GROQ_MODEL_FALLBACKS = {
+        'llama3-70b-8192': ['llama-3.3-70b-versatile', 'gemma2-9b-it'],
+        'llama-3.3-70b-versatile': ['llama3-70b-8192', 'gemma2-9b-it'],
+        'gemma2-9b-it': ['llama-3.3-70b-versatile', 'llama3-70b-8192']
+    }
+
+    # Per-stage durations (upload, extract, embed, prompt, llm, serialize) in a Server-Timing response header
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'true').lower() == 'true'
+
+    # Normalize whitespace, drop repeated headers/footers and job-description boilerplate before prompting
+    PROMPT_COMPACTION = os.getenv('PROMPT_COMPACTION', 'true').lower() == 'true'
+    # Send each prompt only the resume sections it needs (see PROMPT_SECTIONS in resume_analyzer)
+    PROMPT_SECTION_SELECTION = os.getenv('PROMPT_SECTION_SELECTION', 'true').lower() == 'true'
+
+    # Background generation jobs (/api/jobs), queued in CACHE_PATH so any worker can answer polls
+    JOB_QUEUE_SHARED = os.getenv('JOB_QUEUE_SHARED', 'true').lower() == 'true'
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))  # per process
+    JOB_QUEUE_MAX_DEPTH = int(os.getenv('JOB_QUEUE_MAX_DEPTH', 100))
+    JOB_TTL = int(os.getenv('JOB_TTL', 60 * 60))  # seconds a job and its result are kept
+    JOB_MAX_POLL_WAIT = float(os.getenv('JOB_MAX_POLL_WAIT', 30))
+    JOB_STREAM_TIMEOUT = float(os.getenv('JOB_STREAM_TIMEOUT', 300))
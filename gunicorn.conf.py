@@ -0,0 +1,29 @@
+import gc
+import os
+
+# SERVING_MODE=async runs gevent workers. Each worker then multiplexes
+# hundreds of requests that are waiting on Groq over cooperative sockets,
+# instead of one blocked process per in-flight LLM call.
+# Needs gevent from requirements-optional.txt.
+serving_mode = os.getenv('SERVING_MODE', 'sync')
+
+if serving_mode == 'async':
+    # Patch before the app (and httpx, sqlite3, threading) is imported,
+    # which with preload_app happens in the master right after this file loads
+    from gevent import monkey
+    monkey.patch_all()
+
+    worker_class = 'gevent'
+    worker_connections = int(os.getenv('WORKER_CONNECTIONS', 500))
+    # Long LLM generations are normal; don't let the arbiter kill busy workers
+    timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+
+# With EMBEDDER_PRELOAD=true the app, and with it the embedding model, is
+# created once in the master process. Forked workers then share the model
+# weights copy-on-write instead of each loading their own copy.
+preload_app = os.getenv('EMBEDDER_PRELOAD', 'false').lower() == 'true'
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the garbage collector's reach so
+    # collections in the workers don't touch (and copy) the shared pages
+    gc.freeze()
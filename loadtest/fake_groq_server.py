@@ -0,0 +1,118 @@
+"""
+A tiny Groq/OpenAI-compatible chat completions server for load tests.
+
+It answers POST /openai/v1/chat/completions with FakeBackend's latency,
+token rate and injected errors, streaming included. Run it, then point the
+API at it:
+
+    python loadtest/fake_groq_server.py --port 8001 --latency lognormal:0.8,0.5 --error-rate 0.02
+    LLM_BASE_URL=http://127.0.0.1:8001 GROQ_API_KEY=fake gunicorn run:app
+
+Unlike LLM_BACKEND=fake, this keeps real HTTP, connection pooling and
+timeouts in the measured path.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+from flask import Flask, Response, jsonify, request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.llm_backends import FakeBackend
+
+
+def create_server(backend: FakeBackend) -> Flask:
+    server = Flask(__name__)
+
+    @server.route('/openai/v1/chat/completions', methods=['POST'])
+    def chat_completions():
+        body = request.get_json()
+        model = body['model']
+        call = backend.sample(body['messages'], model)
+
+        if call.outcome != 'ok':
+            time.sleep(min(call.first_token_delay, 0.05))
+            if call.outcome == 'rate_limited':
+                response = jsonify({'error': {'message': 'Rate limit reached (injected)', 'type': 'tokens'}})
+                response.headers['Retry-After'] = '1'
+                return response, 429
+            return jsonify({'error': {'message': 'Service unavailable (injected)', 'type': 'internal_server_error'}}), 503
+
+        completion_id = f'chatcmpl-{uuid.uuid4().hex}'
+        created = int(time.time())
+        usage = {
+            'prompt_tokens': call.prompt_tokens,
+            'completion_tokens': len(call.words),
+            'total_tokens': call.prompt_tokens + len(call.words)
+        }
+        time.sleep(call.first_token_delay)
+
+        if not body.get('stream'):
+            time.sleep(len(call.words) / backend.tokens_per_second)
+            return jsonify({
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': created,
+                'model': model,
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': ' '.join(call.words)},
+                    'finish_reason': 'stop'
+                }],
+                'usage': usage
+            })
+
+        def chunk(delta: dict, finish_reason: str = None, **extra) -> str:
+            payload = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': created,
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+                **extra
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        def events():
+            for position, word in enumerate(call.words):
+                if position:
+                    time.sleep(1 / backend.tokens_per_second)
+                yield chunk({'content': word if position == 0 else ' ' + word})
+            yield chunk({}, 'stop', x_groq={'id': completion_id, 'usage': usage})
+            yield "data: [DONE]\n\n"
+
+        return Response(events(), mimetype='text/event-stream')
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', default='lognormal:0.6,0.4',
+                        help="time to first token: fixed:S, uniform:LO,HI or lognormal:MEDIAN,SIGMA")
+    parser.add_argument('--tokens-per-second', type=float, default=250)
+    parser.add_argument('--completion-tokens', type=int, default=300)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of calls answered with a 503")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="fraction of calls answered with a 429")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    backend = FakeBackend(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    create_server(backend).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Load generator for the resume analyzer API.
+
+Drives each endpoint end to end with a fixed number of concurrent clients
+and reports latency percentiles and throughput per endpoint. By default the
+Flask app runs in-process with LLM_BACKEND=fake, so no Groq quota is used;
+pass --url to load a running server instead (point that server at
+loadtest/fake_groq_server.py with LLM_BASE_URL for the same effect).
+
+    python loadtest/load_gen.py --resume resume.pdf --endpoints analyze,score --concurrency 16 --requests 200
+    python loadtest/load_gen.py --url http://127.0.0.1:5000 --resume resume.pdf --duration 60 --json results.json
+"""
+import argparse
+import io
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = {
+    'analyze': '/api/analyze',
+    'analyze_stream': '/api/analyze/stream',
+    'generate_custom_resume': '/api/generate_custom_resume',
+    'generate_custom_resume_stream': '/api/generate_custom_resume/stream',
+    'generate_cover_letter': '/api/generate_cover_letter',
+    'generate_cover_letter_stream': '/api/generate_cover_letter/stream',
+    'application_pack': '/api/application_pack',
+    'score': '/api/score',
+}
+
+DEFAULT_JOB_DESCRIPTION = (
+    "Senior Backend Engineer\n"
+    "Requirements:\n"
+    "- 5+ years building web services in Python (Flask or Django)\n"
+    "- Experience with PostgreSQL, Redis and message queues\n"
+    "- Familiar with Docker, Kubernetes and CI/CD pipelines\n"
+    "Responsibilities:\n"
+    "- Design, build and operate high-traffic APIs\n"
+    "- Mentor engineers and review code\n"
+)
+
+
+def percentile(sorted_values, p: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+class HttpTarget:
+    """Sends requests to a running server over HTTP."""
+    def __init__(self, base_url: str):
+        import httpx
+        self.base_url = base_url.rstrip('/')
+        self._local = threading.local()
+        self._httpx = httpx
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._httpx.Client(timeout=300)
+        return client
+
+    def send(self, path: str, form: dict, resume: bytes, filename: str):
+        start = time.perf_counter()
+        first_byte = None
+        files = {'resume': (filename, resume, 'application/pdf')}
+        with self._client().stream('POST', self.base_url + path, data=form, files=files) as response:
+            for _ in response.iter_bytes():
+                if first_byte is None:
+                    first_byte = time.perf_counter()
+            status = response.status_code
+        end = time.perf_counter()
+        return status, (first_byte or end) - start, end - start
+
+
+class InProcessTarget:
+    """Sends requests to an in-process app through Flask test clients, one per thread."""
+    def __init__(self):
+        from app import create_app
+        self.app = create_app()
+        self._local = threading.local()
+
+    def send(self, path: str, form: dict, resume: bytes, filename: str):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        start = time.perf_counter()
+        first_byte = None
+        response = client.post(path, data={**form, 'resume': (io.BytesIO(resume), filename)}, buffered=False)
+        try:
+            for _ in response.response:
+                if first_byte is None:
+                    first_byte = time.perf_counter()
+        finally:
+            response.close()
+        end = time.perf_counter()
+        return response.status_code, (first_byte or end) - start, end - start
+
+
+def run_endpoint(target, path: str, form: dict, resume: bytes, filename: str, concurrency: int,
+                 requests: int = None, duration: float = None) -> dict:
+    """Run one endpoint with concurrency clients until requests are sent or duration passes."""
+    latencies = []
+    first_bytes = []
+    statuses = Counter()
+    lock = threading.Lock()
+    issued = [0]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_request() -> bool:
+        with lock:
+            if requests is not None and issued[0] >= requests:
+                return False
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            issued[0] += 1
+            return True
+
+    def worker():
+        while next_request():
+            try:
+                status, first_byte, latency = target.send(path, form, resume, filename)
+            except Exception as e:
+                with lock:
+                    statuses[type(e).__name__] += 1
+                continue
+            with lock:
+                statuses[status] += 1
+                if status < 400:
+                    latencies.append(latency)
+                    first_bytes.append(first_byte)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    first_bytes.sort()
+    return {
+        'endpoint': path,
+        'requests': sum(statuses.values()),
+        'ok': len(latencies),
+        'errors': sum(count for status, count in statuses.items() if not (isinstance(status, int) and status < 400)),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'latency_ms': {
+            name: round(percentile(latencies, p) * 1000, 1)
+            for name, p in (('p50', 50), ('p95', 95), ('p99', 99), ('max', 100))
+        },
+        'ttfb_ms': {
+            name: round(percentile(first_bytes, p) * 1000, 1)
+            for name, p in (('p50', 50), ('p95', 95), ('p99', 99))
+        }
+    }
+
+
+def print_report(results):
+    header = f"{'endpoint':<40} {'reqs':>6} {'errs':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'ttfb p50':>9}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        latency = result['latency_ms']
+        print(
+            f"{result['endpoint']:<40} {result['requests']:>6} {result['errors']:>5} {result['throughput_rps']:>8.2f} "
+            f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f} {result['ttfb_ms']['p50']:>9.1f}"
+        )
+    print("(latencies in ms, successful requests only)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--url', help="base URL of a running server; omit to run the app in-process")
+    parser.add_argument('--resume', required=True, help="resume PDF to upload")
+    parser.add_argument('--job-description', help="file with the job description text")
+    parser.add_argument('--endpoints', default='analyze,generate_custom_resume,generate_cover_letter',
+                        help=f"comma-separated names from: {', '.join(ENDPOINTS)}")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, help="requests per endpoint (default 100 unless --duration)")
+    parser.add_argument('--duration', type=float, help="seconds per endpoint")
+    parser.add_argument('--warmup', type=int, default=2, help="unmeasured requests per endpoint")
+    parser.add_argument('--cached', action='store_true', help="allow LLM response cache hits (default sends fresh=true)")
+    parser.add_argument('--keep-limits', action='store_true',
+                        help="in-process only: keep the configured token rate limits instead of lifting them")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.endpoints.split(',') if name not in ENDPOINTS]
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+    requests = args.requests if args.requests or args.duration else 100
+
+    with open(args.resume, 'rb') as f:
+        resume = f.read()
+    job_description = DEFAULT_JOB_DESCRIPTION
+    if args.job_description:
+        with open(args.job_description) as f:
+            job_description = f.read()
+    form = {'jobDescription': job_description}
+    if not args.cached:
+        form['fresh'] = 'true'
+
+    if args.url:
+        target = HttpTarget(args.url)
+    else:
+        # Must be set before config.py is imported by create_app
+        os.environ.setdefault('LLM_BACKEND', 'fake')
+        if not args.keep_limits:
+            # The fake has no quota; otherwise the token buckets, not the stack, set the pace
+            for name in ('TPM_LLAMA3_70B', 'TPM_LLAMA33_70B', 'TPM_GEMMA2_9B', 'CLIENT_TOKENS_PER_HOUR'):
+                os.environ.setdefault(name, str(10 ** 9))
+            os.environ.setdefault('TOKEN_BUDGET_SHARED', 'false')
+        target = InProcessTarget()
+
+    filename = os.path.basename(args.resume)
+    results = []
+    for name in args.endpoints.split(','):
+        path = ENDPOINTS[name]
+        for _ in range(args.warmup):
+            target.send(path, form, resume, filename)
+        results.append(run_endpoint(
+            target, path, form, resume, filename, args.concurrency, requests=requests, duration=args.duration
+        ))
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'concurrency': args.concurrency, 'target': args.url or 'in-process', 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+import io
+import time
+from types import SimpleNamespace
+
+from flask import Flask
+
+from app import routes
+from app.utils.metrics import stage
+from app.utils.pdf_utils import ExtractionResult
+from config import Config
+
+
+class StubAnalyzer:
+    def prepare_inputs(self, kind, resume_text, job_description):
+        return SimpleNamespace(tokens_saved=0)
+
+    def _generate(self, name):
+        with stage(f'llm_{name}'):
+            time.sleep(0.01)
+        return name
+
+    def analyze_match_with_groq(self, resume_text, job_description, **kwargs):
+        return self._generate('feedback')
+
+    def generate_custom_resume_logic(self, resume_text, job_description, **kwargs):
+        return self._generate('custom_resume')
+
+    def generate_cover_letter(self, resume_text, job_description, **kwargs):
+        return self._generate('cover_letter')
+
+
+def test_pack_generation_stages_reach_server_timing(monkeypatch):
+    for init in ('init_analyzer', 'init_text_cache', 'init_job_queue'):
+        monkeypatch.setattr(routes, init, lambda: None)
+    monkeypatch.setattr(routes, 'analyzer', StubAnalyzer())
+    monkeypatch.setattr(routes, 'extract_resume_text', lambda resume_file: ExtractionResult('Resume text', False, 1))
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SERVER_TIMING'] = True
+    app.register_blueprint(routes.api)
+
+    response = app.test_client().post('/api/application_pack', data={
+        'resume': (io.BytesIO(b'Jane Doe\nSkills: python'), 'resume.txt'),
+        'jobDescription': 'Python developer'
+    })
+
+    assert response.status_code == 200
+    assert response.get_json()['cover_letter'] == 'cover_letter'
+    timing = response.headers['Server-Timing']
+    for section in ('feedback', 'custom_resume', 'cover_letter'):
+        assert f'llm_{section};dur=' in timing
@@ -0,0 +1,58 @@
+import io
+import zipfile
+
+from flask import Flask
+
+from app.routes import collect_bulk_resumes
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members:
+            zf.writestr(name, data)
+    return buffer.getvalue()
+
+
+def collect(data, max_files=3, max_file_size=10 ** 6, max_total_size=10 ** 7):
+    app = Flask(__name__)
+    with app.test_request_context('/api/rank', method='POST', data=data, content_type='multipart/form-data'):
+        resumes, error = collect_bulk_resumes(max_files, max_file_size, max_total_size)
+        if error:
+            response, status = error
+            return status, response.get_json()['error']
+        return 200, [name for name, _ in resumes]
+
+
+def resume(number):
+    return (f'resume{number}.txt', f'Resume {number}\nSkills: python'.encode())
+
+
+def test_zip_resumes_are_collected():
+    archive = make_zip([resume(1), resume(2), ('photo.bin', b'\x00\x01' * 100)])
+    assert collect({'archive': (io.BytesIO(archive), 'batch.zip')}) == (200, ['resume1.txt', 'resume2.txt'])
+
+
+def test_zip_past_the_resume_limit_is_refused():
+    archive = make_zip([resume(number) for number in range(4)])
+    assert collect({'archive': (io.BytesIO(archive), 'batch.zip')}) == (
+        400, 'At most 3 resumes can be ranked at once'
+    )
+    uploads = [(io.BytesIO(data), name) for name, data in (resume(number) for number in range(4))]
+    assert collect({'resumes': uploads}) == (400, 'At most 3 resumes can be ranked at once')
+
+
+def test_zip_past_the_total_size_limit_is_refused_before_inflating():
+    # Highly compressible: a few KB on the wire, 3MB once inflated
+    archive = make_zip([(f'big{number}.txt', b'a' * 10 ** 6) for number in range(3)])
+    assert len(archive) < 50000
+    assert collect({'archive': (io.BytesIO(archive), 'bomb.zip')}, max_total_size=2 * 10 ** 6) == (
+        400, 'bomb.zip is larger than the total size limit'
+    )
+
+
+def test_direct_upload_past_the_per_file_limit_is_refused():
+    name, data = resume(1)
+    uploads = [(io.BytesIO(data), name), (io.BytesIO(b'a' * 2000), 'big.txt')]
+    assert collect({'resumes': uploads}, max_file_size=1000) == (400, 'big.txt is larger than the per-file limit')
+    assert collect({'resumes': [(io.BytesIO(data), name)]}, max_file_size=1000) == (200, ['resume1.txt'])
@@ -0,0 +1,42 @@
+import hashlib
+import hmac
+
+from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app.routes import get_client_id
+
+SECRET = 'test-secret'
+
+
+def client_id_for(headers, secret=SECRET, remote_addr='10.0.0.1', hops=0):
+    app = Flask(__name__)
+    app.config.update(CLIENT_ID_SECRET=secret)
+    app.add_url_rule('/', 'client', get_client_id)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops)
+    response = app.test_client().get('/', headers=headers, environ_base={'REMOTE_ADDR': remote_addr})
+    return response.get_data(as_text=True)
+
+
+def sign(client_id, secret=SECRET):
+    return hmac.new(secret.encode(), client_id.encode(), hashlib.sha256).hexdigest()
+
+
+def test_signed_client_id_is_used():
+    assert client_id_for({'X-Client-Id': 'alice', 'X-Client-Signature': sign('alice')}) == 'alice'
+
+
+def test_unsigned_or_forged_client_id_falls_back_to_address():
+    assert client_id_for({'X-Client-Id': 'alice'}) == '10.0.0.1'
+    assert client_id_for({'X-Client-Id': 'alice', 'X-Client-Signature': sign('alice', 'other')}) == '10.0.0.1'
+
+
+def test_client_id_ignored_without_secret():
+    assert client_id_for({'X-Client-Id': 'alice', 'X-Client-Signature': sign('alice', '')}, secret='') == '10.0.0.1'
+
+
+def test_forwarded_address_only_trusted_behind_proxy_fix():
+    headers = {'X-Forwarded-For': '203.0.113.9, 198.51.100.7'}
+    assert client_id_for(headers) == '10.0.0.1'
+    assert client_id_for(headers, hops=1) == '198.51.100.7'
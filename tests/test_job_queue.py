@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+import time
+
+from app.services.job_queue import JobQueue, QueueFull
+
+
+def echo(payload):
+    return payload['text']
+
+
+def test_workers_start_on_first_submit():
+    queue = JobQueue({'echo': echo}, workers=2, poll_interval=0.01)
+    queue.depth()
+    assert queue._threads == []
+
+    job_id = queue.submit('echo', {'text': 'hello'})
+    assert len(queue._threads) == 2
+    assert queue.wait(job_id, timeout=5)['result'] == 'hello'
+
+
+def test_concurrent_submits_respect_max_depth(tmp_path):
+    queue = JobQueue({'echo': echo}, path=str(tmp_path / 'jobs.sqlite3'), workers=0, max_depth=10)
+    accepted, refused = [], []
+
+    def submit():
+        for _ in range(5):
+            try:
+                accepted.append(queue.submit('echo', {'text': 'x'}))
+            except QueueFull:
+                refused.append(1)
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(accepted) == 10
+    assert len(refused) == 30
+    assert queue.depth() == 10
+
+
+def test_idle_poll_does_not_wait_for_the_write_lock(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    queue = JobQueue({'echo': echo}, path=path, workers=0)
+    queue._claim()
+
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    try:
+        started = time.monotonic()
+        assert queue._claim() is None
+        assert time.monotonic() - started < 1
+    finally:
+        writer.execute('ROLLBACK')
+        writer.close()
+
+
+def test_stale_jobs_are_requeued_on_the_cleanup_interval(tmp_path):
+    queue = JobQueue({'echo': echo}, path=str(tmp_path / 'jobs.sqlite3'), workers=0, stale_after=0,
+                     cleanup_interval=3600)
+    job_id = queue.submit('echo', {'text': 'x'})
+    assert queue._claim()[0] == job_id
+    assert queue._claim() is None
+
+    queue._next_cleanup = 0.0
+    assert queue._claim()[0] == job_id
+
+
+def test_in_memory_queue_handles_concurrent_threads():
+    queue = JobQueue({'echo': echo}, workers=0, max_depth=10 ** 6)
+    errors = []
+
+    def run():
+        try:
+            for _ in range(100):
+                assert queue.get(queue.submit('echo', {'text': 'x'}))['status'] == 'queued'
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert queue.depth() == 800
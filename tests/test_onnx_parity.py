@@ -0,0 +1,45 @@
+from importlib.util import find_spec
+
+import numpy as np
+import pytest
+
+# Checked without importing: torch alone takes seconds to import
+for module in ('onnxruntime', 'tokenizers', 'sentence_transformers', 'huggingface_hub'):
+    if find_spec(module) is None:
+        pytest.skip(f'{module} is not installed', allow_module_level=True)
+
+from huggingface_hub import try_to_load_from_cache
+
+from app.services.embedding_model import DEFAULT_MODEL_NAME, get_embedding_model
+from app.services.onnx_embedder import DEFAULT_ONNX_FILE
+
+REPO = f'sentence-transformers/{DEFAULT_MODEL_NAME}'
+
+# Downloading the model is slow and needs the network; run against a warm Hugging Face cache only
+pytestmark = pytest.mark.skipif(
+    not all(isinstance(try_to_load_from_cache(REPO, name), str) for name in ('config.json', DEFAULT_ONNX_FILE)),
+    reason=f'{REPO} is not in the local Hugging Face cache'
+)
+
+TEXTS = [
+    'Senior Python developer with five years of Django and PostgreSQL experience',
+    'Built data pipelines with Airflow, Spark and AWS Glue',
+    'Led a team of four engineers delivering a React Native mobile app',
+    'Requirements: strong SQL skills and experience with cloud data warehouses',
+    'Familiar with Kubernetes, Docker and CI/CD on GitHub Actions',
+    'Excellent written communication and stakeholder management',
+]
+
+
+def encode(backend, tmp_path):
+    model = get_embedding_model(DEFAULT_MODEL_NAME, backend=backend, onnx_cache_dir=str(tmp_path))
+    return np.asarray(model.encode(TEXTS, normalize_embeddings=True), dtype=np.float32)
+
+
+def test_onnx_int8_scores_match_torch(tmp_path):
+    reference = encode('torch', tmp_path)
+    candidate = encode('onnx-int8', tmp_path)
+
+    assert (reference * candidate).sum(axis=1).min() > 0.97
+    drift = np.abs(reference @ reference.T - candidate @ candidate.T)
+    assert drift.max() < 0.05
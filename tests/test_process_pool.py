@@ -0,0 +1,16 @@
+from app.utils.concurrency import get_process_pool
+from app.utils.token_utils import truncate_at_word
+
+
+def test_one_process_pool_per_size():
+    pool = get_process_pool(2)
+    assert get_process_pool(2) is pool
+    assert get_process_pool(3) is not pool
+    assert pool._max_workers == 2
+    assert get_process_pool(3)._max_workers == 3
+
+
+def test_truncate_at_word():
+    assert truncate_at_word('one two three', 9) == 'one two'
+    assert truncate_at_word('onetwothree four', 9) == 'onetwothr'
+    assert truncate_at_word('short', 9) == 'short'
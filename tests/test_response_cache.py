@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.llm_cache import LLMResponseCache
+from app.services.resume_analyzer import ResumeAnalyzer
+from app.utils.cache import MemoryCache
+
+PRIMARY = 'llama3-70b-8192'
+FALLBACK = 'gemma2-9b-it'
+MESSAGES = [{'role': 'user', 'content': 'Review this resume'}]
+
+
+class ScriptedClient:
+    """Answers every call from answered_by, the way ResilientLLMClient reports a fallback."""
+    def __init__(self, answered_by: str):
+        self.answered_by = answered_by
+        self.calls = 0
+
+    def create(self, messages, model, stream=False, **params):
+        self.calls += 1
+        content = f'answer from {self.answered_by}'
+        usage = SimpleNamespace(prompt_tokens=10, completion_tokens=4)
+        if stream:
+            chunks = [
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], x_groq=None),
+                SimpleNamespace(choices=[], x_groq=SimpleNamespace(usage=usage)),
+            ]
+            return iter(chunks), self.answered_by
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage), self.answered_by
+
+
+def analyzer_for(client) -> ResumeAnalyzer:
+    return ResumeAnalyzer(None, llm_client=client, response_cache=LLMResponseCache(MemoryCache()))
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_primary_model_answers_are_cached(stream):
+    client = ScriptedClient(PRIMARY)
+    analyzer = analyzer_for(client)
+    for _ in range(2):
+        if stream:
+            content = ''.join(analyzer._stream_completion('analyze', MESSAGES, PRIMARY))
+        else:
+            content = analyzer._complete('analyze', MESSAGES, PRIMARY)
+        assert content == f'answer from {PRIMARY}'
+    assert client.calls == 1
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_fallback_answers_are_not_cached_under_the_requested_model(stream):
+    client = ScriptedClient(FALLBACK)
+    analyzer = analyzer_for(client)
+    if stream:
+        assert ''.join(analyzer._stream_completion('analyze', MESSAGES, PRIMARY)) == f'answer from {FALLBACK}'
+    else:
+        assert analyzer._complete('analyze', MESSAGES, PRIMARY) == f'answer from {FALLBACK}'
+
+    # Once the primary model is back, the next call reaches it instead of the degraded answer
+    client.answered_by = PRIMARY
+    assert analyzer._complete('analyze', MESSAGES, PRIMARY) == f'answer from {PRIMARY}'
+    assert client.calls == 2
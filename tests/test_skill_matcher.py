@@ -0,0 +1,72 @@
+import random
+import re
+
+import pytest
+
+from app.utils.skill_matcher import SKILL_INDICATORS, SkillMatcher, default_matcher
+
+
+def sentence_loop(text, indicators=SKILL_INDICATORS):
+    """The original extract_skills loop that SkillMatcher.extract has to agree with."""
+    skills = set()
+    for sentence in text.lower().split('.'):
+        for indicator in indicators:
+            if indicator in sentence:
+                parts = sentence.split(indicator)
+                if len(parts) > 1:
+                    potential_skills = re.split(r'[,;&]', parts[1])
+                    skills.update(skill.strip() for skill in potential_skills if skill.strip())
+    return skills
+
+
+@pytest.mark.parametrize('text', [
+    'Skills: python, knowledge of java, familiar with go',
+    'Senior engineer with 3 years experience with AWS',
+    'skills skills python',
+    'Proficient in Python & SQL; experience with Docker. Abilities: leadership, communication.',
+    'Qualifications include skills in testing. No indicators here',
+    '',
+])
+def test_extract_matches_sentence_loop(text):
+    assert set(default_matcher.extract(text)) == sentence_loop(text)
+
+
+def test_extract_keeps_phrases_containing_other_indicators():
+    skills = set(default_matcher.extract('Skills: python, knowledge of java, familiar with go'))
+    assert skills == {': python', 'knowledge of java', 'familiar with go', 'java', 'go'}
+
+
+def test_find_known_prefers_longest_skill():
+    found = default_matcher.find_known('Built APIs in Spring  Boot and Node.js, deployed with CI/CD.')
+    assert [match['skill'] for match in found] == ['spring boot', 'node.js', 'ci/cd']
+
+
+def test_find_known_offsets_point_into_original_text():
+    text = 'İstanbul team: PYTHON and Ruby on Rails'
+    for match in default_matcher.find_known(text):
+        assert ' '.join(text[match['start']:match['end']].lower().split()) == match['skill']
+    assert [match['skill'] for match in default_matcher.find_known(text)] == ['python', 'ruby on rails']
+
+
+def test_find_known_respects_token_boundaries():
+    assert default_matcher.find_known('javascript, golang, reactive') == [
+        {'skill': 'javascript', 'start': 0, 'end': 10},
+        {'skill': 'golang', 'start': 12, 'end': 18},
+    ]
+    assert SkillMatcher(skills=()).find_known('python') == []
+
+
+def test_extract_matches_sentence_loop_on_generated_text():
+    rng = random.Random(7)
+    pieces = [*SKILL_INDICATORS, 'skillskills', 'python', 'java', ' ', ' ', ', ', '; ', ' & ', '. ', 'Skills:', 'SQL']
+    for _ in range(500):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 30)))
+        assert set(default_matcher.extract(text)) == sentence_loop(text), text
+
+
+def test_extract_handles_indicators_that_prefix_each_other():
+    indicators = ('know', 'knowledge of')
+    text = 'knowledge of python; know rust. know go'
+    assert set(SkillMatcher(indicators=indicators).extract(text)) == sentence_loop(text, indicators) == {
+        'ledge of python', 'python', 'know rust', 'go'
+    }
@@ -0,0 +1,25 @@
+import threading
+
+from app.services.token_budget import TokenBudget
+
+
+def test_in_memory_buckets_handle_concurrent_threads():
+    budget = TokenBudget({'model': 10 ** 9}, client_tokens_per_hour=10 ** 9)
+    errors = []
+
+    def run():
+        try:
+            for _ in range(100):
+                reservation = budget.acquire('model', 'client', 10)
+                budget.settle(reservation, 6, 3)
+                budget.usage('client')
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert budget.usage('client')[0]['requests'] == 800
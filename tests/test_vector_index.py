@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from app.services.vector_index import VectorIndex
+
+
+def clustered_vectors(count: int, dim: int = 64, clusters: int = 50, noise: float = 0.6, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, count)] + rng.normal(scale=noise, size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def brute_force_ids(vectors: np.ndarray, query: np.ndarray, k: int) -> set:
+    return {f'doc-{row}' for row in np.argsort(-(vectors @ query))[:k]}
+
+
+def test_brute_force_search_is_exact(tmp_path):
+    vectors = clustered_vectors(500)
+    index = VectorIndex(str(tmp_path))
+    index.add([f'doc-{row}' for row in range(len(vectors))], vectors)
+
+    for query in vectors[:20]:
+        hits = index.search(query, k=10)
+        assert {hit['id'] for hit in hits} == brute_force_ids(vectors, query, 10)
+        assert [hit['score'] for hit in hits] == sorted((hit['score'] for hit in hits), reverse=True)
+
+
+@pytest.mark.parametrize('noise', [0.6, 2.0])
+def test_ivf_recall_matches_brute_force(tmp_path, noise):
+    vectors = clustered_vectors(6100, noise=noise)
+    vectors, queries = vectors[:6000], vectors[6000:]
+    index = VectorIndex(str(tmp_path), ivf_threshold=4000, n_probe=2, target_recall=0.95)
+    index.add([f'doc-{row}' for row in range(len(vectors))], vectors)
+    assert index.trained_count == len(vectors)
+
+    found = sum(
+        len({hit['id'] for hit in index.search(query, k=10)} & brute_force_ids(vectors, query, 10))
+        for query in queries
+    )
+    # Calibration targets 0.95 on indexed vectors; unseen queries get a little slack
+    assert found / (10 * len(queries)) >= 0.9
+
+
+def test_ivf_falls_back_to_brute_force_when_probing_cannot_reach_recall(tmp_path):
+    # Clusters this loose put each query's neighbours in most of the lists
+    vectors = clustered_vectors(6000, noise=6.0)
+    index = VectorIndex(str(tmp_path), ivf_threshold=4000, n_probe=2, target_recall=0.95)
+    index.add([f'doc-{row}' for row in range(len(vectors))], vectors)
+
+    assert index.trained_count == len(vectors)
+    assert index.ivf_probe == 0
+    query = vectors[0]
+    assert {hit['id'] for hit in index.search(query, k=10)} == brute_force_ids(vectors, query, 10)
+
+
+def test_deletes_and_replacements_survive_reload(tmp_path):
+    vectors = clustered_vectors(20)
+    index = VectorIndex(str(tmp_path))
+    index.add([f'doc-{row}' for row in range(20)], vectors, [{'row': row} for row in range(20)])
+    index.delete('doc-3')
+    index.add(['doc-5'], vectors[6:7], [{'row': 'replaced'}])
+
+    reloaded = VectorIndex(str(tmp_path))
+    assert len(reloaded) == 19
+    assert 'doc-3' not in {hit['id'] for hit in reloaded.search(vectors[3], k=20)}
+    top = reloaded.search(vectors[6], k=2)
+    assert {hit['id'] for hit in top} == {'doc-5', 'doc-6'}
+    assert {hit['metadata']['row'] for hit in top} == {'replaced', 6}
+
+
+def test_other_instances_catch_up_incrementally(tmp_path):
+    vectors = clustered_vectors(40)
+    writer, reader = VectorIndex(str(tmp_path)), VectorIndex(str(tmp_path))
+    writer.add([f'doc-{row}' for row in range(30)], vectors[:30])
+    assert len(reader) == 30
+
+    writer.add([f'doc-{row}' for row in range(30, 40)], vectors[30:], [{'row': row} for row in range(30, 40)])
+    writer.delete('doc-0')
+    hits = reader.search(vectors[35], k=1)
+    assert hits[0]['id'] == 'doc-35' and hits[0]['metadata'] == {'row': 35}
+    assert len(reader) == 39
+
+
+@pytest.mark.parametrize('ivf_threshold', [100000, 400])
+def test_compaction_drops_tombstones(tmp_path, ivf_threshold):
+    vectors = clustered_vectors(1000)
+    index = VectorIndex(str(tmp_path), ivf_threshold=ivf_threshold, n_probe=2, compact_ratio=0.25)
+    reader = VectorIndex(str(tmp_path), ivf_threshold=ivf_threshold, n_probe=2)
+    index.add([f'doc-{row}' for row in range(1000)], vectors, [{'row': row} for row in range(1000)])
+    assert len(reader) == 1000
+    assert bool(index.ivf_probe) == (ivf_threshold < 1000)
+
+    for row in range(300):
+        index.delete(f'doc-{row}')
+
+    # The delete that pushed tombstones past a quarter of the rows rewrote the vectors without them
+    assert index.count < 1000
+    assert len(index.deleted) <= 0.25 * index.count
+    for index_view in (index, reader, VectorIndex(str(tmp_path), ivf_threshold=ivf_threshold)):
+        assert len(index_view) == 700
+        hits = index_view.search(vectors[500], k=1)
+        assert hits[0]['id'] == 'doc-500' and hits[0]['metadata'] == {'row': 500}
+        assert 'doc-10' not in {hit['id'] for hit in index_view.search(vectors[10], k=20)}
+
+
+def test_calibration_skips_queries_whose_probes_find_nothing(tmp_path, monkeypatch):
+    vectors = clustered_vectors(6000)
+    index = VectorIndex(str(tmp_path), ivf_threshold=4000, n_probe=2, target_recall=0.95)
+    index.add([f'doc-{row}' for row in range(len(vectors))], vectors)
+    assert index.ivf_probe
+
+    # As when every probed list only holds deleted rows
+    monkeypatch.setattr(index, '_ivf_candidates', lambda query, n_probe: np.empty(0, dtype=np.int64))
+    # Recent numpy accepts kth=-1 on an empty array; older releases reject it as out of bounds
+    argpartition = np.argpartition
+
+    def strict_argpartition(a, kth, *args, **kwargs):
+        if kth < 0:
+            raise ValueError(f'kth(={kth}) out of bounds')
+        return argpartition(a, kth, *args, **kwargs)
+
+    monkeypatch.setattr(np, 'argpartition', strict_argpartition)
+    assert index._calibrate(np.arange(index.count)) == 0
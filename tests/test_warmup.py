@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+from flask import Flask
+
+from app import routes
+from config import Config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_probes_skip_the_analyzer_setup(monkeypatch):
+    def fail():
+        raise RuntimeError('GROQ_API_KEY is not set')
+
+    monkeypatch.setattr(routes, 'init_analyzer', fail)
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.register_blueprint(routes.api)
+    client = app.test_client()
+
+    assert client.get('/api/live').status_code == 200
+    assert client.get('/api/health').status_code == 200
+    assert client.get('/api/ready').status_code in (200, 503)
+    assert client.get('/api/usage').status_code == 500
+
+
+def test_warmup_runs_off_the_gevent_hub():
+    # gevent is an optional extra (requirements-optional.txt)
+    pytest.importorskip('gevent')
+    # A warmup greenlet doing blocking work would stop the hub from serving anything else
+    script = textwrap.dedent('''
+        from gevent import monkey
+        monkey.patch_all()
+        import time
+        import gevent
+        from app.utils.concurrency import native_sleep, start_native_thread
+
+        result = start_native_thread(native_sleep, 0.5)
+        started = time.monotonic()
+        gevent.sleep(0.05)
+        assert time.monotonic() - started < 0.3, 'hub was blocked'
+        result.get()
+    ''')
+    subprocess.run([sys.executable, '-c', script], check=True, cwd=ROOT, timeout=60)
+
+
+def test_pdf_engine_is_ready_once_pdfium_has_read_a_pdf():
+    script = textwrap.dedent('''
+        import sys
+        sys.path.insert(0, 'benchmarks')
+        from synthetic_pdfs import build_pdf
+        from app.utils.pdf_utils import is_pdf_engine_loaded, read_text_from_pdf
+
+        assert not is_pdf_engine_loaded()
+        assert read_text_from_pdf(build_pdf(2, 'single_column', 'normal'))
+        assert 'pdfplumber' not in sys.modules
+        assert is_pdf_engine_loaded()
+    ''')
+    subprocess.run([sys.executable, '-c', script], check=True, cwd=ROOT, timeout=60)